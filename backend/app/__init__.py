@@ -12,10 +12,12 @@ import os
 # Initialize extensions
 db = SQLAlchemy()
 jwt = JWTManager()
-socketio = SocketIO(cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(cors_allowed_origins="*", async_mode=Config.SOCKETIO_ASYNC_MODE)
 migrate = Migrate()
 
 def create_app(config_class=Config):
+    from app.services.realtime import create_client_manager
+
     app = Flask(__name__)
     app.config.from_object(config_class)
     
@@ -23,7 +25,16 @@ def create_app(config_class=Config):
     db.init_app(app)
     jwt.init_app(app)
     CORS(app)
-    socketio.init_app(app, cors_allowed_origins="*")
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        # With a message queue, emits from any process reach clients connected to any other
+        client_manager=create_client_manager(
+            app.config['SOCKETIO_MESSAGE_QUEUE'],
+            channel=app.config['SOCKETIO_CHANNEL'],
+            write_only=app.config['SOCKETIO_WRITE_ONLY']
+        )
+    )
     migrate.init_app(app, db)  # Initialize Flask-Migrate
     
     # Create upload and chroma_db folders if they don't exist
@@ -39,6 +50,14 @@ def create_app(config_class=Config):
     app.register_blueprint(chat_bp, url_prefix='/api/chat')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
 
+    # Socket.IO connect and room subscription handlers
+    from app.routes import events
+
+    # Build shared clients (OpenAI, vector store, ...) before the first request needs them
+    if app.config['CLIENT_WARM_UP']:
+        from app.services.clients import clients
+        clients.warm_up_in_background(app.config['CLIENT_WARM_UP'])
+
     @app.route('/')
     def index():
         return jsonify({
@@ -10,6 +10,12 @@ class Config:
     SQLALCHEMY_DATABASE_URI = f"postgresql://{os.getenv('DB_USER')}:{db_password}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_pre_ping': True
+    }
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
     JWT_ACCESS_TOKEN_EXPIRES = 86400  # 24 hours
     
@@ -22,8 +28,48 @@ class Config:
     # OpenAI Configuration
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     
-    # ChromaDB Configuration
+    # Vector Store Configuration
     CHROMA_PERSIST_DIRECTORY = os.getenv('CHROMA_PERSIST_DIRECTORY', './chroma_db')
+    VECTOR_STORE_BACKEND = os.getenv('VECTOR_STORE_BACKEND', 'chroma')  # 'chroma', 'numpy' or 'remote'
+    VECTOR_STORE_DIRECTORY = os.getenv('VECTOR_STORE_DIRECTORY', './vector_store')  # numpy backend files
+
+    # Vector Store Service Configuration
+    # Used by the 'remote' backend, which writes through vector_store_server.py
+    VECTOR_STORE_URL = os.getenv('VECTOR_STORE_URL', 'http://localhost:5002')
+    VECTOR_STORE_TOKEN = os.getenv('VECTOR_STORE_TOKEN')  # shared bearer token; unset = no authentication
+    VECTOR_STORE_TIMEOUT = float(os.getenv('VECTOR_STORE_TIMEOUT', 30))
+    # Local read replica that follows the service's change log; unset = every read goes to the service
+    VECTOR_STORE_REPLICA_DIRECTORY = os.getenv('VECTOR_STORE_REPLICA_DIRECTORY')
+    VECTOR_STORE_REPLICA_POLL_INTERVAL = float(os.getenv('VECTOR_STORE_REPLICA_POLL_INTERVAL', 0.5))  # seconds
+    VECTOR_STORE_REPLICA_BATCH = int(os.getenv('VECTOR_STORE_REPLICA_BATCH', 200))  # changes applied per pull
+    VECTOR_STORE_CHANGE_LOG_PATH = os.getenv('VECTOR_STORE_CHANGE_LOG_PATH',
+                                             os.path.join(VECTOR_STORE_DIRECTORY, 'changes.sqlite3'))
+    # The service drops changes covered by its snapshot once they are older than the retention
+    VECTOR_STORE_COMPACT_INTERVAL = float(os.getenv('VECTOR_STORE_COMPACT_INTERVAL', 3600))  # seconds; 0 = never
+    VECTOR_STORE_CHANGE_LOG_RETENTION = float(os.getenv('VECTOR_STORE_CHANGE_LOG_RETENTION', 86400))  # seconds
+
+    # Vector Snapshot Configuration
+    # An empty replica loads the service's snapshot first and only then follows the change log
+    VECTOR_STORE_REPLICA_WARM_START = os.getenv('VECTOR_STORE_REPLICA_WARM_START', 'true').lower() == 'true'
+    VECTOR_STORE_SNAPSHOT_PATH = os.getenv('VECTOR_STORE_SNAPSHOT_PATH',
+                                           os.path.join(VECTOR_STORE_DIRECTORY, 'snapshot.vsnap'))  # served to replicas
+    VECTOR_STORE_SNAPSHOT_S3_PREFIX = os.getenv('VECTOR_STORE_SNAPSHOT_S3_PREFIX', 'snapshots/')  # admin API backups
+
+    # Hybrid Search Configuration
+    HYBRID_SEARCH_ENABLED = os.getenv('HYBRID_SEARCH_ENABLED', 'true').lower() == 'true'
+    LEXICAL_INDEX_PATH = os.getenv('LEXICAL_INDEX_PATH', os.path.join(VECTOR_STORE_DIRECTORY, 'bm25.sqlite3'))
+    BM25_K1 = float(os.getenv('BM25_K1', 1.2))
+    BM25_B = float(os.getenv('BM25_B', 0.75))
+    SEARCH_CANDIDATES = int(os.getenv('SEARCH_CANDIDATES', 20))  # per retriever, before fusion and reranking
+    RRF_K = int(os.getenv('RRF_K', 60))
+
+    # Reranking Configuration
+    RERANK_ENABLED = os.getenv('RERANK_ENABLED', 'true').lower() == 'true'
+    RERANK_SIMILARITY_FLOOR = float(os.getenv('RERANK_SIMILARITY_FLOOR', 0.75))  # cosine; ada-002 rarely goes below 0.7
+    RERANK_DUPLICATE_THRESHOLD = float(os.getenv('RERANK_DUPLICATE_THRESHOLD', 0.95))
+    RERANK_MMR_LAMBDA = float(os.getenv('RERANK_MMR_LAMBDA', 0.7))  # 1.0 = relevance only
+    RERANK_RANK_WEIGHT = float(os.getenv('RERANK_RANK_WEIGHT', 0.5))  # share of relevance from the retrieval rank
+    RERANK_CONTEXT_TOKENS = int(os.getenv('RERANK_CONTEXT_TOKENS', 2500))
     
     # File Upload Configuration
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', './uploads')
@@ -33,4 +79,93 @@ class Config:
     EMBEDDING_MODEL = "text-embedding-ada-002"
     CHAT_MODEL = "gpt-4-1106-preview"
     CHUNK_SIZE = 1000
-    CHUNK_OVERLAP = 200
\ No newline at end of file
+    CHUNK_OVERLAP = 200
+
+    # Conversation History Configuration
+    HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', 3000))  # recent messages sent verbatim
+    HISTORY_SUMMARY_TARGET = int(os.getenv('HISTORY_SUMMARY_TARGET', 1500))  # kept verbatim after folding
+    SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'gpt-3.5-turbo-1106')
+    SUMMARY_MAX_TOKENS = int(os.getenv('SUMMARY_MAX_TOKENS', 400))
+
+    # Chat Pipeline Configuration
+    CHAT_EXECUTOR_WORKERS = int(os.getenv('CHAT_EXECUTOR_WORKERS', 16))  # retrievals running alongside history loads
+
+    # Client Warm-up Configuration
+    # Shared clients built in the background when the app starts; empty = build each on first use
+    CLIENT_WARM_UP = [name.strip() for name in os.getenv('CLIENT_WARM_UP', 'openai,vector_store,lexical_index').split(',')
+                      if name.strip()]
+
+    # Socket.IO Configuration
+    # Must match the server's concurrency model: WEB_WORKER_CLASS is read by gunicorn.conf.py
+    SOCKETIO_ASYNC_MODE = {'gevent': 'gevent', 'eventlet': 'eventlet'}.get(os.getenv('WEB_WORKER_CLASS'), 'threading')
+    # Lets every process emit to clients of every other one: redis://..., or sqlite:///path for one host; unset = this process only
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.getenv('SOCKETIO_CHANNEL', 'tourism-chatbot')
+    SOCKETIO_WRITE_ONLY = os.getenv('SOCKETIO_WRITE_ONLY', 'false').lower() == 'true'  # processes that emit but serve no clients
+    SOCKETIO_QUEUE_POLL_INTERVAL = float(os.getenv('SOCKETIO_QUEUE_POLL_INTERVAL', 0.1))  # seconds; sqlite:/// queue only
+
+    # PDF Extraction Configuration
+    PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', os.cpu_count() or 1))  # 1 = extract in the request thread
+    PDF_EXTRACT_PAGES_PER_TASK = int(os.getenv('PDF_EXTRACT_PAGES_PER_TASK', 10))
+
+    # Ingestion Pipeline Configuration
+    INGESTION_BATCH_SIZE = int(os.getenv('INGESTION_BATCH_SIZE', 32))  # chunks embedded and upserted together
+    INGESTION_QUEUE_SIZE = int(os.getenv('INGESTION_QUEUE_SIZE', 4))  # items buffered between pipeline stages
+
+    # Ingestion Job Queue Configuration
+    INGESTION_WORKER_CONCURRENCY = int(os.getenv('INGESTION_WORKER_CONCURRENCY', 2))  # documents processed at once per worker
+    INGESTION_MAX_ATTEMPTS = int(os.getenv('INGESTION_MAX_ATTEMPTS', 3))
+    INGESTION_LEASE_SECONDS = int(os.getenv('INGESTION_LEASE_SECONDS', 120))
+    INGESTION_HEARTBEAT_INTERVAL = int(os.getenv('INGESTION_HEARTBEAT_INTERVAL', 30))  # seconds
+    INGESTION_CANCEL_WAIT = float(os.getenv('INGESTION_CANCEL_WAIT', 30))  # seconds a delete waits for a running job to stop
+    INGESTION_POLL_INTERVAL = float(os.getenv('INGESTION_POLL_INTERVAL', 2.0))  # seconds between empty-queue polls
+
+    # Progress Reporting Configuration
+    PROGRESS_FLUSH_INTERVAL = float(os.getenv('PROGRESS_FLUSH_INTERVAL', 2.0))  # seconds between coalesced flushes
+    PROGRESS_FLUSH_MIN_DELTA = int(os.getenv('PROGRESS_FLUSH_MIN_DELTA', 5))  # percentage points that force a flush
+
+    # Local Cache Configuration
+    CACHE_DIRECTORY = os.getenv('CACHE_DIRECTORY', './cache')
+
+    # OCR Configuration
+    OCR_WORKERS = int(os.getenv('OCR_WORKERS', 2))
+    OCR_CACHE_PATH = os.getenv('OCR_CACHE_PATH', os.path.join(CACHE_DIRECTORY, 'ocr_cache.sqlite3'))
+    OCR_MIN_IMAGE_SIDE = int(os.getenv('OCR_MIN_IMAGE_SIDE', 48))  # pixels
+    OCR_MIN_IMAGE_PIXELS = int(os.getenv('OCR_MIN_IMAGE_PIXELS', 20000))
+    OCR_SKIP_PAGE_TEXT_CHARS = int(os.getenv('OCR_SKIP_PAGE_TEXT_CHARS', 1500))  # 0 = never skip on text density
+    OCR_MIN_ENTROPY = float(os.getenv('OCR_MIN_ENTROPY', 0.5))  # bits; below this an image is treated as blank
+    OCR_TARGET_DPI = int(os.getenv('OCR_TARGET_DPI', 300))
+    OCR_BINARIZE = os.getenv('OCR_BINARIZE', 'true').lower() == 'true'
+    OCR_ESTIMATED_SECONDS_PER_IMAGE = float(os.getenv('OCR_ESTIMATED_SECONDS_PER_IMAGE', 1.0))
+
+    # Embedding Batch Configuration
+    EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv('EMBEDDING_BATCH_MAX_TOKENS', 50000))
+    EMBEDDING_BATCH_MAX_ITEMS = int(os.getenv('EMBEDDING_BATCH_MAX_ITEMS', 256))
+    EMBEDDING_MAX_RETRIES = int(os.getenv('EMBEDDING_MAX_RETRIES', 3))
+    EMBEDDING_RETRY_BACKOFF = float(os.getenv('EMBEDDING_RETRY_BACKOFF', 1.0))  # seconds
+
+    # Embedding Cache Configuration
+    EMBEDDING_CACHE_ENABLED = os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+    EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', os.path.join(CACHE_DIRECTORY, 'embedding_cache.sqlite3'))
+    EMBEDDING_CACHE_MAX_BYTES = int(os.getenv('EMBEDDING_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+    # Query Embedding Cache Configuration
+    QUERY_CACHE_ENABLED = os.getenv('QUERY_CACHE_ENABLED', 'true').lower() == 'true'
+    QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', 2000))
+    QUERY_CACHE_TTL = int(os.getenv('QUERY_CACHE_TTL', 24 * 3600))  # seconds
+    QUERY_CACHE_DISK_ENABLED = os.getenv('QUERY_CACHE_DISK_ENABLED', 'false').lower() == 'true'  # shared across workers
+    QUERY_CACHE_PATH = os.getenv('QUERY_CACHE_PATH', os.path.join(CACHE_DIRECTORY, 'query_cache.sqlite3'))
+    QUERY_CACHE_DISK_MAX_BYTES = int(os.getenv('QUERY_CACHE_DISK_MAX_BYTES', 64 * 1024 * 1024))
+
+    # Query Embedding Micro-batching Configuration
+    EMBEDDING_MICROBATCH_ENABLED = os.getenv('EMBEDDING_MICROBATCH_ENABLED', 'true').lower() == 'true'
+    EMBEDDING_MICROBATCH_MAX_WAIT_MS = float(os.getenv('EMBEDDING_MICROBATCH_MAX_WAIT_MS', 5))
+    EMBEDDING_MICROBATCH_MAX_SIZE = int(os.getenv('EMBEDDING_MICROBATCH_MAX_SIZE', 64))
+    EMBEDDING_MICROBATCH_MAX_IN_FLIGHT = int(os.getenv('EMBEDDING_MICROBATCH_MAX_IN_FLIGHT', 8))  # concurrent API calls
+    EMBEDDING_MICROBATCH_TIMEOUT = float(os.getenv('EMBEDDING_MICROBATCH_TIMEOUT', 10))  # seconds before embedding directly
+
+    # Semantic Answer Cache Configuration
+    ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+    ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', 0.97))  # cosine similarity
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 1000))
+    ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', 7 * 24 * 3600))  # seconds
@@ -7,6 +7,8 @@ class Chat(db.Model):
     title = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    summary = db.Column(db.Text)  # Rolling summary of messages too old to send verbatim
+    summarized_until = db.Column(db.Integer, default=0)  # Id of the last message folded into the summary
     messages = db.relationship('Message', backref='chat', lazy=True, cascade='all, delete-orphan')
 
 class Message(db.Model):
@@ -14,6 +16,8 @@ class Message(db.Model):
     chat_id = db.Column(db.Integer, db.ForeignKey('chat.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
     role = db.Column(db.String(20), nullable=False)  # 'user' or 'assistant'
+    status = db.Column(db.String(20), default='complete')  # 'pending' while a user turn is answered, 'complete', 'failed'
+    error_message = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class PDFDocument(db.Model):
@@ -22,7 +26,7 @@ class PDFDocument(db.Model):
     s3_key = db.Column(db.String(255), nullable=False)
     uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
-    status = db.Column(db.String(20), default='pending')  # 'pending', 'uploading', 'processing', 'completed', 'error'
+    status = db.Column(db.String(20), default='pending')  # 'pending', 'uploading', 'queued', 'processing', 'completed', 'error', 'cancelled'
     error_message = db.Column(db.Text)
     processing_progress = db.Column(db.Integer, default=0)  # Progress percentage
     current_step = db.Column(db.String(50))  # Current processing step description
@@ -41,5 +45,7 @@ class PDFDocument(db.Model):
             'progress': self.processing_progress,
             'current_step': self.current_step,
             'total_pages': self.total_pages,
-            'processed_pages': self.processed_pages
+            'processed_pages': self.processed_pages,
+            'total_chunks': self.total_chunks,
+            'processed_chunks': self.processed_chunks
         }
\ No newline at end of file
@@ -0,0 +1,75 @@
+# backend/app/models/ingestion.py
+
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+
+class IngestionJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), default='document', server_default='document', nullable=False)  # 'document' or 'snapshot_import'
+    document_id = db.Column(db.Integer, db.ForeignKey('pdf_document.id'), index=True)  # None for snapshot imports
+    s3_key = db.Column(db.String(255), nullable=False)  # the PDF, or the snapshot to import
+    status = db.Column(db.String(20), default='queued', nullable=False)  # 'queued', 'running', 'completed', 'failed', 'cancelled'
+    priority = db.Column(db.Integer, default=0, nullable=False)  # Higher runs first
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    worker_id = db.Column(db.String(100))  # Worker currently holding the lease
+    lease_expires_at = db.Column(db.DateTime)  # Job is recovered if the lease runs out
+    heartbeat_at = db.Column(db.DateTime)
+    cancel_requested = db.Column(db.Boolean, default=False, nullable=False)
+    error_message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_ingestion_job_claim', 'status', 'priority', 'created_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'document_id': self.document_id,
+            's3_key': self.s3_key,
+            'status': self.status,
+            'priority': self.priority,
+            'attempts': self.attempts,
+            'worker_id': self.worker_id,
+            'cancel_requested': self.cancel_requested,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class CorpusVersion(db.Model):
+    """Single-row counter bumped whenever the indexed documents change.
+
+    Caches of generated answers are tagged with the version they were built
+    against and treat any other version as stale.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def current(cls):
+        row = cls.query.get(1)
+        return row.version if row else 0
+
+    @classmethod
+    def bump(cls):
+        """Atomically increment the corpus version and return the new value.
+
+        A single upsert, so concurrent first bumps on an empty table cannot
+        both try to insert the row.
+        """
+        now = datetime.utcnow()
+        statement = insert(cls.__table__).values(id=1, version=1, updated_at=now).on_conflict_do_update(
+            index_elements=[cls.__table__.c.id],
+            set_={'version': cls.__table__.c.version + 1, 'updated_at': now}
+        ).returning(cls.__table__.c.version)
+        version = db.session.execute(statement).scalar()
+        db.session.commit()
+        return version
@@ -1,76 +1,39 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
-import boto3
-from botocore.exceptions import ClientError
+from datetime import datetime
 import os
+import tempfile
 from app.models.user import User
 from app.models.chat import PDFDocument
-from app import db, socketio
-from app.services.pdf_processor import PDFProcessor
+from app import db
+from app.services.clients import clients
+from app.services.retriever import Retriever
+from app.services.job_queue import JobQueue, ACTIVE_STATUSES
+from app.services.metrics import metrics
+from app.services import ocr_stats  # adds the ingestion workers' OCR totals to the metrics
+from app.services.realtime import emit_document_progress
+from app.services.vector_store import get_vector_store
+from app.services.vector_snapshot import export_snapshot
+from app.models.ingestion import IngestionJob, CorpusVersion
 from app.config import Config
-import threading
 
 admin_bp = Blueprint('admin', __name__)
+job_queue = JobQueue()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
 
 def get_s3_client():
-    return boto3.client(
-        's3',
-        aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=Config.AWS_SECRET_ACCESS_KEY,
-        region_name=Config.AWS_REGION
-    )
+    return clients.get('s3')
 
 def emit_progress(document_id, status, message, percentage):
-    """Emit processing progress through Socket.IO."""
-    try:
-        socketio.emit('document_progress', {
-            'document_id': document_id,
-            'status': status,
-            'message': message,
-            'percentage': percentage
-        }, namespace='/')
-    except Exception as e:
-        print(f"Error emitting progress: {e}")
-
-def process_document_async(app, document_id, s3_key):
-    """Process document in a separate thread with application context."""
-    with app.app_context():
-        try:
-            document = PDFDocument.query.get(document_id)
-            if not document:
-                emit_progress(document_id, 'error', 'Document not found', -1)
-                return
-
-            try:
-                # Initialize PDF processor with document ID
-                pdf_processor = PDFProcessor(document_id=document_id)
-                
-                # Process PDF
-                pdf_processor.process_pdf(s3_key, document_id)
-                
-                # Update document status
-                document.status = 'completed'
-                document.processing_progress = 100
-                db.session.commit()
-                
-                emit_progress(document_id, 'completed', 'Processing complete!', 100)
-
-            except Exception as e:
-                print(f"Processing error: {str(e)}")
-                document.status = 'error'
-                document.error_message = str(e)
-                document.processing_progress = 0
-                db.session.commit()
-                
-                emit_progress(document_id, 'error', f'Error: {str(e)}', -1)
-
-        except Exception as e:
-            print(f"Thread error: {str(e)}")
-            emit_progress(document_id, 'error', f'System error: {str(e)}', -1)
+    """Emit processing progress to the document's Socket.IO room and the admin room."""
+    emit_document_progress(document_id, {
+        'status': status,
+        'message': message,
+        'percentage': percentage
+    })
 
 @admin_bp.route('/upload', methods=['POST'])
 @jwt_required()
@@ -114,18 +77,15 @@ def upload_file():
             s3_client = get_s3_client()
             s3_client.upload_fileobj(file, Config.S3_BUCKET, s3_key)
             
-            emit_progress(document.id, 'processing', 'Upload complete. Starting PDF processing...', 25)
+            # Queue processing for an ingestion worker
+            document.status = 'queued'
+            db.session.commit()
+            job_queue.enqueue(document.id, s3_key, priority=request.form.get('priority', 0, type=int))
 
-            # Start processing in a separate thread with app context
-            app = current_app._get_current_object()  # Get the actual app object
-            processing_thread = threading.Thread(
-                target=process_document_async,
-                args=(app, document.id, s3_key)
-            )
-            processing_thread.start()
+            emit_progress(document.id, 'queued', 'Upload complete. Waiting for an ingestion worker...', 25)
 
             return jsonify({
-                'message': 'File uploaded and processing started',
+                'message': 'File uploaded and queued for processing',
                 'document': {
                     'id': document.id,
                     'filename': document.filename,
@@ -167,6 +127,9 @@ def get_documents():
                 'uploaded_at': doc.uploaded_at.isoformat(),
                 'error_message': doc.error_message,
                 'total_pages': doc.total_pages,
+                'processed_pages': doc.processed_pages,
+                'total_chunks': doc.total_chunks,
+                'processed_chunks': doc.processed_chunks,
                 'current_step': doc.current_step
             } for doc in documents]
         }), 200
@@ -187,8 +150,16 @@ def delete_document(document_id):
         if not document:
             return jsonify({'error': 'Document not found'}), 404
 
+        # Stop any queued or running ingestion first: a running job would
+        # otherwise keep writing chunks after the embeddings are deleted
+        job_queue.cancel(document_id)
+        if not job_queue.wait_until_stopped(document_id):
+            return jsonify({'error': 'Document is still being processed; its ingestion was cancelled, '
+                                     'try deleting again shortly'}), 409
+
         # Delete from S3
         s3_client = get_s3_client()
+        from botocore.exceptions import ClientError  # loaded with boto3 by the S3 client, not at import
         try:
             s3_client.delete_object(Bucket=Config.S3_BUCKET, Key=document.s3_key)
         except ClientError as e:
@@ -196,17 +167,204 @@ def delete_document(document_id):
 
         # Delete embeddings
         try:
-            pdf_processor = PDFProcessor()
-            pdf_processor.delete_document_embeddings(document_id)
+            Retriever().delete_document_embeddings(document_id)
         except Exception as e:
             return jsonify({'error': f'Error deleting embeddings: {str(e)}'}), 500
 
-        # Delete document record
+        # Delete document record; every job of the document has finished by now
+        IngestionJob.query.filter(
+            IngestionJob.document_id == document_id,
+            IngestionJob.status.notin_(ACTIVE_STATUSES)
+        ).delete(synchronize_session=False)
         db.session.delete(document)
         db.session.commit()
 
+        # Invalidate cached answers that may quote the deleted document. The
+        # delete is committed by now, so a failure here must not turn it into an error
+        try:
+            CorpusVersion.bump()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error bumping corpus version after deleting document {document_id}: {e}")
+
         return jsonify({'message': 'Document deleted successfully'}), 200
 
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/documents/<int:document_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_document(document_id):
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        if not user or not user.is_admin:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        document = PDFDocument.query.get(document_id)
+        if not document:
+            return jsonify({'error': 'Document not found'}), 404
+
+        jobs = job_queue.cancel(document_id)
+        if not jobs:
+            return jsonify({'error': 'Document is not being processed'}), 409
+
+        # Queued jobs stop right away; running ones stop before their next stored batch
+        if all(job.status == 'cancelled' for job in jobs):
+            document.status = 'cancelled'
+            document.current_step = 'Processing cancelled'
+            db.session.commit()
+            emit_progress(document_id, 'cancelled', 'Processing cancelled', 0)
+
+        return jsonify({
+            'message': 'Cancellation requested',
+            'jobs': [job.to_dict() for job in jobs]
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/documents/<int:document_id>/retry', methods=['POST'])
+@jwt_required()
+def retry_document(document_id):
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        if not user or not user.is_admin:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        document = PDFDocument.query.get(document_id)
+        if not document:
+            return jsonify({'error': 'Document not found'}), 404
+
+        if document.status not in ('error', 'cancelled'):
+            return jsonify({'error': f'Only failed or cancelled documents can be retried (status: {document.status})'}), 409
+
+        # The worker resumes from processed_pages/processed_chunks
+        document.status = 'queued'
+        document.error_message = None
+        db.session.commit()
+        job = job_queue.enqueue(document.id, document.s3_key, priority=request.args.get('priority', 0, type=int))
+
+        emit_progress(document.id, 'queued', f'Retry queued, resuming from page {(document.processed_pages or 0) + 1}', 25)
+
+        return jsonify({
+            'message': 'Retry queued',
+            'job': job.to_dict(),
+            'document': document.to_dict()
+        }), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        if not user or not user.is_admin:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        return jsonify({'metrics': metrics.snapshot()}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/vector-store/snapshots', methods=['GET'])
+@jwt_required()
+def list_snapshots():
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        if not user or not user.is_admin:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        response = get_s3_client().list_objects_v2(Bucket=Config.S3_BUCKET,
+                                                   Prefix=Config.VECTOR_STORE_SNAPSHOT_S3_PREFIX)
+        return jsonify({
+            'snapshots': [{
+                'key': item['Key'],
+                'size': item['Size'],
+                'created_at': item['LastModified'].isoformat()
+            } for item in sorted(response.get('Contents', []), key=lambda item: item['LastModified'], reverse=True)]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/vector-store/snapshots', methods=['POST'])
+@jwt_required()
+def create_snapshot():
+    """Export the vector index to a snapshot in S3."""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        if not user or not user.is_admin:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        key = f"{Config.VECTOR_STORE_SNAPSHOT_S3_PREFIX}tourism_docs-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.vsnap"
+        with tempfile.TemporaryDirectory() as scratch:
+            path = os.path.join(scratch, 'snapshot.vsnap')
+            manifest = export_snapshot(get_vector_store(), path)
+            get_s3_client().upload_file(path, Config.S3_BUCKET, key)
+
+        return jsonify({'key': key, 'manifest': manifest}), 201
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/vector-store/snapshots/import', methods=['POST'])
+@jwt_required()
+def import_vector_snapshot():
+    """Queue the import of a snapshot from S3 into the vector index, merging by chunk id.
+
+    An ingestion worker runs the import and reports progress to the admin
+    room as ``snapshot_import_progress`` events; poll the returned job for
+    its final status.
+    """
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        if not user or not user.is_admin:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        key = (request.get_json() or {}).get('key')
+        if not key or not key.startswith(Config.VECTOR_STORE_SNAPSHOT_S3_PREFIX):
+            return jsonify({'error': 'A snapshot key is required'}), 400
+
+        s3_client = get_s3_client()
+        from botocore.exceptions import ClientError  # loaded with boto3 by the S3 client, not at import
+        try:
+            s3_client.head_object(Bucket=Config.S3_BUCKET, Key=key)
+        except ClientError as e:
+            return jsonify({'error': f'Error reading snapshot from S3: {str(e)}'}), 404
+
+        job = job_queue.enqueue(None, key, priority=request.args.get('priority', 0, type=int), kind='snapshot_import')
+
+        return jsonify({'message': 'Snapshot import queued', 'job': job.to_dict()}), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/vector-store/snapshots/import/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_snapshot_import(job_id):
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        if not user or not user.is_admin:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        job = IngestionJob.query.get(job_id)
+        if not job or job.kind != 'snapshot_import':
+            return jsonify({'error': 'Snapshot import not found'}), 404
+
+        return jsonify({'job': job.to_dict()}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,14 +1,99 @@
 # backend/app/routes/chat.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.chat import Chat, Message
 from app.models.user import User
-from app.services.chat_service import ChatService
+from app.models.ingestion import CorpusVersion
+from app.services.chat_service import get_chat_service
 from app import db
+from datetime import datetime
+import json
+import time
 
 chat_bp = Blueprint('chat', __name__)
-chat_service = ChatService()
+
+def get_search_filters(data):
+    """Optional retrieval filters from a message request: document_ids, uploaded_after, uploaded_before.
+
+    Raises ValueError with a message for the client when a filter is malformed.
+    """
+    filters = {}
+    if data.get('document_ids'):
+        document_ids = data['document_ids']
+        if not isinstance(document_ids, list) or not all(
+                isinstance(document_id, int) and not isinstance(document_id, bool) for document_id in document_ids):
+            raise ValueError('document_ids must be a list of document ids')
+        filters['document_ids'] = document_ids
+    for key in ('uploaded_after', 'uploaded_before'):
+        if data.get(key):
+            try:
+                filters[key] = datetime.fromisoformat(data[key])
+            except (TypeError, ValueError):
+                raise ValueError(f'{key} must be an ISO 8601 date or datetime, e.g. 2024-01-31 or 2024-01-31T12:00:00')
+    return filters
+
+def begin_turn(chat, message_text):
+    """First short transaction of a turn: store the user message as pending and read all generation needs.
+
+    The commit returns the connection to the pool, so none is held while
+    the answer is generated.
+    """
+    snapshot = get_chat_service().load_history(chat)
+    user_message = Message(
+        chat_id=chat.id,
+        content=message_text,
+        role='user',
+        status='pending'
+    )
+    db.session.add(user_message)
+    db.session.flush()
+    
+    turn = {
+        'snapshot': snapshot,
+        'user_message_id': user_message.id,
+        'corpus_version': CorpusVersion.current(),
+        'is_first_message': not snapshot['messages'] and not snapshot['summary']
+    }
+    db.session.commit()
+    return turn
+
+def complete_turn(turn, message_text, response, summary_update):
+    """Last short transaction of a turn: store the answer, complete the user message, set title and summary."""
+    chat_id = turn['snapshot']['chat_id']
+    Message.query.filter_by(id=turn['user_message_id']).update({'status': 'complete'})
+    
+    assistant_message = Message(
+        chat_id=chat_id,
+        content=response,
+        role='assistant'
+    )
+    db.session.add(assistant_message)
+    
+    # Update chat title if it's the first message
+    if turn['is_first_message']:
+        title = message_text[:50] + '...' if len(message_text) > 50 else message_text
+        Chat.query.filter_by(id=chat_id).update({'title': title})
+    get_chat_service().save_summary(turn['snapshot'], summary_update)
+    
+    db.session.flush()
+    reply = {
+        'id': assistant_message.id,
+        'content': assistant_message.content,
+        'created_at': assistant_message.created_at.isoformat()
+    }
+    db.session.commit()
+    return reply
+
+def fail_turn(turn, error):
+    """Record that a turn could not be answered; failed turns are left out of later history."""
+    db.session.rollback()
+    Message.query.filter_by(id=turn['user_message_id']).update({'status': 'failed', 'error_message': str(error)})
+    db.session.commit()
+
+def sse(event, data):
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @chat_bp.route('/chat', methods=['POST'])
 @jwt_required()
@@ -40,7 +125,9 @@ def create_chat():
 @chat_bp.route('/chat/<int:chat_id>/messages', methods=['POST'])
 @jwt_required()
 def send_message(chat_id):
+    turn = None
     try:
+        started_at = time.perf_counter()
         user_id = get_jwt_identity()
         data = request.get_json()
         
@@ -49,48 +136,114 @@ def send_message(chat_id):
         if not chat:
             return jsonify({'error': 'Chat not found'}), 404
         
-        # Get chat history
-        messages = Message.query.filter_by(chat_id=chat_id).order_by(Message.created_at).all()
-        formatted_messages = chat_service.format_history(messages)
+        try:
+            search_filters = get_search_filters(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Embed the query and search while the history is loaded and summarised
+        retrieval = get_chat_service().start_retrieval(data['message'], search_filters)
         
-        # Create user message
-        user_message = Message(
-            chat_id=chat_id,
-            content=data['message'],
-            role='user'
-        )
-        db.session.add(user_message)
+        # Store the user message and release the database connection
+        turn = begin_turn(chat, data['message'])
         
-        # Generate assistant response
-        response = chat_service.create_chat_response(formatted_messages, data['message'])
+        # Get recent chat history within the token budget, plus the rolling summary of older turns
+        formatted_messages, summary_update = get_chat_service().build_history(turn['snapshot'])
         
-        # Create assistant message
-        assistant_message = Message(
-            chat_id=chat_id,
-            content=response,
-            role='assistant'
+        # Generate assistant response
+        response = get_chat_service().create_chat_response(
+            formatted_messages, data['message'],
+            search_filters=search_filters,
+            corpus_version=turn['corpus_version'],
+            retrieval=retrieval,
+            started_at=started_at
         )
-        db.session.add(assistant_message)
-        
-        # Update chat title if it's the first message
-        if len(messages) == 0:
-            chat.title = data['message'][:50] + '...' if len(data['message']) > 50 else data['message']
         
-        db.session.commit()
+        # Create assistant message
+        reply = complete_turn(turn, data['message'], response, summary_update)
         
         return jsonify({
             'message': 'Message sent successfully',
-            'response': {
-                'id': assistant_message.id,
-                'content': assistant_message.content,
-                'created_at': assistant_message.created_at.isoformat()
-            }
+            'response': reply
         }), 200
         
     except Exception as e:
         db.session.rollback()
+        if turn:
+            try:
+                fail_turn(turn, e)
+            except Exception as record_error:
+                print(f"Error recording failed turn: {record_error}")
         return jsonify({'error': str(e)}), 500
 
+@chat_bp.route('/chat/<int:chat_id>/messages/stream', methods=['POST'])
+@jwt_required()
+def stream_message(chat_id):
+    """Like send_message, but streams the answer as server-sent events.
+
+    Emits ``delta`` events with pieces of the answer as the model produces
+    them, then one ``done`` event with the stored message (whose content
+    may add required sections the stream did not include), or an ``error``
+    event.
+    """
+    try:
+        started_at = time.perf_counter()
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        # Verify chat belongs to user
+        chat = Chat.query.filter_by(id=chat_id, user_id=user_id).first()
+        if not chat:
+            return jsonify({'error': 'Chat not found'}), 404
+        
+        try:
+            search_filters = get_search_filters(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Embed the query and search while the history is loaded and summarised
+        retrieval = get_chat_service().start_retrieval(data['message'], search_filters)
+        
+        # Store the user message and release the database connection
+        turn = begin_turn(chat, data['message'])
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        try:
+            formatted_messages, summary_update = get_chat_service().build_history(turn['snapshot'])
+            
+            response = None
+            for event in get_chat_service().stream_chat_response(
+                formatted_messages, data['message'],
+                search_filters=search_filters,
+                corpus_version=turn['corpus_version'],
+                retrieval=retrieval,
+                started_at=started_at
+            ):
+                if event['type'] == 'delta':
+                    yield sse('delta', {'content': event['content']})
+                else:
+                    response = event['content']
+            
+            yield sse('done', complete_turn(turn, data['message'], response, summary_update))
+        
+        except Exception as e:
+            try:
+                fail_turn(turn, e)
+            except Exception as record_error:
+                print(f"Error recording failed turn: {record_error}")
+            yield sse('error', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        # Stop proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @chat_bp.route('/chats', methods=['GET'])
 @jwt_required()
 def get_chats():
@@ -131,6 +284,8 @@ def get_chat(chat_id):
                     'id': msg.id,
                     'content': msg.content,
                     'role': msg.role,
+                    'status': msg.status or 'complete',
+                    'error_message': msg.error_message,
                     'created_at': msg.created_at.isoformat()
                 } for msg in messages]
             }
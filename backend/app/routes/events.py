@@ -0,0 +1,70 @@
+# backend/app/routes/events.py
+#
+# Socket.IO handlers. Clients authenticate with their JWT when connecting
+# and then subscribe to the rooms they want events from: a document's room
+# for that document's progress, or the admin room for every document.
+
+from flask import session
+from flask_jwt_extended import decode_token
+from flask_socketio import join_room, leave_room, ConnectionRefusedError
+from app import socketio
+from app.models.user import User
+from app.models.chat import PDFDocument
+from app.services.realtime import ADMIN_ROOM, document_room
+
+@socketio.on('connect')
+def connect(auth):
+    """Accept only clients that send a valid access token as ``auth.token``."""
+    try:
+        user_id = decode_token((auth or {}).get('token', ''))['sub']
+    except Exception:
+        raise ConnectionRefusedError('Unauthorized')
+
+    user = User.query.get(user_id)
+    if not user:
+        raise ConnectionRefusedError('Unauthorized')
+    session['user_id'] = user.id
+    session['is_admin'] = bool(user.is_admin)
+
+@socketio.on('subscribe_admin')
+def subscribe_admin():
+    """Receive progress events for every document; admins only."""
+    if not session.get('is_admin'):
+        return {'error': 'Unauthorized'}
+    join_room(ADMIN_ROOM)
+    return {'room': ADMIN_ROOM}
+
+@socketio.on('unsubscribe_admin')
+def unsubscribe_admin():
+    leave_room(ADMIN_ROOM)
+    return {'room': ADMIN_ROOM}
+
+@socketio.on('subscribe_document')
+def subscribe_document(data):
+    """Receive progress events for one document; admins or the user who uploaded it.
+
+    Returns the document's current progress in the shape of a
+    ``document_progress`` event, so a client catches up on the events sent
+    before it joined the room.
+    """
+    document = PDFDocument.query.get((data or {}).get('document_id'))
+    if not document:
+        return {'error': 'Document not found'}
+    if not session.get('is_admin') and document.uploaded_by != session.get('user_id'):
+        return {'error': 'Unauthorized'}
+
+    room = document_room(document.id)
+    join_room(room)
+    return {
+        'room': room,
+        'document_id': document.id,
+        'status': document.status,
+        'message': document.error_message if document.status == 'error' else document.current_step,
+        'percentage': document.processing_progress
+    }
+
+@socketio.on('unsubscribe_document')
+def unsubscribe_document(data):
+    room = document_room((data or {}).get('document_id'))
+    leave_room(room)
+    return {'room': room}
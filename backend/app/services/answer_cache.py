@@ -0,0 +1,116 @@
+# backend/app/services/answer_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.config import Config
+from .metrics import metrics
+
+
+class SemanticAnswerCache:
+    """In-process cache of formatted answers looked up by query embedding similarity.
+
+    Query embeddings are kept as unit vectors in a preallocated float32
+    matrix, so a lookup is one matrix-vector product. An entry is returned
+    when its cosine similarity with the query passes ``threshold`` and it was
+    built against the current corpus version. Entries expire after ``ttl``
+    seconds and the least recently used ones are evicted when full.
+    """
+
+    def __init__(self, max_entries=None, threshold=None, ttl=None):
+        self.max_entries = max_entries or Config.ANSWER_CACHE_MAX_ENTRIES
+        self.threshold = Config.ANSWER_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl = Config.ANSWER_CACHE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._entries = OrderedDict()  # matrix row -> entry, in LRU order
+        self._free_rows = list(range(self.max_entries))
+
+    def get(self, query_embedding, corpus_version):
+        """Return the cached answer for a near-identical query, or None."""
+        query = self._unit(query_embedding)
+        now = time.time()
+
+        with self._lock:
+            self._drop_stale(corpus_version, now)
+            if not self._entries:
+                metrics.increment('answer_cache.misses')
+                return None
+
+            rows = np.fromiter(self._entries.keys(), dtype=np.int64)
+            similarities = self._matrix[rows] @ query
+            best = int(np.argmax(similarities))
+
+            if similarities[best] < self.threshold:
+                metrics.increment('answer_cache.misses')
+                return None
+
+            row = int(rows[best])
+            self._entries.move_to_end(row)
+            metrics.increment('answer_cache.hits')
+            return self._entries[row]['answer']
+
+    def put(self, query_embedding, answer, corpus_version):
+        vector = self._unit(query_embedding)
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            if not self._free_rows:
+                evicted_row, _ = self._entries.popitem(last=False)
+                self._free_rows.append(evicted_row)
+
+            row = self._free_rows.pop()
+            self._matrix[row] = vector
+            self._entries[row] = {
+                'answer': answer,
+                'corpus_version': corpus_version,
+                'expires_at': time.time() + self.ttl
+            }
+
+    def stats(self):
+        hits = metrics.counter('answer_cache.hits')
+        misses = metrics.counter('answer_cache.misses')
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else 0.0
+        }
+
+    def _drop_stale(self, corpus_version, now):
+        """Free entries from other corpus versions or past their TTL. Caller holds the lock."""
+        stale = [
+            row for row, entry in self._entries.items()
+            if entry['corpus_version'] != corpus_version or entry['expires_at'] <= now
+        ]
+        for row in stale:
+            del self._entries[row]
+            self._free_rows.append(row)
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Return the process-wide semantic answer cache, or None when it is disabled."""
+    global _answer_cache
+    if not Config.ANSWER_CACHE_ENABLED:
+        return None
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = SemanticAnswerCache()
+            metrics.register('answer_cache', _answer_cache.stats)
+        return _answer_cache
@@ -0,0 +1,95 @@
+# backend/app/services/batch_embedder.py
+
+import time
+from openai import BadRequestError
+from app.config import Config
+from .tokenizer import count_tokens
+
+
+class BatchEmbedder:
+    """Embed many texts with as few multi-input API requests as possible.
+
+    Texts are packed in order into batches that stay under a token and an
+    item budget. Each batch is retried on its own, so a transient failure
+    only repeats the batch that failed, and results are always returned in
+    the same order as the input texts. If a cache is given, only texts it
+    has not seen before are sent to the API.
+    """
+
+    def __init__(self, client, model=None, max_tokens=None, max_items=None,
+                 max_retries=None, retry_backoff=None, cache=None):
+        self.client = client
+        self.cache = cache
+        self.model = model or Config.EMBEDDING_MODEL
+        self.max_tokens = max_tokens or Config.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_items = max_items or Config.EMBEDDING_BATCH_MAX_ITEMS
+        self.max_retries = Config.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = Config.EMBEDDING_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+
+    def plan_batches(self, texts):
+        """Group text indices into batches that respect the token and item budgets."""
+        batches = []
+        current = []
+        current_tokens = 0
+
+        for i, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if current and (current_tokens + tokens > self.max_tokens or len(current) >= self.max_items):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            # A single oversized text still gets a batch of its own
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def embed(self, texts):
+        """Return one embedding per text, aligned with the input order."""
+        if self.cache:
+            embeddings = self.cache.get_many(self.model, texts)
+        else:
+            embeddings = [None] * len(texts)
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        batches = self.plan_batches([texts[i] for i in missing])
+
+        for positions in batches:
+            indices = [missing[position] for position in positions]
+            batch = [texts[i] for i in indices]
+            batch_embeddings = self._embed_batch(batch)
+
+            for index, embedding in zip(indices, batch_embeddings):
+                embeddings[index] = embedding
+            if self.cache:
+                self.cache.put_many(self.model, batch, batch_embeddings)
+
+        return embeddings
+
+    def _embed_batch(self, batch):
+        """Embed one batch, retrying transient errors and splitting rejected batches."""
+        attempt = 0
+        while True:
+            try:
+                response = self.client.embeddings.create(model=self.model, input=batch)
+                # The API reports an index per item; never rely on response order
+                data = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+
+            except BadRequestError:
+                # Retrying a rejected request unchanged will not help. Split it so
+                # only the offending input fails and the rest still gets embedded.
+                if len(batch) == 1:
+                    raise
+                middle = len(batch) // 2
+                return self._embed_batch(batch[:middle]) + self._embed_batch(batch[middle:])
+
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt)
+                attempt += 1
+                print(f"Embedding batch of {len(batch)} failed ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
@@ -1,12 +1,50 @@
-from openai import OpenAI
 from app.config import Config
-from .pdf_processor import PDFProcessor
+from sqlalchemy import or_
+from app.models.chat import Chat, Message
+from app.models.ingestion import CorpusVersion
+from .clients import clients
+from .retriever import Retriever
+from .answer_cache import get_answer_cache
+from .metrics import metrics
+from .tokenizer import count_tokens
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Runs the stages of a chat turn that do not depend on each other
+chat_executor = ThreadPoolExecutor(max_workers=Config.CHAT_EXECUTOR_WORKERS, thread_name_prefix='chat')
+
+CHAT_STAGES = ('history_load', 'history_build', 'embedding', 'search', 'retrieval', 'pre_llm', 'llm')
+
+def prompt_stats():
+    """Average size of the prompts sent to the chat model, for the metrics endpoint."""
+    requests = metrics.counter('chat.requests')
+    return {
+        'requests': requests,
+        'avg_prompt_tokens': round(metrics.counter('chat.prompt_tokens') / requests, 1) if requests else 0.0,
+        'avg_context_tokens': round(metrics.counter('chat.context_tokens') / requests, 1) if requests else 0.0,
+        'avg_context_chunks': round(metrics.counter('chat.context_chunks') / requests, 2) if requests else 0.0
+    }
+
+def stage_stats():
+    """Average time per chat stage. ``serial_ms`` is what the stages before the LLM call
+    would take one after another; ``pre_llm`` is the measured critical path."""
+    stages = {stage: round(metrics.average(f'chat.stage.{stage}') * 1000, 1) for stage in CHAT_STAGES}
+    serial = stages['history_load'] + stages['history_build'] + stages['retrieval']
+    return {
+        'avg_ms': stages,
+        'serial_ms': round(serial, 1),
+        'critical_path_ms': stages['pre_llm'],
+        'saved_ms': round(serial - stages['pre_llm'], 1) if stages['pre_llm'] else 0.0
+    }
+
+metrics.register('chat_prompts', prompt_stats)
+metrics.register('chat_stages', stage_stats)
 
 class ChatService:
     def __init__(self):
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
-        self.pdf_processor = PDFProcessor()
+        self.client = clients.get('openai')
+        self.retriever = Retriever()
 
     def get_system_message(self):
         return {
@@ -46,62 +84,322 @@ class ChatService:
             """
         }
 
-    def create_chat_response(self, messages, query):
+    def start_retrieval(self, query, search_filters=None):
+        """Embed the query and search for context on the shared executor, e.g. while the history is loaded.
+
+        Returns a dict of two futures: ``embedding`` for the query embedding
+        and ``search`` for the relevant chunks, so the answer cache can be
+        checked as soon as the embedding is ready. Neither touches the
+        database, so both can run in any thread.
+        """
+        start = time.perf_counter()
+        embedding = chat_executor.submit(self.retriever.embed_query, query)
+
+        def search():
+            query_embedding = embedding.result()
+            embedded = time.perf_counter()
+            # Search for relevant context, optionally narrowed to some documents or upload dates
+            relevant_chunks = self.retriever.search_similar_chunks(
+                query, query_embedding=query_embedding, **(search_filters or {})
+            )
+            done = time.perf_counter()
+
+            metrics.observe('chat.stage.embedding', embedded - start)
+            metrics.observe('chat.stage.search', done - embedded)
+            metrics.observe('chat.stage.retrieval', done - start)
+            return relevant_chunks
+
+        return {'embedding': embedding, 'search': chat_executor.submit(search)}
+
+    def prepare_turn(self, messages, query, search_filters=None, corpus_version=None, retrieval=None):
+        """Everything needed to answer ``query`` short of calling the chat model.
+
+        Returns a dict with the ``conversation`` to send, the ``context`` and
+        ``relevant_chunks`` it contains, and a ``cached_answer`` when the
+        semantic answer cache already has one (the conversation is then not
+        built, and the search is not waited for). ``answer_cache``,
+        ``query_embedding`` and ``corpus_version`` are kept for storing the
+        answer in ``finish_turn``. Pass ``corpus_version`` when it was read
+        earlier, so that no database query happens here, and ``retrieval``
+        when start_retrieval already started embedding and searching.
+        """
+        retrieval = retrieval or self.start_retrieval(query, search_filters)
+        turn = {'cached_answer': None, 'answer_cache': None, 'context': "", 'relevant_chunks': []}
+        turn['query_embedding'] = retrieval['embedding'].result()
+
+        # First-turn, unfiltered questions can be answered from earlier near-duplicates
+        answer_cache = get_answer_cache() if not messages and not search_filters else None
+        if answer_cache:
+            turn['answer_cache'] = answer_cache
+            turn['corpus_version'] = CorpusVersion.current() if corpus_version is None else corpus_version
+            turn['cached_answer'] = answer_cache.get(turn['query_embedding'], turn['corpus_version'])
+            if turn['cached_answer'] is not None:
+                # Drop the search if it has not started yet; a running one finishes off the critical path
+                retrieval['search'].cancel()
+                return turn
+
+        relevant_chunks = retrieval['search'].result()
+        turn['relevant_chunks'] = relevant_chunks
+        
+        # Prepare conversation
+        conversation = [self.get_system_message()]
+        
+        # Add context from documents
+        if relevant_chunks:
+            turn['context'] = "\n\n".join(relevant_chunks)
+            conversation.append({
+                "role": "system",
+                "content": f"Here is some relevant information:\n\n{turn['context']}"
+            })
+        
+        # Add conversation history
+        conversation.extend(messages)
+        
+        # Add current query
+        conversation.append({"role": "user", "content": query})
+        turn['conversation'] = conversation
+        return turn
+
+    def finish_turn(self, turn, chat_content, prompt_tokens=None):
+        """Record prompt size, apply the required sections and cache the answer; returns the formatted answer."""
+        # The API's own prompt token count when available, else a local estimate
+        if prompt_tokens is None:
+            prompt_tokens = sum(count_tokens(m["content"]) for m in turn['conversation'])
+        metrics.increment('chat.requests')
+        metrics.increment('chat.prompt_tokens', prompt_tokens)
+        metrics.increment('chat.context_tokens', count_tokens(turn['context']))
+        metrics.increment('chat.context_chunks', len(turn['relevant_chunks']))
+
+        formatted_content = self.format_response(chat_content)
+
+        if turn['answer_cache']:
+            turn['answer_cache'].put(turn['query_embedding'], formatted_content, turn['corpus_version'])
+        return formatted_content
+
+    def create_chat_response(self, messages, query, search_filters=None, corpus_version=None, retrieval=None,
+                             started_at=None):
+        """Answer ``query``; ``started_at`` (a perf_counter value) marks the start of the turn for stage timings."""
         try:
-            # Search for relevant context
-            relevant_chunks = self.pdf_processor.search_similar_chunks(query)
-            
-            # Prepare conversation
-            conversation = [self.get_system_message()]
-            
-            # Add context from documents
-            if relevant_chunks:
-                context = "\n\n".join(relevant_chunks)
-                conversation.append({
-                    "role": "system",
-                    "content": f"Here is some relevant information:\n\n{context}"
-                })
-            
-            # Add conversation history
-            conversation.extend(messages)
-            
-            # Add current query
-            conversation.append({"role": "user", "content": query})
+            turn = self.prepare_turn(messages, query, search_filters, corpus_version, retrieval)
+            if started_at is not None:
+                metrics.observe('chat.stage.pre_llm', time.perf_counter() - started_at)
+            if turn['cached_answer'] is not None:
+                return turn['cached_answer']
             
             # Get response from OpenAI
+            llm_start = time.perf_counter()
             response = self.client.chat.completions.create(
                 model=Config.CHAT_MODEL,
-                messages=conversation,
+                messages=turn['conversation'],
                 temperature=0.7,
                 max_tokens=1500
             )
+            metrics.observe('chat.stage.llm', time.perf_counter() - llm_start)
             
             # Process the response
-            chat_content = response.choices[0].message.content
-            
-            # Ensure required sections are present
-            required_sections = {
-                'Summary:': '\nNo summary provided.',
-                'Details:': '\nNo details provided.',
-                'Statistics:': '\nNone',
-                'Commentary:': '\nNo commentary provided.'
-            }
-            
-            formatted_content = chat_content
-            
-            # Add missing sections and ensure proper formatting
-            for section, default_content in required_sections.items():
-                if section not in formatted_content:
-                    formatted_content += f"\n\n{section}{default_content}"
-            
-            return formatted_content
+            usage = getattr(response, 'usage', None)
+            return self.finish_turn(
+                turn, response.choices[0].message.content,
+                prompt_tokens=usage.prompt_tokens if usage else None
+            )
 
         except Exception as e:
             print(f"Error generating chat response: {e}")
             raise
 
+    def stream_chat_response(self, messages, query, search_filters=None, corpus_version=None, retrieval=None,
+                             started_at=None):
+        """Generate a response as it is produced.
+
+        Yields ``{'type': 'delta', 'content': ...}`` for each piece of text
+        from the model and finally ``{'type': 'done', 'content': ...}`` with
+        the complete answer after the required sections are applied. The time
+        from ``started_at`` (or the call) to the first delta is recorded as
+        ``chat.time_to_first_token``.
+        """
+        start = time.perf_counter() if started_at is None else started_at
+        try:
+            turn = self.prepare_turn(messages, query, search_filters, corpus_version, retrieval)
+            metrics.observe('chat.stage.pre_llm', time.perf_counter() - start)
+            if turn['cached_answer'] is not None:
+                metrics.observe('chat.time_to_first_token', time.perf_counter() - start)
+                yield {'type': 'delta', 'content': turn['cached_answer']}
+                yield {'type': 'done', 'content': turn['cached_answer']}
+                return
+
+            llm_start = time.perf_counter()
+            stream = self.client.chat.completions.create(
+                model=Config.CHAT_MODEL,
+                messages=turn['conversation'],
+                temperature=0.7,
+                max_tokens=1500,
+                stream=True
+            )
+
+            parts = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if not parts:
+                    metrics.observe('chat.time_to_first_token', time.perf_counter() - start)
+                parts.append(delta)
+                yield {'type': 'delta', 'content': delta}
+
+            chat_content = "".join(parts)
+            metrics.observe('chat.streamed_response', time.perf_counter() - start)
+            metrics.observe('chat.stage.llm', time.perf_counter() - llm_start)
+            # Sections the model left out are appended, so the final answer can extend the streamed text
+            yield {'type': 'done', 'content': self.finish_turn(turn, chat_content)}
+
+        except Exception as e:
+            print(f"Error streaming chat response: {e}")
+            raise
+
+    def format_response(self, chat_content):
+        # Ensure required sections are present
+        required_sections = {
+            'Summary:': '\nNo summary provided.',
+            'Details:': '\nNo details provided.',
+            'Statistics:': '\nNone',
+            'Commentary:': '\nNo commentary provided.'
+        }
+        
+        formatted_content = chat_content
+        
+        # Add missing sections and ensure proper formatting
+        for section, default_content in required_sections.items():
+            if section not in formatted_content:
+                formatted_content += f"\n\n{section}{default_content}"
+        
+        return formatted_content
+
+    def load_history(self, chat):
+        """Read what build_history needs for a chat into plain data, so no database work is left for later.
+
+        Only completed messages newer than the chat's rolling summary are
+        loaded; failed turns and turns still being answered are left out.
+        """
+        start = time.perf_counter()
+        messages = Message.query.filter(
+            Message.chat_id == chat.id,
+            Message.id > (chat.summarized_until or 0),
+            or_(Message.status.is_(None), Message.status == 'complete')
+        ).order_by(Message.created_at, Message.id).all()
+
+        snapshot = {
+            'chat_id': chat.id,
+            'summary': chat.summary,
+            'summarized_until': chat.summarized_until or 0,
+            'messages': [{'id': msg.id, 'role': msg.role, 'content': msg.content} for msg in messages]
+        }
+        metrics.observe('chat.stage.history_load', time.perf_counter() - start)
+        return snapshot
+
+    def build_history(self, snapshot):
+        """Assemble the history to send for a chat within HISTORY_TOKEN_BUDGET.
+
+        ``snapshot`` comes from load_history. When its messages no longer fit
+        the budget, the oldest are folded into the summary until
+        HISTORY_SUMMARY_TARGET tokens remain, so the summary is updated every
+        few turns from the messages leaving the window rather than rebuilt
+        from the whole chat. Returns the history and, if the summary changed,
+        a ``{'summary', 'summarized_until'}`` update for save_summary.
+        """
+        start = time.perf_counter()
+        messages = snapshot['messages']
+        summary = snapshot['summary']
+        summary_update = None
+
+        if self.history_tokens(messages) > Config.HISTORY_TOKEN_BUDGET:
+            keep_from = max(1, self.window_start(messages, Config.HISTORY_SUMMARY_TARGET))
+            try:
+                summary = self.summarize(summary, messages[:keep_from])
+                summary_update = {'summary': summary, 'summarized_until': messages[keep_from - 1]['id']}
+                messages = messages[keep_from:]
+            except Exception as e:
+                # Fall back to a plain window; the summary catches up on the next turn
+                print(f"Error updating chat summary: {e}")
+                messages = messages[self.window_start(messages, Config.HISTORY_TOKEN_BUDGET):]
+
+        history = []
+        if summary:
+            history.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n\n{summary}"
+            })
+        history.extend(self.format_history(messages))
+        metrics.observe('chat.stage.history_build', time.perf_counter() - start)
+        return history, summary_update
+
+    @staticmethod
+    def save_summary(snapshot, summary_update):
+        """Store a summary update unless another turn has already moved the summary on. The caller commits."""
+        if not summary_update:
+            return
+        previous = Chat.summarized_until == snapshot['summarized_until']
+        if not snapshot['summarized_until']:
+            previous = or_(previous, Chat.summarized_until.is_(None))
+        Chat.query.filter(Chat.id == snapshot['chat_id'], previous).update(
+            summary_update, synchronize_session=False
+        )
+
+    @staticmethod
+    def history_tokens(messages):
+        # A few tokens of per-message overhead on top of the content
+        return sum(count_tokens(msg['content']) + 4 for msg in messages)
+
+    def window_start(self, messages, budget):
+        """Index of the oldest message of the most recent run of messages that fits ``budget``.
+
+        The window starts on a user message so no answer is sent without its question.
+        """
+        start = len(messages)
+        used = 0
+        for i in range(len(messages) - 1, -1, -1):
+            used += self.history_tokens([messages[i]])
+            if used > budget:
+                break
+            start = i
+        while start < len(messages) and messages[start]['role'] != 'user':
+            start += 1
+        return start
+
+    def summarize(self, summary, messages):
+        """Fold ``messages`` into the previous ``summary`` and return the new summary."""
+        transcript = "\n\n".join(
+            f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}" for msg in messages
+        )
+        response = self.client.chat.completions.create(
+            model=Config.SUMMARY_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You maintain a running summary of a conversation between a user and an assistant "
+                               "about the Sri Lankan tourism industry. Update the summary with the new messages. "
+                               "Keep the questions asked, key facts, figures and conclusions, and anything the user "
+                               "may refer back to. Reply with the updated summary only."
+                },
+                {
+                    "role": "user",
+                    "content": f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"
+                }
+            ],
+            temperature=0,
+            max_tokens=Config.SUMMARY_MAX_TOKENS
+        )
+        return response.choices[0].message.content.strip()
+
     def format_history(self, messages):
         return [{
-            "role": "user" if msg.role == "user" else "assistant",
-            "content": msg.content
-        } for msg in messages]
\ No newline at end of file
+            "role": "user" if msg['role'] == "user" else "assistant",
+            "content": msg['content']
+        } for msg in messages]
+
+def get_chat_service():
+    """Return the process-wide ChatService, built on the first chat request rather than at import."""
+    return clients.get('chat_service')
+
+clients.register('chat_service', ChatService)
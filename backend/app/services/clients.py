@@ -0,0 +1,119 @@
+# backend/app/services/clients.py
+#
+# Process-wide registry of shared clients and services (OpenAI, S3, the
+# vector store, the BM25 index, ...). Each is built on first use by the
+# factory registered for it and then shared by every request in the process,
+# so importing a route or constructing a service costs nothing until a client
+# is actually needed. Heavy dependencies are imported inside the factories.
+
+import os
+import threading
+import time
+from app.config import Config
+from .metrics import metrics
+
+_MISSING = object()
+
+
+class ClientRegistry:
+    def __init__(self):
+        self._factories = {}
+        self._warm_up_hooks = {}
+        self._instances = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def register(self, name, factory, warm_up=None):
+        """Register ``factory`` to build the client called ``name``.
+
+        ``warm_up`` is an optional callable run on the new instance by
+        ``warm_up``, e.g. to load an index into memory before the first request.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._warm_up_hooks[name] = warm_up
+            self._locks[name] = threading.Lock()
+
+    def get(self, name):
+        """Return the shared client ``name``, building it on first use."""
+        self._check_pid()
+        instance = self._instances.get(name, _MISSING)
+        if instance is not _MISSING:
+            return instance
+
+        if name not in self._factories:
+            raise KeyError(f"No client registered as '{name}'")
+        with self._locks[name]:
+            if name not in self._instances:
+                start = time.perf_counter()
+                self._instances[name] = self._factories[name]()
+                metrics.observe(f'clients.init.{name}', time.perf_counter() - start)
+            return self._instances[name]
+
+    def loaded(self):
+        """Names of the clients built so far in this process."""
+        self._check_pid()
+        return sorted(self._instances)
+
+    def warm_up(self, names=None):
+        """Build the given clients (all registered ones by default) and run their warm-up hooks.
+
+        Returns the seconds spent per client. A client that fails to warm up
+        is reported and left to be built again on first use.
+        """
+        timings = {}
+        for name in names or list(self._factories):
+            start = time.perf_counter()
+            try:
+                instance = self.get(name)
+                hook = self._warm_up_hooks.get(name)
+                if hook and instance is not None:
+                    hook(instance)
+            except Exception as e:
+                print(f"Error warming up client '{name}': {e}")
+                with self._lock:
+                    self._instances.pop(name, None)
+                continue
+            timings[name] = time.perf_counter() - start
+            metrics.observe(f'clients.warm_up.{name}', timings[name])
+        return timings
+
+    def warm_up_in_background(self, names=None):
+        """Run ``warm_up`` on a daemon thread so it does not delay serving requests."""
+        thread = threading.Thread(target=self.warm_up, args=(names,), name='client-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def _check_pid(self):
+        # Sockets, SQLite connections and threads do not survive a fork, so a
+        # forked worker builds its own clients instead of sharing the parent's
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._instances = {}
+                self._locks = {name: threading.Lock() for name in self._factories}
+                self._pid = os.getpid()
+
+
+clients = ClientRegistry()
+
+
+def create_openai_client():
+    from openai import OpenAI
+    return OpenAI(api_key=Config.OPENAI_API_KEY)
+
+
+def create_s3_client():
+    import boto3
+    return boto3.client(
+        's3',
+        aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=Config.AWS_SECRET_ACCESS_KEY,
+        region_name=Config.AWS_REGION
+    )
+
+
+clients.register('openai', create_openai_client)
+clients.register('s3', create_s3_client)
@@ -0,0 +1,127 @@
+# backend/app/services/embedding_batcher.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from app.config import Config
+from .clients import clients
+from .metrics import metrics
+from .tokenizer import count_tokens
+
+
+class EmbeddingMicroBatcher:
+    """Combine embedding requests from concurrent callers into multi-input API calls.
+
+    ``embed`` queues the text and blocks until its embedding is back. A
+    dispatcher thread takes the first waiting text, collects whatever else
+    arrives within ``max_wait`` seconds (up to ``max_batch_size`` texts and
+    EMBEDDING_BATCH_MAX_TOKENS tokens), sends one ``embeddings.create`` call
+    for the batch and fans the results back out. Up to ``max_in_flight``
+    batches are sent at once so one slow call does not hold up the next. A
+    caller whose batch has not come back within ``timeout`` seconds (a stuck
+    dispatcher or a hung call) embeds its text with a direct call instead.
+    """
+
+    def __init__(self, client, model=None, max_wait=None, max_batch_size=None, max_in_flight=None, timeout=None):
+        self.client = client
+        self.model = model or Config.EMBEDDING_MODEL
+        self.max_wait = Config.EMBEDDING_MICROBATCH_MAX_WAIT_MS / 1000 if max_wait is None else max_wait
+        self.max_batch_size = max_batch_size or Config.EMBEDDING_MICROBATCH_MAX_SIZE
+        self.max_in_flight = max_in_flight or Config.EMBEDDING_MICROBATCH_MAX_IN_FLIGHT
+        self.timeout = Config.EMBEDDING_MICROBATCH_TIMEOUT if timeout is None else timeout
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def embed(self, text):
+        future = Future()
+        self._ensure_started()
+        self._queue.put((text, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            metrics.increment('embedding_microbatch.timeouts')
+            return self.client.embeddings.create(model=self.model, input=text).data[0].embedding
+
+    def stats(self):
+        batches = metrics.counter('embedding_microbatch.batches')
+        inputs = metrics.counter('embedding_microbatch.inputs')
+        return {
+            'batches': batches,
+            'inputs': inputs,
+            'avg_batch_size': round(inputs / batches, 2) if batches else 0.0,
+            'requests_saved': inputs - batches,
+            'timeouts': metrics.counter('embedding_microbatch.timeouts')
+        }
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so a forked worker starts its own dispatcher
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._senders = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='embedding-batch')
+            self._slots = threading.BoundedSemaphore(self.max_in_flight)
+            threading.Thread(target=self._dispatch, name='embedding-microbatcher', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _dispatch(self):
+        carried = None
+        while True:
+            batch = [carried or self._queue.get()]
+            carried = None
+            tokens = count_tokens(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                tokens += count_tokens(item[0])
+                if tokens > Config.EMBEDDING_BATCH_MAX_TOKENS:
+                    # Goes first in the next batch
+                    carried = item
+                    break
+                batch.append(item)
+
+            self._slots.acquire()
+            self._senders.submit(self._send, batch)
+
+    def _send(self, batch):
+        try:
+            # Identical texts in one batch are only sent once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            response = self.client.embeddings.create(model=self.model, input=texts)
+            embeddings = dict(zip(texts, (item.embedding for item in sorted(response.data, key=lambda d: d.index))))
+
+            metrics.increment('embedding_microbatch.batches')
+            metrics.increment('embedding_microbatch.inputs', len(batch))
+            for text, future in batch:
+                future.set_result(embeddings[text])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+
+def create_embedding_batcher():
+    batcher = EmbeddingMicroBatcher(clients.get('openai'))
+    metrics.register('embedding_microbatch', batcher.stats)
+    return batcher
+
+
+def get_embedding_batcher():
+    """Return the process-wide embedding micro-batcher, or None when micro-batching is disabled."""
+    if not Config.EMBEDDING_MICROBATCH_ENABLED:
+        return None
+    return clients.get('embedding_batcher')
+
+
+clients.register('embedding_batcher', create_embedding_batcher)
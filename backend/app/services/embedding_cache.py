@@ -0,0 +1,153 @@
+# backend/app/services/embedding_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from app.config import Config
+from .metrics import metrics
+
+
+class EmbeddingCache:
+    """Persistent content-addressed embedding store keyed by (model, SHA-256 of text).
+
+    Embeddings are stored as float32 blobs in SQLite. When the stored bytes
+    exceed ``max_bytes`` the least recently used entries are evicted. With a
+    ``ttl`` (seconds), entries older than that are treated as misses.
+    """
+
+    def __init__(self, path=None, max_bytes=None, ttl=None):
+        self.path = path or Config.EMBEDDING_CACHE_PATH
+        self.max_bytes = Config.EMBEDDING_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS embedding_cache ('
+            'cache_key TEXT PRIMARY KEY, model TEXT NOT NULL, embedding BLOB NOT NULL, '
+            'size INTEGER NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_embedding_cache_last_used ON embedding_cache (last_used)')
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model, text):
+        return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def get_many(self, model, texts):
+        """Return a list aligned with ``texts`` holding cached embeddings or None."""
+        keys = [self.make_key(model, text) for text in texts]
+        found = {}
+        unique_keys = list(set(keys))
+        now = time.time()
+        oldest = now - self.ttl if self.ttl else 0
+
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT cache_key, embedding FROM embedding_cache '
+                    f'WHERE cache_key IN ({placeholders}) AND created_at >= ?',
+                    batch + [oldest]
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                self._conn.executemany(
+                    'UPDATE embedding_cache SET last_used = ? WHERE cache_key = ?',
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+        results = []
+        for key in keys:
+            blob = found.get(key)
+            if blob is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                self.hits += 1
+                embedding = array('f')
+                embedding.frombytes(blob)
+                results.append(embedding.tolist())
+        return results
+
+    def get(self, model, text):
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model, texts, embeddings):
+        """Store embeddings for ``texts`` and evict old entries if over the size cap."""
+        now = time.time()
+        rows = []
+        for text, embedding in zip(texts, embeddings):
+            blob = array('f', embedding).tobytes()
+            rows.append((self.make_key(model, text), model, blob, len(blob), now, now))
+
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO embedding_cache '
+                '(cache_key, model, embedding, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def put(self, model, text, embedding):
+        self.put_many(model, [text], [embedding])
+
+    def stats(self):
+        with self._lock:
+            entries, bytes_stored = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embedding_cache'
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'entries': entries,
+            'bytes_stored': bytes_stored,
+            'max_bytes': self.max_bytes
+        }
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes. Caller holds the lock."""
+        if not self.max_bytes:
+            return
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM embedding_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        to_delete = []
+        for key, size in self._conn.execute('SELECT cache_key, size FROM embedding_cache ORDER BY last_used'):
+            if total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            total -= size
+        self._conn.executemany('DELETE FROM embedding_cache WHERE cache_key = ?', to_delete)
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Return the process-wide embedding cache, or None when caching is disabled."""
+    global _embedding_cache
+    if not Config.EMBEDDING_CACHE_ENABLED:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache()
+            metrics.register('embedding_cache', _embedding_cache.stats)
+        return _embedding_cache
@@ -1,20 +1,31 @@
 # backend/app/services/embedding_service.py
 
-from openai import OpenAI
 from app.config import Config
+from .clients import clients
+from .embedding_cache import get_embedding_cache
 
 class EmbeddingService:
     def __init__(self):
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.client = clients.get('openai')
         self.model = Config.EMBEDDING_MODEL
+        self.cache = get_embedding_cache()
 
     def create_embedding(self, text):
         try:
+            if self.cache:
+                embedding = self.cache.get(self.model, text)
+                if embedding is not None:
+                    return embedding
+
             response = self.client.embeddings.create(
                 model=self.model,
                 input=text
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+
+            if self.cache:
+                self.cache.put(self.model, text, embedding)
+            return embedding
         except Exception as e:
             print(f"Error creating embedding: {e}")
             raise
\ No newline at end of file
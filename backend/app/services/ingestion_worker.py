@@ -0,0 +1,201 @@
+# backend/app/services/ingestion_worker.py
+
+import os
+import socket
+import threading
+from app import db
+from app.config import Config
+from app.models.chat import PDFDocument
+from app.models.ingestion import CorpusVersion
+from .clients import clients
+from .job_queue import JobQueue
+from .lexical_index import get_lexical_index
+from .pdf_processor import PDFProcessor, IngestionCancelled
+from .realtime import emit_snapshot_import_progress
+from .retriever import Retriever
+from .vector_snapshot import import_snapshot
+from .vector_store import get_vector_store
+
+
+class IngestionWorker:
+    """Run ingestion jobs from the JobQueue on a bounded number of threads.
+
+    Each slot claims one job at a time and keeps its lease alive with a
+    heartbeat thread. A heartbeat that finds the job cancelled (or leased to
+    someone else after a recovery) stops the job at its next page batch.
+    Vector snapshot imports queued from the admin API run on the same slots.
+    """
+
+    def __init__(self, app, concurrency=None, worker_id=None):
+        self.app = app
+        self.concurrency = concurrency or Config.INGESTION_WORKER_CONCURRENCY
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.queue = JobQueue()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start the worker slots and the lease recovery loop in background threads."""
+        for slot in range(self.concurrency):
+            self._threads.append(threading.Thread(
+                target=self._run_slot, args=(f"{self.worker_id}/{slot}",),
+                name=f"ingestion-slot-{slot}", daemon=True
+            ))
+        self._threads.append(threading.Thread(target=self._run_recovery, name="ingestion-recovery", daemon=True))
+
+        for thread in self._threads:
+            thread.start()
+        print(f"Ingestion worker {self.worker_id} started with {self.concurrency} slots")
+
+    def stop(self, timeout=None):
+        """Stop claiming new jobs and wait for running ones to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def wait(self):
+        while not self._stop.wait(1):
+            pass
+
+    def _run_slot(self, slot_id):
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    job = self.queue.claim(slot_id)
+                except Exception as e:
+                    print(f"Error claiming ingestion job: {e}")
+                    job = None
+
+                if job is None:
+                    self._stop.wait(Config.INGESTION_POLL_INTERVAL)
+                    continue
+
+                if job.kind == 'snapshot_import':
+                    self.run_snapshot_import(job.id, job.s3_key, slot_id)
+                else:
+                    self.run_job(job.id, job.document_id, job.s3_key, slot_id)
+
+    def _run_recovery(self):
+        with self.app.app_context():
+            while not self._stop.wait(Config.INGESTION_LEASE_SECONDS / 2):
+                try:
+                    self.queue.recover_expired()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error recovering expired ingestion jobs: {e}")
+
+    def run_job(self, job_id, document_id, s3_key, slot_id):
+        """Process one claimed job. Must be called inside an app context."""
+        cancelled = threading.Event()
+        finished = threading.Event()
+
+        def should_cancel():
+            # Checked before every stored batch, so a cancel or delete stops the job within one batch
+            return cancelled.is_set() or self.queue.stop_requested(job_id)
+
+        heartbeat_thread = self._start_heartbeat(job_id, slot_id, cancelled, finished)
+        touched_index = False
+
+        try:
+            if not PDFDocument.query.get(document_id):
+                self.queue.fail(job_id, 'Document not found')
+                return
+
+            touched_index = True
+            pdf_processor = PDFProcessor(document_id=document_id)
+            # Resume from the document's checkpoint after a crash or a retry
+            pdf_processor.process_pdf(s3_key, document_id, should_cancel=should_cancel, resume=True)
+            self.queue.complete(job_id)
+
+        except IngestionCancelled:
+            db.session.rollback()
+            self.queue.mark_cancelled(job_id)
+
+        except Exception as e:
+            print(f"Processing error: {str(e)}")
+            db.session.rollback()
+            self.queue.fail(job_id, str(e))
+
+        finally:
+            finished.set()
+            heartbeat_thread.join()
+            # Completed, cancelled and failed runs all leave chunks in the index,
+            # so answers cached against the previous corpus are stale either way
+            if touched_index:
+                try:
+                    CorpusVersion.bump()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error bumping corpus version after ingestion job {job_id}: {e}")
+                self.remove_orphaned_chunks(document_id)
+
+    def run_snapshot_import(self, job_id, s3_key, slot_id):
+        """Load a vector snapshot from S3 into the index. Must be called inside an app context.
+
+        Progress goes to the admin room; the corpus version is bumped only
+        once every chunk is imported, so a failed import leaves cached
+        answers alone (a retry merges by chunk id).
+        """
+        finished = threading.Event()
+        heartbeat_thread = self._start_heartbeat(job_id, slot_id, threading.Event(), finished)
+
+        def on_batch(imported, total):
+            emit_snapshot_import_progress(job_id, {
+                'status': 'running',
+                'message': f'Imported {imported}/{total} chunks',
+                'percentage': 10 + int(imported / total * 85)
+            })
+
+        try:
+            emit_snapshot_import_progress(job_id, {'status': 'running', 'message': 'Reading snapshot...',
+                                                   'percentage': 5})
+            # With the remote backend, replicas fill their BM25 index from the change log
+            lexical_index = get_lexical_index() if Config.VECTOR_STORE_BACKEND != 'remote' else None
+            body = clients.get('s3').get_object(Bucket=Config.S3_BUCKET, Key=s3_key)['Body']
+            manifest = import_snapshot(get_vector_store(), body, lexical_index=lexical_index, on_batch=on_batch)
+
+            # Invalidate cached answers built against the previous index
+            get_vector_store().wait_until_readable()
+            CorpusVersion.bump()
+            self.queue.complete(job_id)
+            emit_snapshot_import_progress(job_id, {
+                'status': 'completed',
+                'message': f"Imported {manifest['count']} chunks",
+                'percentage': 100
+            })
+
+        except Exception as e:
+            print(f"Snapshot import error: {str(e)}")
+            db.session.rollback()
+            self.queue.fail(job_id, str(e))
+            emit_snapshot_import_progress(job_id, {'status': 'failed', 'message': str(e), 'percentage': -1})
+
+        finally:
+            finished.set()
+            heartbeat_thread.join()
+
+    def _start_heartbeat(self, job_id, slot_id, cancelled, finished):
+        """Keep the job's lease alive until ``finished`` is set; sets ``cancelled`` when the job should stop."""
+        def heartbeat():
+            with self.app.app_context():
+                while not finished.wait(Config.INGESTION_HEARTBEAT_INTERVAL):
+                    try:
+                        if not self.queue.heartbeat(job_id, slot_id):
+                            cancelled.set()
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"Error sending heartbeat for ingestion job {job_id}: {e}")
+
+        thread = threading.Thread(target=heartbeat, name=f"heartbeat-{job_id}", daemon=True)
+        thread.start()
+        return thread
+
+    def remove_orphaned_chunks(self, document_id):
+        """Delete the chunks of a document that was deleted while its job was still writing them."""
+        try:
+            if db.session.query(PDFDocument.id).filter_by(id=document_id).scalar() is None:
+                print(f"Document {document_id} was deleted during ingestion, removing its chunks")
+                Retriever().delete_document_embeddings(document_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error removing chunks of deleted document {document_id}: {e}")
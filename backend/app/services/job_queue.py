@@ -0,0 +1,157 @@
+# backend/app/services/job_queue.py
+
+import time
+from datetime import datetime, timedelta
+from app import db
+from app.config import Config
+from app.models.ingestion import IngestionJob
+
+# Job statuses that still need a worker
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobQueue:
+    """Postgres-backed queue of document ingestion jobs and vector snapshot imports.
+
+    Workers claim jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` and hold a
+    lease they must keep extending with heartbeats. Jobs whose lease runs
+    out, because their worker crashed or was killed, are put back on the
+    queue by ``recover_expired``.
+    """
+
+    def __init__(self, lease_seconds=None):
+        self.lease_seconds = lease_seconds or Config.INGESTION_LEASE_SECONDS
+
+    def enqueue(self, document_id, s3_key, priority=0, kind='document'):
+        job = IngestionJob(
+            kind=kind,
+            document_id=document_id,
+            s3_key=s3_key,
+            priority=priority,
+            max_attempts=Config.INGESTION_MAX_ATTEMPTS
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def claim(self, worker_id):
+        """Lease the highest-priority queued job to ``worker_id``, or return None."""
+        try:
+            job = IngestionJob.query.filter_by(status='queued', cancel_requested=False) \
+                .order_by(IngestionJob.priority.desc(), IngestionJob.created_at) \
+                .with_for_update(skip_locked=True) \
+                .first()
+            if not job:
+                db.session.rollback()
+                return None
+
+            now = datetime.utcnow()
+            job.status = 'running'
+            job.worker_id = worker_id
+            job.attempts += 1
+            job.started_at = now
+            job.heartbeat_at = now
+            job.lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+            db.session.commit()
+            return job
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def heartbeat(self, job_id, worker_id):
+        """Extend the lease on a running job. Returns False if the job should stop."""
+        job = IngestionJob.query.get(job_id)
+        if not job or job.status != 'running' or job.worker_id != worker_id:
+            db.session.rollback()
+            return False
+
+        now = datetime.utcnow()
+        job.heartbeat_at = now
+        job.lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+        db.session.commit()
+        return not job.cancel_requested
+
+    def complete(self, job_id):
+        self._finish(job_id, 'completed')
+
+    def fail(self, job_id, error_message):
+        self._finish(job_id, 'failed', error_message)
+
+    def mark_cancelled(self, job_id):
+        self._finish(job_id, 'cancelled')
+
+    def cancel(self, document_id):
+        """Cancel the active jobs of a document.
+
+        Queued jobs are cancelled immediately; running jobs are flagged and
+        stopped by their worker before it stores its next batch (see
+        ``stop_requested``). Returns the affected jobs.
+        """
+        jobs = IngestionJob.query.filter(
+            IngestionJob.document_id == document_id,
+            IngestionJob.status.in_(ACTIVE_STATUSES)
+        ).all()
+
+        for job in jobs:
+            if job.status == 'queued':
+                job.status = 'cancelled'
+                job.finished_at = datetime.utcnow()
+            else:
+                job.cancel_requested = True
+        db.session.commit()
+        return jobs
+
+    def stop_requested(self, job_id):
+        """Whether a running job should stop now: it was cancelled, or deleted with its document.
+
+        Reads the flag straight from the database, so callers notice a
+        cancellation without waiting for the next heartbeat.
+        """
+        cancel_requested = db.session.query(IngestionJob.cancel_requested).filter_by(id=job_id).scalar()
+        return cancel_requested is None or cancel_requested
+
+    def wait_until_stopped(self, document_id, timeout=None, poll_interval=0.5):
+        """Wait until a document has no queued or running jobs; False if some are still active after ``timeout``."""
+        deadline = time.monotonic() + (Config.INGESTION_CANCEL_WAIT if timeout is None else timeout)
+        while IngestionJob.query.filter(
+            IngestionJob.document_id == document_id,
+            IngestionJob.status.in_(ACTIVE_STATUSES)
+        ).count():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+        return True
+
+    def recover_expired(self):
+        """Requeue running jobs whose lease expired; give up on ones out of attempts."""
+        expired = IngestionJob.query.filter(
+            IngestionJob.status == 'running',
+            IngestionJob.lease_expires_at < datetime.utcnow()
+        ).with_for_update(skip_locked=True).all()
+
+        for job in expired:
+            print(f"Recovering ingestion job {job.id} from worker {job.worker_id}")
+            job.worker_id = None
+            job.lease_expires_at = None
+            if job.cancel_requested:
+                job.status = 'cancelled'
+                job.finished_at = datetime.utcnow()
+            elif job.attempts >= job.max_attempts:
+                job.status = 'failed'
+                job.error_message = 'Worker lease expired too many times'
+                job.finished_at = datetime.utcnow()
+            else:
+                job.status = 'queued'
+        db.session.commit()
+        return expired
+
+    def _finish(self, job_id, status, error_message=None):
+        job = IngestionJob.query.get(job_id)
+        if not job:
+            # The document and its jobs were deleted while processing
+            return
+        job.status = status
+        job.error_message = error_message
+        job.lease_expires_at = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
@@ -0,0 +1,215 @@
+# backend/app/services/lexical_index.py
+
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from app.config import Config
+from .clients import clients
+from .vector_store import to_timestamp
+
+TOKEN = re.compile(r'\w+')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were what when where which
+who will with how many much does did do can about into than then there their these those over per
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords. Numbers are kept, since they are often what is asked for."""
+    return [
+        token for token in TOKEN.findall(text.lower())
+        if token not in STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+class BM25Index:
+    """On-disk BM25 inverted index over chunk texts, maintained incrementally during ingestion.
+
+    Postings are stored in SQLite clustered by term, with per-term document
+    frequencies and corpus totals kept up to date on every add and delete,
+    so a search only reads the posting lists of the query terms. Chunks carry
+    their document_id and uploaded_at so searches accept the same filters as
+    the vector store.
+    """
+
+    def __init__(self, path=None, k1=None, b=None):
+        self.path = path or Config.LEXICAL_INDEX_PATH
+        self.k1 = Config.BM25_K1 if k1 is None else k1
+        self.b = Config.BM25_B if b is None else b
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS chunks ('
+            'row INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE, document_id INTEGER, '
+            'uploaded_at INTEGER, length INTEGER NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_chunks_document_id ON chunks (document_id)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS postings ('
+            'term TEXT NOT NULL, chunk_row INTEGER NOT NULL, tf INTEGER NOT NULL, '
+            'PRIMARY KEY (term, chunk_row)) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_postings_chunk_row ON postings (chunk_row)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    def add(self, ids, documents, metadatas):
+        """Index chunks, replacing any previous postings of the same ids (e.g. on resume)."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._remove_rows(self._rows_for_ids(ids))
+
+                chunk_count, total_length = self._get_meta('chunk_count'), self._get_meta('total_length')
+                df = Counter()
+                for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                    term_counts = Counter(tokenize(document))
+                    length = sum(term_counts.values())
+                    row = self._conn.execute(
+                        'INSERT INTO chunks (chunk_id, document_id, uploaded_at, length) VALUES (?, ?, ?, ?)',
+                        (chunk_id, metadata.get('document_id'), metadata.get('uploaded_at', 0), length)
+                    ).lastrowid
+                    self._conn.executemany(
+                        'INSERT INTO postings (term, chunk_row, tf) VALUES (?, ?, ?)',
+                        [(term, row, tf) for term, tf in term_counts.items()]
+                    )
+                    df.update(term_counts.keys())
+                    chunk_count += 1
+                    total_length += length
+
+                self._update_df(df, 1)
+                self._set_meta('chunk_count', chunk_count)
+                self._set_meta('total_length', total_length)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def delete_document(self, document_id):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = [row for row, in self._conn.execute(
+                    'SELECT row FROM chunks WHERE document_id = ?', (document_id,)
+                )]
+                self._remove_rows(rows)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def search(self, query, n_results=20, document_ids=None, uploaded_after=None, uploaded_before=None):
+        """Return up to ``n_results`` (chunk id, BM25 score) pairs, best first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        conditions, params = [], []
+        if document_ids:
+            conditions.append(f"c.document_id IN ({','.join('?' * len(document_ids))})")
+            params.extend(int(document_id) for document_id in document_ids)
+        if uploaded_after is not None:
+            conditions.append('c.uploaded_at >= ?')
+            params.append(to_timestamp(uploaded_after))
+        if uploaded_before is not None:
+            conditions.append('c.uploaded_at <= ?')
+            params.append(to_timestamp(uploaded_before))
+        where = ''.join(f' AND {condition}' for condition in conditions)
+
+        scores = Counter()
+        with self._lock:
+            chunk_count = self._get_meta('chunk_count')
+            if not chunk_count:
+                return []
+            average_length = self._get_meta('total_length') / chunk_count
+
+            for term in terms:
+                row = self._conn.execute('SELECT df FROM terms WHERE term = ?', (term,)).fetchone()
+                if not row:
+                    continue
+                df = row[0]
+                idf = math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))
+                postings = self._conn.execute(
+                    'SELECT c.chunk_id, p.tf, c.length FROM postings p JOIN chunks c ON c.row = p.chunk_row '
+                    f'WHERE p.term = ?{where}',
+                    [term] + params
+                )
+                for chunk_id, tf, length in postings:
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return scores.most_common(n_results)
+
+    def count(self):
+        with self._lock:
+            return self._get_meta('chunk_count')
+
+    def _rows_for_ids(self, ids):
+        rows = []
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            rows.extend(row for row, in self._conn.execute(
+                f'SELECT row FROM chunks WHERE chunk_id IN ({placeholders})', batch
+            ))
+        return rows
+
+    def _remove_rows(self, rows):
+        """Delete chunks and their postings, keeping df and corpus totals in step. Caller holds a transaction."""
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            df = Counter(dict(self._conn.execute(
+                f'SELECT term, COUNT(*) FROM postings WHERE chunk_row IN ({placeholders}) GROUP BY term', batch
+            ).fetchall()))
+            removed_chunks, removed_length = self._conn.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks WHERE row IN ({placeholders})', batch
+            ).fetchone()
+
+            self._conn.execute(f'DELETE FROM postings WHERE chunk_row IN ({placeholders})', batch)
+            self._conn.execute(f'DELETE FROM chunks WHERE row IN ({placeholders})', batch)
+            self._update_df(df, -1)
+            self._set_meta('chunk_count', self._get_meta('chunk_count') - removed_chunks)
+            self._set_meta('total_length', self._get_meta('total_length') - removed_length)
+
+    def _update_df(self, df, sign):
+        self._conn.executemany(
+            'INSERT INTO terms (term, df) VALUES (?, ?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df',
+            [(term, sign * count) for term, count in df.items()]
+        )
+        if sign < 0:
+            self._conn.execute('DELETE FROM terms WHERE df <= 0')
+
+    def _get_meta(self, key):
+        row = self._conn.execute('SELECT value FROM index_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_meta(self, key, value):
+        self._conn.execute('INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)', (key, int(value)))
+
+
+def reciprocal_rank_fusion(rankings, k=None):
+    """Fuse ranked lists of ids: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    k = Config.RRF_K if k is None else k
+    scores = Counter()
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] += 1 / (k + rank)
+    return [chunk_id for chunk_id, _ in scores.most_common()]
+
+
+def get_lexical_index():
+    """Return the process-wide BM25 index, or None when hybrid search is disabled."""
+    if not Config.HYBRID_SEARCH_ENABLED:
+        return None
+    return clients.get('lexical_index')
+
+
+clients.register('lexical_index', BM25Index, warm_up=lambda index: index.count())
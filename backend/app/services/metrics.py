@@ -0,0 +1,67 @@
+# backend/app/services/metrics.py
+
+import threading
+
+
+class Metrics:
+    """Process-wide counters and timings, exported through the admin metrics endpoint.
+
+    Components with their own statistics (caches, pools) can register a
+    callable that is evaluated on every snapshot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+        self._providers = {}
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        """Record one duration in seconds."""
+        with self._lock:
+            timing = self._timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+
+    def counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def average(self, name, default=0.0):
+        with self._lock:
+            timing = self._timings.get(name)
+            return timing['total'] / timing['count'] if timing and timing['count'] else default
+
+    def register(self, name, provider):
+        """Include ``provider()`` under ``name`` in every snapshot."""
+        with self._lock:
+            self._providers[name] = provider
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {
+                name: {
+                    'count': timing['count'],
+                    'avg_ms': round(timing['total'] / timing['count'] * 1000, 2) if timing['count'] else 0.0,
+                    'max_ms': round(timing['max'] * 1000, 2)
+                }
+                for name, timing in self._timings.items()
+            }
+            providers = dict(self._providers)
+
+        snapshot = {'counters': counters, 'timings': timings}
+        for name, provider in providers.items():
+            try:
+                snapshot[name] = provider()
+            except Exception as e:
+                snapshot[name] = {'error': str(e)}
+        return snapshot
+
+
+metrics = Metrics()
@@ -0,0 +1,227 @@
+# backend/app/services/ocr_service.py
+
+import hashlib
+import io
+import math
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pytesseract
+from PIL import Image, ImageStat
+from app.config import Config
+
+
+def image_entropy(img):
+    """Shannon entropy of a greyscale image in bits; blank or flat images score near 0."""
+    histogram = img.histogram()
+    total = float(sum(histogram))
+    return -sum((count / total) * math.log2(count / total) for count in histogram if count)
+
+
+def ocr_image(data, scale=1.0, binarize=False, min_entropy=0.0):
+    """Run tesseract on raw image bytes. Runs inside an OCR worker process.
+
+    The image is skipped if it is blank, and otherwise downscaled by ``scale``
+    and optionally binarized before recognition. Returns (text, seconds, blank).
+    """
+    start = time.perf_counter()
+    try:
+        img = Image.open(io.BytesIO(data)).convert('L')
+        if image_entropy(img) < min_entropy:
+            return "", time.perf_counter() - start, True
+
+        if scale < 1.0:
+            size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+            img = img.resize(size, Image.LANCZOS)
+        if binarize:
+            threshold = ImageStat.Stat(img).mean[0]
+            img = img.point(lambda p: 255 if p > threshold else 0)
+
+        return pytesseract.image_to_string(img), time.perf_counter() - start, False
+    except Exception as e:
+        print(f"Error running OCR on image: {e}")
+        return "", time.perf_counter() - start, False
+
+
+class OCRPolicy:
+    """Decide per image whether OCR is worth running, and how to prepare the image.
+
+    Cheap signals are checked before any pixels are decoded: tiny images
+    (icons, bullets, rules) and images on pages that already have a full text
+    layer are skipped. Blank images are caught by an entropy check in the
+    OCR worker, and the rest are downscaled to the target DPI.
+    """
+
+    def __init__(self, min_side=None, min_pixels=None, page_text_chars=None,
+                 target_dpi=None, binarize=None, min_entropy=None):
+        self.min_side = Config.OCR_MIN_IMAGE_SIDE if min_side is None else min_side
+        self.min_pixels = Config.OCR_MIN_IMAGE_PIXELS if min_pixels is None else min_pixels
+        self.page_text_chars = Config.OCR_SKIP_PAGE_TEXT_CHARS if page_text_chars is None else page_text_chars
+        self.target_dpi = Config.OCR_TARGET_DPI if target_dpi is None else target_dpi
+        self.binarize = Config.OCR_BINARIZE if binarize is None else binarize
+        self.min_entropy = Config.OCR_MIN_ENTROPY if min_entropy is None else min_entropy
+
+    def skip_reason(self, image, page_text):
+        """Return why an image should not be OCR'd, or None if it should be."""
+        width, height = image.get('width', 0), image.get('height', 0)
+        if width and height:
+            if min(width, height) < self.min_side or width * height < self.min_pixels:
+                return 'too_small'
+        if self.page_text_chars and len(page_text.strip()) >= self.page_text_chars:
+            return 'page_has_text'
+        return None
+
+    def scale_for(self, image):
+        """Downscale factor that brings the image to the target DPI if it is above it.
+
+        The effective DPI assumes the image spans the page width, which makes
+        it an upper bound for images that are placed smaller.
+        """
+        page_width = image.get('page_size', (0, 0))[0]
+        if not image.get('width') or not page_width or not self.target_dpi:
+            return 1.0
+        dpi = image['width'] / (page_width / 72.0)
+        return min(1.0, self.target_dpi / dpi)
+
+
+class OCRCache:
+    """On-disk map from the SHA-256 of image bytes (and preprocessing) to the OCR text of that image."""
+
+    def __init__(self, path=None):
+        self.path = path or Config.OCR_CACHE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS ocr_cache ('
+            'image_hash TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get_many(self, image_hashes):
+        """Return a dict of image_hash -> text for the hashes present in the cache."""
+        found = {}
+        image_hashes = list(image_hashes)
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(image_hashes), 500):
+                batch = image_hashes[start:start + 500]
+                rows = self._conn.execute(
+                    f'SELECT image_hash, text FROM ocr_cache WHERE image_hash IN ({",".join("?" * len(batch))})',
+                    batch
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, items):
+        """Store an iterable of (image_hash, text) pairs."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO ocr_cache (image_hash, text, created_at) VALUES (?, ?, ?)',
+                [(image_hash, text, now) for image_hash, text in items]
+            )
+            self._conn.commit()
+
+
+class OCRService:
+    """Dedicated OCR stage: content-hash deduplication in front of a bounded process pool."""
+
+    def __init__(self, cache=None, workers=None, policy=None):
+        self.cache = cache or OCRCache()
+        self.workers = workers or Config.OCR_WORKERS
+        self.policy = policy or OCRPolicy()
+        self._pool = None
+        self.reset_stats()
+
+    def recognize(self, images):
+        """Return the OCR text for each image, aligned with the input list.
+
+        Each image is a dict with the raw ``data`` and an optional ``scale``
+        chosen by the OCRPolicy.
+        """
+        if not images:
+            return []
+
+        keys = [self._cache_key(image) for image in images]
+        texts = self.cache.get_many(set(keys))
+
+        # The same logo often appears several times in one batch; OCR it once
+        to_recognize = {}
+        for key, image in zip(keys, images):
+            if key in texts or key in to_recognize:
+                self.hits += 1
+            else:
+                self.misses += 1
+                to_recognize[key] = image
+
+        if to_recognize:
+            pending = list(to_recognize.values())
+            results = self._get_pool().map(
+                ocr_image,
+                [image['data'] for image in pending],
+                [image.get('scale', 1.0) for image in pending],
+                [self.policy.binarize] * len(pending),
+                [self.policy.min_entropy] * len(pending)
+            )
+
+            recognized = {}
+            for key, (text, seconds, blank) in zip(to_recognize.keys(), results):
+                recognized[key] = text
+                if blank:
+                    self.blank += 1
+                else:
+                    self.ocr_seconds += seconds
+                    self.ocr_count += 1
+            self.cache.put_many(recognized.items())
+            texts.update(recognized)
+
+        return [texts[key] for key in keys]
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.blank = 0
+        self.ocr_count = 0
+        self.ocr_seconds = 0.0
+
+    def average_ocr_seconds(self):
+        """Mean tesseract time per recognised image, or the configured estimate before any run."""
+        if self.ocr_count:
+            return self.ocr_seconds / self.ocr_count
+        return Config.OCR_ESTIMATED_SECONDS_PER_IMAGE
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'blank': self.blank,
+            'recognized': self.ocr_count,
+            'ocr_seconds': round(self.ocr_seconds, 2)
+        }
+
+    def shutdown(self):
+        """Stop the worker pool. It is recreated on the next call to recognize()."""
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _cache_key(self, image):
+        # Preprocessing changes the OCR output, so it is part of the key
+        digest = hashlib.sha256(image['data'])
+        digest.update(f"|{image.get('scale', 1.0):.3f}|{self.policy.binarize}".encode())
+        return digest.hexdigest()
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
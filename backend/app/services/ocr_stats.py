@@ -0,0 +1,67 @@
+# backend/app/services/ocr_stats.py
+#
+# Running OCR totals across documents and processes. Ingestion workers add
+# each document's OCR report to a table in the OCR cache database, and the
+# web process reads the totals for the admin metrics endpoint without loading
+# the OCR stack (tesseract, PIL) itself.
+
+import os
+import sqlite3
+import threading
+from app.config import Config
+from .clients import clients
+from .metrics import metrics
+
+# Reasons OCRPolicy.skip_reason gives for not recognising an image
+SKIP_REASONS = ('too_small', 'page_has_text')
+
+
+class OCRStats:
+    """Cumulative OCR cache hits and misses, skipped and blank images and time spent."""
+
+    COUNTERS = ('hits', 'misses', 'blank', 'recognized', 'ocr_seconds', 'estimated_seconds_saved')
+
+    def __init__(self, path=None):
+        self.path = path or Config.OCR_CACHE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS ocr_stats (name TEXT PRIMARY KEY, value REAL NOT NULL)')
+        self._conn.commit()
+
+    def record(self, report):
+        """Add one document's ``PDFProcessor.ocr_report()`` to the totals."""
+        values = [(name, report.get(name, 0)) for name in self.COUNTERS]
+        values += [(f'skipped.{reason}', count) for reason, count in report.get('skipped', {}).items()]
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO ocr_stats (name, value) VALUES (?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+                values
+            )
+            self._conn.commit()
+
+    def totals(self):
+        with self._lock:
+            values = dict(self._conn.execute('SELECT name, value FROM ocr_stats').fetchall())
+        hits, misses = int(values.get('hits', 0)), int(values.get('misses', 0))
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            'blank': int(values.get('blank', 0)),
+            'recognized': int(values.get('recognized', 0)),
+            'skipped': {reason: int(values.get(f'skipped.{reason}', 0)) for reason in SKIP_REASONS},
+            'ocr_seconds': round(values.get('ocr_seconds', 0.0), 2),
+            'estimated_seconds_saved': round(values.get('estimated_seconds_saved', 0.0), 1)
+        }
+
+
+def get_ocr_stats():
+    """Return the process-wide OCR totals."""
+    return clients.get('ocr_stats')
+
+
+clients.register('ocr_stats', OCRStats)
+metrics.register('ocr', lambda: get_ocr_stats().totals())
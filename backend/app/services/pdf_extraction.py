@@ -0,0 +1,42 @@
+# backend/app/services/pdf_extraction.py
+#
+# Page-level text extraction helpers. These live outside PDFProcessor so they
+# can run in worker processes, each of which opens its own PdfReader.
+
+from PyPDF2 import PdfReader
+
+
+def extract_page_content(page, page_number):
+    """Extract the text layer of a page and its embedded images.
+
+    OCR is left to the OCR stage so that images can be gated, deduplicated
+    and recognised in a dedicated pool. Each image is returned as a dict with
+    its raw bytes, pixel size and the size of the page it sits on in points.
+    """
+    text = page.extract_text() or ""
+    images = []
+    page_size = (float(page.mediabox.width), float(page.mediabox.height))
+
+    # Collect images in the page if they exist
+    if '/XObject' in page['/Resources']:
+        xObject = page['/Resources']['/XObject'].get_object()
+
+        for obj in xObject:
+            if xObject[obj]['/Subtype'] == '/Image':
+                try:
+                    images.append({
+                        'data': xObject[obj].get_data(),
+                        'width': int(xObject[obj].get('/Width', 0)),
+                        'height': int(xObject[obj].get('/Height', 0)),
+                        'page_size': page_size
+                    })
+                except Exception as e:
+                    print(f"Error reading image on page {page_number}: {e}")
+
+    return text, images
+
+
+def extract_page_range(pdf_path, start, end):
+    """Extract pages ``start`` to ``end - 1``; returns a list of (page_index, text, images)."""
+    reader = PdfReader(pdf_path)
+    return [(i, *extract_page_content(reader.pages[i], i + 1)) for i in range(start, end)]
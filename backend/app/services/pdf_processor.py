@@ -1,66 +1,56 @@
 import os
 import tempfile
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from PyPDF2 import PdfReader
-import pytesseract
-from PIL import Image
-import io
-import boto3
 from botocore.exceptions import ClientError
-import chromadb
-from chromadb.config import Settings
-from openai import OpenAI
-import pandas as pd
 from app.config import Config
-from flask_socketio import SocketIO
-from app import socketio, db
+from app import db
 from app.models.chat import PDFDocument
+from .batch_embedder import BatchEmbedder
+from .clients import clients
+from .embedding_cache import get_embedding_cache
+from .pdf_extraction import extract_page_content, extract_page_range
+from .ocr_service import OCRService
+from .ocr_stats import get_ocr_stats
+from .pipeline import threaded
+from .progress_reporter import ProgressReporter
+from .vector_store import get_vector_store, to_timestamp
+from .lexical_index import get_lexical_index
+
+
+class IngestionCancelled(Exception):
+    """Raised when ingestion of a document is cancelled while it is running."""
+
 
 class PDFProcessor:
     def __init__(self, document_id=None):
-        self.s3 = boto3.client(
-            's3',
-            aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=Config.AWS_SECRET_ACCESS_KEY,
-            region_name=Config.AWS_REGION
-        )
+        self.s3 = clients.get('s3')
         
-        self.chroma_client = chromadb.Client(Settings(
-            persist_directory=Config.CHROMA_PERSIST_DIRECTORY,
-            is_persistent=True
-        ))
+        self.vector_store = get_vector_store()
+        # With the remote backend, replicas fill their BM25 index from the change log
+        self.lexical_index = get_lexical_index() if Config.VECTOR_STORE_BACKEND != 'remote' else None
         
-        self.openai_client = OpenAI(api_key=Config.OPENAI_API_KEY)
-        self.collection = self.chroma_client.get_or_create_collection("tourism_docs")
+        self.openai_client = clients.get('openai')
+        self.batch_embedder = BatchEmbedder(self.openai_client, cache=get_embedding_cache())
+        self.ocr_service = OCRService()
+        self.ocr_skipped = Counter()
         self.document_id = document_id
+        self.progress = None
 
-    # Update the emit_progress method in the PDFProcessor class
-
-    def emit_progress(self, status: str, message: str, percentage: int):
-        """Emit processing progress through Socket.IO and update database."""
-        if self.document_id and socketio:
-            try:
-                socketio.emit('document_progress', {
-                    'document_id': self.document_id,
-                    'status': status,
-                    'message': message,
-                    'percentage': percentage
-                })
-                
-                # Update document in database
-                from flask import current_app
-                with current_app.app_context():
-                    try:
-                        document = PDFDocument.query.get(self.document_id)
-                        if document:
-                            document.status = status
-                            document.processing_progress = percentage
-                            document.current_step = message
-                            db.session.commit()
-                    except Exception as e:
-                        print(f"Error updating document progress: {e}")
-            except Exception as e:
-                print(f"Error emitting progress: {e}")
+    def emit_progress(self, status: str, message: str, percentage: int, flush: bool = False, **counters):
+        """Report processing progress; Socket.IO and database writes are coalesced by the ProgressReporter.
 
+        ``counters`` may carry total_pages, processed_pages, total_chunks and
+        processed_chunks, which are stored on the PDFDocument. ``flush`` forces
+        an immediate write, e.g. for checkpoints.
+        """
+        if not self.document_id:
+            return
+        if self.progress is None or self.progress.document_id != self.document_id:
+            self.progress = ProgressReporter(self.document_id)
+        self.progress.update(status, message, percentage, flush=flush, **counters)
 
     def download_from_s3(self, s3_key, local_path):
         """Download file from S3 with progress tracking."""
@@ -73,126 +63,297 @@ class PDFProcessor:
             self.emit_progress('error', f'Error downloading from S3: {str(e)}', -1)
             raise
 
-    def extract_text_from_pdf(self, pdf_path):
-        """Extract text from PDF with enhanced progress tracking."""
-        text_chunks = []
-        try:
-            self.emit_progress('processing', 'Starting text extraction...', 40)
-            
-            reader = PdfReader(pdf_path)
-            total_pages = len(reader.pages)
-            
-            # Update total pages in database
-            if self.document_id:
-                try:
-                    document = PDFDocument.query.get(self.document_id)
-                    if document:
-                        document.total_pages = total_pages
-                        db.session.commit()
-                except Exception as e:
-                    print(f"Error updating total pages: {e}")
-            
-            for i, page in enumerate(reader.pages):
-                current_page = i + 1
-                self.emit_progress(
-                    'processing',
-                    f'Processing page {current_page}/{total_pages}',
-                    40 + int((current_page / total_pages) * 20)
-                )
+    @staticmethod
+    def split_into_chunks(text):
+        """Split page text into chunks of CHUNK_SIZE words."""
+        words = text.split()
+        chunks = []
+        for j in range(0, len(words), Config.CHUNK_SIZE):
+            chunk = " ".join(words[j:j + Config.CHUNK_SIZE])
+            if chunk.strip():  # Only add non-empty chunks
+                chunks.append(chunk)
+        return chunks
+
+    def iter_page_texts(self, pdf_path, reader, start_page=0):
+        """Yield (page_index, text) in page order, extracting pages in a process pool for large PDFs.
+
+        Pages before ``start_page`` are skipped entirely.
+        """
+        total_pages = len(reader.pages)
+        pages_per_task = max(1, Config.PDF_EXTRACT_PAGES_PER_TASK)
+        workers = min(Config.PDF_EXTRACT_WORKERS, -(-(total_pages - start_page) // pages_per_task))
+
+        if workers <= 1:
+            for i in range(start_page, total_pages):
+                text, images = extract_page_content(reader.pages[i], i + 1)
+                yield from self.apply_ocr([(i, text, images)])
+            return
+
+        # Each worker opens its own PdfReader on a range of pages. Ranges can
+        # finish in any order, so results are buffered and released in page
+        # order. Only a small window of ranges is in flight at once so a slow
+        # consumer does not make the whole document pile up in memory.
+        ranges = iter([
+            (start, min(start + pages_per_task, total_pages))
+            for start in range(start_page, total_pages, pages_per_task)
+        ])
+        next_page = start_page
+        pending = {}
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            def submit_next():
+                page_range = next(ranges, None)
+                if page_range:
+                    in_flight.add(pool.submit(extract_page_range, pdf_path, *page_range))
+
+            in_flight = set()
+            for _ in range(workers * 2):
+                submit_next()
+
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_contents = future.result()
+                    pending.update(self.apply_ocr(page_contents))
+                    submit_next()
 
-                # Extract text content
-                text = page.extract_text()
-                
-                # Process images in the page if they exist
-                if '/XObject' in page['/Resources']:
-                    xObject = page['/Resources']['/XObject'].get_object()
-                    
-                    for obj in xObject:
-                        if xObject[obj]['/Subtype'] == '/Image':
-                            try:
-                                data = xObject[obj].get_data()
-                                img = Image.open(io.BytesIO(data))
-                                image_text = pytesseract.image_to_string(img)
-                                text += "\n" + image_text
-                            except Exception as e:
-                                print(f"Error processing image on page {current_page}: {e}")
-                
-                # Split text into chunks of specified size
-                words = text.split()
-                for j in range(0, len(words), Config.CHUNK_SIZE):
-                    chunk = " ".join(words[j:j + Config.CHUNK_SIZE])
-                    if chunk.strip():  # Only add non-empty chunks
-                        text_chunks.append(chunk)
+                while next_page in pending:
+                    yield next_page, pending.pop(next_page)
+                    next_page += 1
 
+    def apply_ocr(self, page_contents):
+        """Append the OCR text of each page's images to its text layer; returns (page_index, text) pairs.
+
+        The OCR policy decides per image whether it is worth recognising at
+        all and at what scale; skipped images are counted per reason.
+        """
+        policy = self.ocr_service.policy
+        selected = []
+        for i, text, page_images in page_contents:
+            for image in page_images:
+                reason = policy.skip_reason(image, text)
+                if reason:
+                    self.ocr_skipped[reason] += 1
+                else:
+                    image['scale'] = policy.scale_for(image)
+                    selected.append(image)
+
+        image_texts = dict(zip(map(id, selected), self.ocr_service.recognize(selected)))
+
+        page_texts = []
+        for i, text, page_images in page_contents:
+            for image in page_images:
+                image_text = image_texts.get(id(image))
+                if image_text:
+                    text += "\n" + image_text
+            page_texts.append((i, text))
+        return page_texts
+
+    def ocr_report(self):
+        """Summarise OCR work for the current document, including the estimated time saved."""
+        stats = self.ocr_service.stats()
+        skipped = sum(self.ocr_skipped.values())
+        avoided = skipped + stats['hits'] + stats['blank']
+        return {
+            **stats,
+            'skipped': dict(self.ocr_skipped),
+            'estimated_seconds_saved': round(avoided * self.ocr_service.average_ocr_seconds(), 1)
+        }
+
+    def record_ocr_report(self):
+        """Log the current document's OCR report and add it to the totals in the admin metrics."""
+        report = self.ocr_report()
+        print(f"OCR report for document {self.document_id}: {report}")
+        try:
+            get_ocr_stats().record(report)
         except Exception as e:
-            self.emit_progress('error', f'Error processing PDF: {str(e)}', -1)
-            raise
-        
-        return text_chunks
+            print(f"Error recording OCR stats: {e}")
+
+    def iter_embedded_batches(self, page_texts, document_id, start_chunk=0, reuse_stored=False, uploaded_at=0):
+        """Chunk pages as they arrive and embed them in batches of whole pages.
+
+        Yields dicts with the chunk ``ids``, ``documents``, ``metadatas`` and
+        ``embeddings`` of a batch, plus ``last_page``, the index of the last
+        page it covers.
+        Chunk numbering starts at ``start_chunk``. With ``reuse_stored``,
+        chunks that are already in the vector store (stored after the last checkpoint
+        of an interrupted run) keep their stored embeddings instead of being
+        embedded again.
+        """
+        ids, documents, metadatas = [], [], []
+        last_page = None
+        chunk_index = start_chunk
+
+        def make_batch():
+            nonlocal reuse_stored
+            stored = self.get_stored_embeddings(ids) if reuse_stored and ids else {}
+            # Only the batches right after the checkpoint can already be stored
+            reuse_stored = bool(stored)
+
+            missing = [i for i, chunk_id in enumerate(ids) if chunk_id not in stored]
+            new_embeddings = iter(self.batch_embedder.embed([documents[i] for i in missing]) if missing else [])
+            return {
+                'ids': ids,
+                'documents': documents,
+                'metadatas': metadatas,
+                'embeddings': [stored[chunk_id] if chunk_id in stored else next(new_embeddings) for chunk_id in ids],
+                'last_page': last_page
+            }
+
+        for page_index, text in page_texts:
+            for chunk in self.split_into_chunks(text):
+                ids.append(f"{document_id}_{chunk_index}")
+                documents.append(chunk)
+                metadatas.append(self.chunk_metadata(document_id, page_index + 1, chunk_index, uploaded_at))
+                chunk_index += 1
+            last_page = page_index
+
+            if len(documents) >= Config.INGESTION_BATCH_SIZE:
+                yield make_batch()
+                ids, documents, metadatas = [], [], []
+                last_page = None
+
+        if last_page is not None:
+            yield make_batch()
+
+    @staticmethod
+    def chunk_metadata(document_id, page_number, chunk_index, uploaded_at):
+        """Metadata stored with every chunk; ``uploaded_at`` is a Unix timestamp so it can be range-filtered."""
+        metadata = {
+            'document_id': document_id,
+            'chunk_index': chunk_index,
+            'uploaded_at': uploaded_at
+        }
+        if page_number is not None:
+            metadata['page_number'] = page_number
+        return metadata
+
+    def get_stored_embeddings(self, ids):
+        """Return a dict of chunk id -> embedding for the ids already in the vector store."""
+        return self.vector_store.get_embeddings(ids)
+
+    def max_upsert_batch_size(self):
+        """Largest number of records to send to the vector store in one call."""
+        max_batch_size = self.vector_store.max_batch_size
+        if max_batch_size:
+            return min(Config.INGESTION_BATCH_SIZE, max_batch_size)
+        return Config.INGESTION_BATCH_SIZE
+
+    def store_batch(self, batch):
+        """Upsert one embedded batch into the vector store, split to respect its maximum batch size."""
+        step = self.max_upsert_batch_size()
+        for start in range(0, len(batch['ids']), step):
+            self.vector_store.upsert(
+                ids=batch['ids'][start:start + step],
+                embeddings=batch['embeddings'][start:start + step],
+                documents=batch['documents'][start:start + step],
+                metadatas=batch['metadatas'][start:start + step]
+            )
+        if self.lexical_index:
+            self.lexical_index.add(batch['ids'], batch['documents'], batch['metadatas'])
+
+    def ingest_pdf(self, pdf_path, document_id, should_cancel=None, start_page=0, start_chunk=0):
+        """Stream a PDF through extract -> chunk -> embed -> store; returns the number of chunks stored.
+
+        Each stage runs in its own thread connected by bounded queues, so
+        extraction, embedding and storage overlap, memory stays constant in
+        the size of the document and pages become searchable as they are
+        stored. After every stored batch a checkpoint (processed_pages and
+        processed_chunks) is committed, and ingestion can later resume from
+        ``start_page``/``start_chunk``. ``should_cancel`` is checked before
+        every batch.
+        """
+        reader = PdfReader(pdf_path)
+        total_pages = len(reader.pages)
+        resuming = start_page > 0
+
+        document = PDFDocument.query.get(document_id)
+        uploaded_at = to_timestamp(document.uploaded_at) if document and document.uploaded_at else 0
+
+        self.ocr_service.reset_stats()
+        self.ocr_skipped = Counter()
+        if resuming:
+            self.emit_progress('processing', f'Resuming from page {start_page + 1}/{total_pages}...', 35,
+                               total_pages=total_pages)
+        else:
+            self.emit_progress('processing', 'Extracting and indexing pages...', 35, total_pages=total_pages)
 
-    def create_embeddings(self, text_chunks):
-        """Create embeddings with detailed progress tracking."""
+        pages = threaded(
+            self.iter_page_texts(pdf_path, reader, start_page=start_page),
+            Config.INGESTION_QUEUE_SIZE
+        )
+        batches = threaded(
+            self.iter_embedded_batches(
+                pages, document_id,
+                start_chunk=start_chunk,
+                reuse_stored=True,
+                uploaded_at=uploaded_at
+            ),
+            Config.INGESTION_QUEUE_SIZE
+        )
+        stored_chunks = start_chunk
         try:
-            embeddings = []
-            total_chunks = len(text_chunks)
-            
-            self.emit_progress('processing', 'Starting embeddings creation...', 65)
-            
-            for i, chunk in enumerate(text_chunks):
-                response = self.openai_client.embeddings.create(
-                    model=Config.EMBEDDING_MODEL,
-                    input=chunk
+            for batch in batches:
+                if should_cancel and should_cancel():
+                    raise IngestionCancelled(f"Ingestion of document {document_id} was cancelled")
+
+                self.store_batch(batch)
+                stored_chunks += len(batch['ids'])
+
+                # Checkpoint: everything up to this page is in the vector store
+                stored_pages = batch['last_page'] + 1
+                self.emit_progress(
+                    'processing',
+                    f'Indexed page {stored_pages}/{total_pages} ({stored_chunks} chunks)',
+                    35 + int((stored_pages / total_pages) * 60),
+                    flush=True,
+                    processed_pages=stored_pages,
+                    processed_chunks=stored_chunks
                 )
-                embeddings.append(response.data[0].embedding)
-                
-                if i % 5 == 0 or i == total_chunks - 1:  # Update progress every 5 chunks or on last chunk
-                    progress = 65 + int((i / total_chunks) * 20)
-                    self.emit_progress(
-                        'processing', 
-                        f'Creating embeddings {i+1}/{total_chunks}', 
-                        progress
-                    )
-            
-            return embeddings
-                
-        except Exception as e:
-            self.emit_progress('error', f'Error creating embeddings: {str(e)}', -1)
-            raise
+        finally:
+            batches.close()
+            self.ocr_service.shutdown()
+            self.record_ocr_report()
+            if self.batch_embedder.cache:
+                print(f"Embedding cache stats: {self.batch_embedder.cache.stats()}")
+
+        return stored_chunks
 
-    def process_pdf(self, s3_key, document_id):
-        """Main processing function with comprehensive error handling."""
+    def process_pdf(self, s3_key, document_id, should_cancel=None, resume=False):
+        """Main processing function with comprehensive error handling.
+
+        With ``resume``, processing continues from the document's last
+        checkpoint instead of starting from the first page.
+        """
+        temp_path = None
         try:
             self.document_id = document_id
+            start_page, start_chunk = self.get_checkpoint(document_id) if resume else (0, 0)
             self.emit_progress('processing', 'Starting PDF processing...', 25)
             
             with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+                temp_path = temp_file.name
+
                 # Download PDF from S3
                 if not self.download_from_s3(s3_key, temp_file.name):
                     raise Exception("Failed to download PDF from S3")
 
-                # Extract text from PDF
-                text_chunks = self.extract_text_from_pdf(temp_file.name)
-                if not text_chunks:
-                    raise Exception("No text content extracted from PDF")
-
-                # Create embeddings
-                self.emit_progress('processing', 'Creating embeddings...', 65)
-                embeddings = self.create_embeddings(text_chunks)
-
-                # Store in ChromaDB
-                self.emit_progress('processing', 'Storing in vector database...', 90)
-                self.collection.add(
-                    embeddings=embeddings,
-                    documents=text_chunks,
-                    ids=[f"{document_id}_{i}" for i in range(len(text_chunks))]
+                # Extract, embed and store in the vector store page by page
+                stored_chunks = self.ingest_pdf(
+                    temp_file.name, document_id,
+                    should_cancel=should_cancel,
+                    start_page=start_page,
+                    start_chunk=start_chunk
                 )
+                if not stored_chunks:
+                    raise Exception("No text content extracted from PDF")
 
-                self.emit_progress('completed', 'Processing complete!', 100)
-
-                # Clean up temporary file
-                os.unlink(temp_file.name)
+                self.emit_progress('completed', 'Processing complete!', 100, total_chunks=stored_chunks)
                 return True
 
+        except IngestionCancelled:
+            self.emit_progress('cancelled', 'Processing cancelled', 0)
+            raise
+
         except Exception as e:
             error_message = f"Error processing PDF: {str(e)}"
             self.emit_progress('error', error_message, -1)
@@ -210,41 +371,14 @@ class PDFProcessor:
             
             raise
 
-    def delete_document_embeddings(self, document_id):
-        """Delete document embeddings with error handling."""
-        try:
-            # Find all chunk IDs for this document
-            ids_to_delete = [
-                id for id in self.collection.get()["ids"]
-                if id.startswith(f"{document_id}_")
-            ]
-            
-            if ids_to_delete:
-                self.collection.delete(ids=ids_to_delete)
-            
-            return True
-        
-        except Exception as e:
-            print(f"Error deleting embeddings: {e}")
-            raise
+        finally:
+            # Clean up temporary file
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
 
-    def search_similar_chunks(self, query, n_results=5):
-        """Search for similar chunks with error handling."""
-        try:
-            # Create embedding for the query
-            query_embedding = self.openai_client.embeddings.create(
-                model=Config.EMBEDDING_MODEL,
-                input=query
-            ).data[0].embedding
-
-            # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results
-            )
-
-            return results["documents"][0] if results["documents"] else []
-
-        except Exception as e:
-            print(f"Error searching similar chunks: {e}")
-            raise
\ No newline at end of file
+    def get_checkpoint(self, document_id):
+        """Return (processed_pages, processed_chunks) recorded for a document."""
+        document = PDFDocument.query.get(document_id)
+        if not document:
+            return 0, 0
+        return document.processed_pages or 0, document.processed_chunks or 0
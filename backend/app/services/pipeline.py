@@ -0,0 +1,60 @@
+# backend/app/services/pipeline.py
+
+import queue
+import threading
+
+_DONE = object()
+
+
+class _StageFailure:
+    def __init__(self, error):
+        self.error = error
+
+
+def threaded(iterable, maxsize):
+    """Run ``iterable`` in a background thread and yield its items through a bounded queue.
+
+    Chaining calls turns a chain of generators into overlapping pipeline
+    stages: each stage runs ahead of its consumer by at most ``maxsize``
+    items, which keeps memory bounded however large the input is. Errors in
+    the producer are re-raised in the consumer, and closing the consumer
+    stops the producer.
+    """
+    items = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_StageFailure(e))
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageFailure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
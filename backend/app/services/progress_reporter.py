@@ -0,0 +1,74 @@
+# backend/app/services/progress_reporter.py
+
+import time
+from app import db
+from app.config import Config
+from app.models.chat import PDFDocument
+from .realtime import emit_document_progress
+
+# Statuses that end processing; these are never coalesced
+TERMINAL_STATUSES = ('completed', 'error', 'cancelled')
+
+# Progress counters that map one-to-one onto PDFDocument columns
+COUNTERS = ('total_pages', 'processed_pages', 'total_chunks', 'processed_chunks')
+
+
+class ProgressReporter:
+    """Coalesce document progress updates in memory and flush them in bulk.
+
+    Updates are merged into the latest state and only written to the
+    database and sent to the document's Socket.IO subscribers when the
+    flush interval has passed, the percentage moved by at least the minimum
+    delta, or the status changed. Terminal states are always flushed
+    immediately.
+    """
+
+    def __init__(self, document_id, interval=None, min_delta=None):
+        self.document_id = document_id
+        self.interval = Config.PROGRESS_FLUSH_INTERVAL if interval is None else interval
+        self.min_delta = Config.PROGRESS_FLUSH_MIN_DELTA if min_delta is None else min_delta
+        self.state = {}
+        self._flushed_status = None
+        self._flushed_percentage = None
+        self._flushed_at = 0.0
+
+    def update(self, status, message, percentage, flush=False, **counters):
+        """Record the latest progress and flush it if it is due, or right away with ``flush``."""
+        self.state.update(status=status, message=message, percentage=percentage)
+        self.state.update({name: value for name, value in counters.items() if name in COUNTERS and value is not None})
+
+        if flush or self._should_flush(status, percentage):
+            self.flush()
+
+    def flush(self):
+        """Send the current state to subscribers and write it to the PDFDocument row."""
+        if not self.state:
+            return
+
+        state = dict(self.state)
+        self._flushed_status = state['status']
+        self._flushed_percentage = state['percentage']
+        self._flushed_at = time.monotonic()
+
+        emit_document_progress(self.document_id, state)
+
+        try:
+            document = PDFDocument.query.get(self.document_id)
+            if document:
+                document.status = state['status']
+                document.processing_progress = state['percentage']
+                document.current_step = state['message']
+                for name in COUNTERS:
+                    if name in state:
+                        setattr(document, name, state[name])
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error updating document progress: {e}")
+
+    def _should_flush(self, status, percentage):
+        if status in TERMINAL_STATUSES or status != self._flushed_status:
+            return True
+        if self._flushed_percentage is None or abs(percentage - self._flushed_percentage) >= self.min_delta:
+            return True
+        return time.monotonic() - self._flushed_at >= self.interval
@@ -0,0 +1,106 @@
+# backend/app/services/query_cache.py
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+from .embedding_cache import EmbeddingCache
+from .metrics import metrics
+
+
+def normalize_query(query):
+    """Normalise query text so trivially different phrasings share a cache entry."""
+    query = re.sub(r'\s+', ' ', query.lower()).strip()
+    return query.strip(' ?!.,;:"\'')
+
+
+class QueryEmbeddingCache:
+    """In-process LRU cache of query embeddings with a TTL and an optional shared on-disk tier.
+
+    Keys are the embedding model plus the normalised query text. The disk
+    tier is an EmbeddingCache that several worker processes can share, so a
+    question answered by one worker is a hit for all of them.
+    """
+
+    def __init__(self, max_entries=None, ttl=None, disk_cache=None):
+        self.max_entries = max_entries or Config.QUERY_CACHE_MAX_ENTRIES
+        self.ttl = Config.QUERY_CACHE_TTL if ttl is None else ttl
+        self.disk_cache = disk_cache
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model, query):
+        key = (model, normalize_query(query))
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                embedding, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    metrics.increment('query_embedding_cache.memory_hits')
+                    return embedding
+                del self._entries[key]
+
+        if self.disk_cache:
+            embedding = self.disk_cache.get(model, key[1])
+            if embedding is not None:
+                self._remember(key, embedding)
+                metrics.increment('query_embedding_cache.disk_hits')
+                return embedding
+
+        metrics.increment('query_embedding_cache.misses')
+        return None
+
+    def put(self, model, query, embedding):
+        key = (model, normalize_query(query))
+        self._remember(key, embedding)
+        if self.disk_cache:
+            self.disk_cache.put(model, key[1], embedding)
+
+    def stats(self):
+        hits = metrics.counter('query_embedding_cache.memory_hits') + metrics.counter('query_embedding_cache.disk_hits')
+        misses = metrics.counter('query_embedding_cache.misses')
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            # Every hit skips one embeddings round trip of average miss latency
+            'estimated_seconds_saved': round(hits * metrics.average('query_embedding.api'), 2)
+        }
+
+    def _remember(self, key, embedding):
+        with self._lock:
+            self._entries[key] = (embedding, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_query_cache = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache():
+    """Return the process-wide query embedding cache, or None when it is disabled."""
+    global _query_cache
+    if not Config.QUERY_CACHE_ENABLED:
+        return None
+    with _query_cache_lock:
+        if _query_cache is None:
+            disk_cache = None
+            if Config.QUERY_CACHE_DISK_ENABLED:
+                disk_cache = EmbeddingCache(
+                    path=Config.QUERY_CACHE_PATH,
+                    max_bytes=Config.QUERY_CACHE_DISK_MAX_BYTES,
+                    ttl=Config.QUERY_CACHE_TTL
+                )
+            _query_cache = QueryEmbeddingCache(disk_cache=disk_cache)
+            metrics.register('query_embedding_cache', _query_cache.stats)
+        return _query_cache
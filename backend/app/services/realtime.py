@@ -0,0 +1,124 @@
+# backend/app/services/realtime.py
+#
+# Socket.IO rooms and the message queue that lets any process emit to them.
+#
+# Progress events go to the room of their document and to the admin room,
+# never to every connected client. With SOCKETIO_MESSAGE_QUEUE set, emits
+# are published on a shared queue and every web process delivers them to its
+# own clients, so progress from an ingestion worker reaches browsers
+# connected to any web worker. Redis is the queue for real deployments. A
+# sqlite:/// URL gives a stand-in for several processes on one host
+# (development, tests) without running Redis.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import socketio as python_socketio
+from app import socketio
+from app.config import Config
+
+ADMIN_ROOM = 'admin'
+
+
+def document_room(document_id):
+    return f'document:{document_id}'
+
+
+def emit_document_progress(document_id, state):
+    """Send a ``document_progress`` event to the document's subscribers and to admins."""
+    try:
+        socketio.emit('document_progress', {'document_id': document_id, **state},
+                      to=[document_room(document_id), ADMIN_ROOM])
+    except Exception as e:
+        print(f"Error emitting progress: {e}")
+
+
+def emit_snapshot_import_progress(job_id, state):
+    """Send a ``snapshot_import_progress`` event for a vector snapshot import job to admins."""
+    try:
+        socketio.emit('snapshot_import_progress', {'job_id': job_id, **state}, to=ADMIN_ROOM)
+    except Exception as e:
+        print(f"Error emitting snapshot import progress: {e}")
+
+
+class SQLitePubSubManager(python_socketio.PubSubManager):
+    """Socket.IO pub/sub over a shared SQLite file, for processes on the same host.
+
+    Publishers append messages to a table; every listener polls for rows
+    newer than the last one it saw. Messages are kept for ``retention``
+    seconds, which only has to outlast the poll interval.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, url, channel='socketio', write_only=False, logger=None, poll_interval=None, retention=60):
+        self.path = url[len('sqlite:///'):]
+        self.poll_interval = Config.SOCKETIO_QUEUE_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    def _connection(self):
+        # SQLite connections must not be shared with forked children
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS socketio_messages ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, '
+                'payload TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_socketio_messages_created_at ON socketio_messages (created_at)')
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _publish(self, data):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT INTO socketio_messages (channel, payload, created_at) VALUES (?, ?, ?)',
+                (self.channel, json.dumps(data), now)
+            )
+            conn.execute('DELETE FROM socketio_messages WHERE created_at < ?', (now - self.retention,))
+
+    def _listen(self):
+        # AUTOINCREMENT ids are never reused, so the last id seen is a safe cursor
+        with self._lock:
+            last_id = self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM socketio_messages').fetchone()[0]
+
+        while True:
+            with self._lock:
+                rows = self._connection().execute(
+                    'SELECT id, payload FROM socketio_messages WHERE id > ? AND channel = ? ORDER BY id',
+                    (last_id, self.channel)
+                ).fetchall()
+            for message_id, payload in rows:
+                last_id = message_id
+                yield json.loads(payload)
+            if not rows:
+                self.server.sleep(self.poll_interval)
+
+
+def create_client_manager(url, channel=None, write_only=False):
+    """Build the Socket.IO client manager for a message queue URL, or None without one.
+
+    ``write_only`` managers only publish; use them in processes that emit
+    but serve no Socket.IO clients, such as ingestion workers.
+    """
+    if not url:
+        return None
+    channel = channel or Config.SOCKETIO_CHANNEL
+    if url.startswith('sqlite:///'):
+        return SQLitePubSubManager(url, channel=channel, write_only=write_only)
+    if url.startswith(('redis://', 'rediss://')):
+        return python_socketio.RedisManager(url, channel=channel, write_only=write_only)
+    return python_socketio.KombuManager(url, channel=channel, write_only=write_only)
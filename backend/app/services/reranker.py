@@ -0,0 +1,86 @@
+# backend/app/services/reranker.py
+
+import numpy as np
+from app.config import Config
+from .tokenizer import count_tokens
+
+
+class Reranker:
+    """Turn retrieval candidates into the context actually sent to the model.
+
+    Candidates are dicts with ``id``, ``document``, ``embedding`` and, for
+    vector hits, ``similarity``; ``lexical`` marks chunks the BM25 index
+    matched. They come best first in retrieval order (the reciprocal rank
+    fusion order with hybrid search), and a chunk's relevance blends its
+    retrieval rank with its cosine similarity to the query, so BM25 evidence
+    is not thrown away. The stages are:
+
+    1. drop candidates whose cosine similarity to the query is below
+       ``similarity_floor``, unless they matched lexically (exact names and
+       numbers can embed far from the question);
+    2. collapse near-duplicates, keeping the more relevant copy;
+    3. pick chunks by maximal marginal relevance until ``n_results`` chunks
+       are picked or the ``max_tokens`` context budget is spent.
+    """
+
+    def __init__(self, similarity_floor=None, duplicate_threshold=None, mmr_lambda=None, max_tokens=None,
+                 rank_weight=None):
+        self.similarity_floor = Config.RERANK_SIMILARITY_FLOOR if similarity_floor is None else similarity_floor
+        self.duplicate_threshold = (Config.RERANK_DUPLICATE_THRESHOLD
+                                    if duplicate_threshold is None else duplicate_threshold)
+        self.mmr_lambda = Config.RERANK_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+        self.max_tokens = Config.RERANK_CONTEXT_TOKENS if max_tokens is None else max_tokens
+        self.rank_weight = Config.RERANK_RANK_WEIGHT if rank_weight is None else rank_weight
+
+    def rerank(self, query_embedding, candidates, n_results=5):
+        """Return the selected candidates in selection order."""
+        candidates = [candidate for candidate in candidates if candidate.get('embedding') is not None]
+        if not candidates:
+            return []
+
+        query = self._unit(np.asarray(query_embedding, dtype=np.float32))
+        vectors = self._unit(np.asarray([candidate['embedding'] for candidate in candidates], dtype=np.float32))
+        similarity = vectors @ query
+        # Reciprocal-rank score of the retrieval position, scaled so the top candidate scores 1
+        rank_score = (Config.RRF_K + 1) / (Config.RRF_K + 1 + np.arange(len(candidates)))
+        relevance = self.rank_weight * rank_score + (1 - self.rank_weight) * similarity
+
+        keep = [
+            i for i in np.argsort(-relevance, kind='stable')
+            if similarity[i] >= self.similarity_floor or candidates[i].get('lexical')
+        ]
+        keep = self._drop_duplicates(keep, vectors)
+
+        selected = []
+        budget = self.max_tokens
+        pairwise = vectors @ vectors.T
+        remaining = list(keep)
+        while remaining and len(selected) < n_results:
+            if selected:
+                redundancy = pairwise[np.ix_(remaining, selected)].max(axis=1)
+            else:
+                redundancy = np.zeros(len(remaining))
+            scores = self.mmr_lambda * relevance[remaining] - (1 - self.mmr_lambda) * redundancy
+
+            best = remaining.pop(int(np.argmax(scores)))
+            tokens = count_tokens(candidates[best]['document'])
+            if tokens > budget:
+                # Too long for what is left of the budget; a shorter chunk may still fit
+                continue
+            budget -= tokens
+            selected.append(best)
+
+        return [{**candidates[i], 'similarity': float(similarity[i])} for i in selected]
+
+    def _drop_duplicates(self, order, vectors):
+        kept = []
+        for i in order:
+            if kept and float((vectors[kept] @ vectors[i]).max()) >= self.duplicate_threshold:
+                continue
+            kept.append(i)
+        return kept
+
+    @staticmethod
+    def _unit(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
@@ -0,0 +1,141 @@
+# backend/app/services/retriever.py
+#
+# The query side of the document index: embedding questions and searching
+# the vector store and BM25 index. It is kept apart from PDFProcessor so the
+# web process never imports the ingestion-only dependencies (PyPDF2, OCR,
+# boto3).
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.config import Config
+from .clients import clients
+from .embedding_batcher import get_embedding_batcher
+from .query_cache import get_query_embedding_cache
+from .metrics import metrics
+from .vector_store import get_vector_store
+from .lexical_index import get_lexical_index, reciprocal_rank_fusion
+from .reranker import Reranker
+
+# Runs lexical searches alongside the embedding and vector search of a request
+search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='lexical-search')
+
+
+class Retriever:
+    """Search over the indexed chunks. Holds no state of its own, so it is cheap to create anywhere."""
+
+    @property
+    def vector_store(self):
+        return get_vector_store()
+
+    @property
+    def lexical_index(self):
+        return get_lexical_index()
+
+    def delete_document_embeddings(self, document_id):
+        """Delete document embeddings with error handling."""
+        try:
+            seq = self.vector_store.delete_document(document_id)
+            # With a read replica, wait until searches here no longer find the document
+            if not self.vector_store.wait_until_readable(seq):
+                print(f"Vector store replica has not applied the delete of document {document_id} yet")
+            if self.lexical_index:
+                self.lexical_index.delete_document(document_id)
+            return True
+        
+        except Exception as e:
+            print(f"Error deleting embeddings: {e}")
+            raise
+
+    def embed_query(self, query):
+        """Embed a search query, answering repeated questions from the query embedding cache."""
+        cache = get_query_embedding_cache()
+        if cache:
+            embedding = cache.get(Config.EMBEDDING_MODEL, query)
+            if embedding is not None:
+                return embedding
+
+        start = time.perf_counter()
+        batcher = get_embedding_batcher()
+        if batcher:
+            # Shares one API call with queries from concurrent requests
+            embedding = batcher.embed(query)
+        else:
+            embedding = clients.get('openai').embeddings.create(
+                model=Config.EMBEDDING_MODEL,
+                input=query
+            ).data[0].embedding
+        metrics.observe('query_embedding.api', time.perf_counter() - start)
+
+        if cache:
+            cache.put(Config.EMBEDDING_MODEL, query, embedding)
+        return embedding
+
+    def search_similar_chunks(self, query, n_results=5, document_ids=None, uploaded_after=None, uploaded_before=None,
+                              query_embedding=None):
+        """Search for similar chunks, optionally restricted to some documents or an upload date range.
+
+        With hybrid search enabled, a BM25 search runs concurrently with the
+        embedding search and both candidate lists are merged with reciprocal
+        rank fusion, so exact names and numbers are found even when their
+        embeddings are not close to the query's. With reranking enabled, the
+        candidates then go through the Reranker, so fewer than ``n_results``
+        chunks come back when the rest are irrelevant, redundant or over the
+        context token budget.
+        """
+        try:
+            filters = {
+                'document_ids': document_ids,
+                'uploaded_after': uploaded_after,
+                'uploaded_before': uploaded_before
+            }
+            rerank = Config.RERANK_ENABLED
+            lexical_search = None
+            if self.lexical_index:
+                lexical_search = search_executor.submit(
+                    self.lexical_index.search, query, Config.SEARCH_CANDIDATES, **filters
+                )
+
+            # Create embedding for the query unless the caller already has one
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+
+            # Search in the vector store
+            candidates = self.vector_store.query(
+                query_embedding,
+                n_results=Config.SEARCH_CANDIDATES if lexical_search or rerank else n_results,
+                include_embeddings=rerank,
+                **filters
+            )
+
+            if lexical_search:
+                candidates = self.fuse_lexical_hits(candidates, lexical_search.result(), include_embeddings=rerank)
+
+            if rerank:
+                candidates = Reranker().rerank(query_embedding, candidates, n_results=n_results)
+            return [candidate['document'] for candidate in candidates[:n_results]]
+
+        except Exception as e:
+            print(f"Error searching similar chunks: {e}")
+            raise
+
+    def fuse_lexical_hits(self, vector_hits, lexical_hits, include_embeddings=False):
+        """Merge vector hits with (chunk id, score) BM25 hits by reciprocal rank fusion.
+
+        Chunks only the BM25 index found are loaded from the vector store and
+        every BM25 match is marked ``lexical``.
+        """
+        lexical_ids = [chunk_id for chunk_id, _ in lexical_hits]
+        fused_ids = reciprocal_rank_fusion([[hit['id'] for hit in vector_hits], lexical_ids])
+
+        hits = {hit['id']: hit for hit in vector_hits}
+        lexical_only = [chunk_id for chunk_id in fused_ids if chunk_id not in hits]
+        if lexical_only:
+            documents = self.vector_store.get_documents(lexical_only)
+            embeddings = self.vector_store.get_embeddings(lexical_only) if include_embeddings else {}
+            for chunk_id, document in documents.items():
+                hits[chunk_id] = {'id': chunk_id, 'document': document, 'embedding': embeddings.get(chunk_id)}
+
+        for chunk_id in lexical_ids:
+            if chunk_id in hits:
+                hits[chunk_id]['lexical'] = True
+        return [hits[chunk_id] for chunk_id in fused_ids if chunk_id in hits]
@@ -0,0 +1,13 @@
+# backend/app/services/tokenizer.py
+
+import math
+
+# OpenAI's rule of thumb for English text: one token is roughly 4 characters.
+CHARS_PER_TOKEN = 4
+
+
+def count_tokens(text):
+    """Estimate the number of tokens in a piece of text without calling the API."""
+    if not text:
+        return 0
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
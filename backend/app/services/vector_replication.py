@@ -0,0 +1,466 @@
+# backend/app/services/vector_replication.py
+#
+# Client/server mode for the vector store. One vector store service
+# (vector_store_server.py) owns the index and is its only writer; every write
+# is also appended to a change log. Processes configured with
+# VECTOR_STORE_BACKEND=remote write through the service, and with
+# VECTOR_STORE_REPLICA_DIRECTORY set they read from a local NumpyVectorStore
+# kept up to date by tailing the change log, so chat queries never leave the
+# host. Replicas are eventually consistent: a write is visible locally once
+# the replica has applied its sequence number (see ``wait_for``). An empty
+# replica starts from the service's snapshot (vector_snapshot.py) and then
+# follows the log from the position the snapshot records. The service
+# compacts the log by dropping changes its snapshot already holds, so a
+# replica that falls further behind than that is rebuilt from the snapshot.
+
+import base64
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import requests
+from app.config import Config
+from .vector_store import VectorStore, NumpyVectorStore, to_timestamp
+from .vector_snapshot import SnapshotError, export_snapshot, import_snapshot, read_manifest
+
+
+def encode_vectors(vectors):
+    """Pack embeddings as base64 float32, about a quarter of the size of JSON numbers."""
+    return base64.b64encode(np.asarray(vectors, dtype=np.float32).tobytes()).decode('ascii')
+
+
+def decode_vectors(data, dimensions):
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32).reshape(-1, dimensions)
+
+
+class ChangesCompacted(Exception):
+    """Raised when changes a reader still needs were compacted away; it must restart from a snapshot."""
+
+
+class ChangeLog:
+    """Append-only, sequence-numbered log of the writes made to a vector store.
+
+    ``compact`` removes the oldest changes once a snapshot holds them. Sequence
+    numbers keep increasing across compactions (AUTOINCREMENT never reuses
+    them), and the position up to which changes were removed is kept in
+    ``change_log_meta``.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.VECTOR_STORE_CHANGE_LOG_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS changes ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL, document_id INTEGER, '
+            'payload TEXT, vectors BLOB, dimensions INTEGER, created_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE TABLE IF NOT EXISTS change_log_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    def append_upsert(self, ids, embeddings, documents, metadatas):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        payload = json.dumps({'ids': list(ids), 'documents': list(documents), 'metadatas': list(metadatas)})
+        return self._append('upsert', None, payload, vectors.tobytes(), vectors.shape[1])
+
+    def append_delete(self, document_id):
+        return self._append('delete', int(document_id), None, None, None)
+
+    def since(self, seq, limit=500):
+        """Changes after ``seq``, oldest first, in the wire format replicas apply.
+
+        Raises ChangesCompacted when some of them were already compacted away.
+        """
+        with self._lock:
+            compacted_seq = self._compacted_seq()
+            if seq < compacted_seq:
+                raise ChangesCompacted(f"Changes up to {compacted_seq} were compacted; resume from a snapshot")
+            rows = self._conn.execute(
+                'SELECT seq, op, document_id, payload, vectors, dimensions FROM changes '
+                'WHERE seq > ? ORDER BY seq LIMIT ?', (seq, limit)
+            ).fetchall()
+
+        changes = []
+        for seq, op, document_id, payload, vectors, dimensions in rows:
+            change = {'seq': seq, 'op': op, 'document_id': document_id}
+            if op == 'upsert':
+                change.update(json.loads(payload))
+                change['dimensions'] = dimensions
+                change['embeddings'] = base64.b64encode(vectors).decode('ascii')
+            changes.append(change)
+        return changes
+
+    def last_seq(self):
+        with self._lock:
+            last = self._conn.execute('SELECT MAX(seq) FROM changes').fetchone()[0]
+            # Everything may have been compacted away
+            return last if last is not None else self._compacted_seq()
+
+    def compacted_seq(self):
+        """Highest sequence number removed by ``compact``; readers need to be at least this far."""
+        with self._lock:
+            return self._compacted_seq()
+
+    def compact(self, through_seq, older_than=None):
+        """Remove changes up to ``through_seq`` created before the ``older_than`` timestamp; returns how many."""
+        with self._lock:
+            condition, params = 'seq <= ?', [through_seq]
+            if older_than is not None:
+                condition, params = condition + ' AND created_at < ?', params + [older_than]
+            removed_seq = self._conn.execute(f'SELECT MAX(seq) FROM changes WHERE {condition}', params).fetchone()[0]
+            if removed_seq is None:
+                return 0
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                removed = self._conn.execute('DELETE FROM changes WHERE seq <= ?', (removed_seq,)).rowcount
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO change_log_meta (key, value) VALUES ('compacted_seq', ?)",
+                    (max(removed_seq, self._compacted_seq()),)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            return removed
+
+    def _compacted_seq(self):
+        row = self._conn.execute("SELECT value FROM change_log_meta WHERE key = 'compacted_seq'").fetchone()
+        return row[0] if row else 0
+
+    def _append(self, op, document_id, payload, vectors, dimensions):
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO changes (op, document_id, payload, vectors, dimensions, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (op, document_id, payload, vectors, dimensions, time.time())
+            )
+            return cursor.lastrowid
+
+
+class LoggedVectorStore(VectorStore):
+    """The service's store: writes go to the wrapped store and then to the change log, in one order."""
+
+    def __init__(self, store, change_log):
+        self.store = store
+        self.change_log = change_log
+        self.max_batch_size = store.max_batch_size
+        self._write_lock = threading.Lock()
+
+    def seed_change_log(self, batch_size=500):
+        """Log the chunks stored before the service existed, so new replicas receive them too."""
+        with self._write_lock:
+            if self.change_log.last_seq() or not self.store.count():
+                return
+            for ids, documents, metadatas in self.store.iter_chunks(batch_size):
+                embeddings = self.store.get_embeddings(ids)
+                stored = [i for i, chunk_id in enumerate(ids) if chunk_id in embeddings]
+                if stored:
+                    self.change_log.append_upsert([ids[i] for i in stored],
+                                                  [embeddings[ids[i]] for i in stored],
+                                                  [documents[i] for i in stored],
+                                                  [metadatas[i] or {} for i in stored])
+
+    def snapshot(self, path=None):
+        """Export a snapshot matching the current change log position; returns (path, manifest).
+
+        Writes wait while the export runs so the snapshot holds exactly the
+        changes up to the sequence number in its manifest. The file is
+        reused until the next write.
+        """
+        path = path or Config.VECTOR_STORE_SNAPSHOT_PATH
+        with self._write_lock:
+            seq = self.change_log.last_seq()
+            if os.path.exists(path):
+                try:
+                    manifest = read_manifest(path)
+                    if manifest['change_seq'] == seq:
+                        return path, manifest
+                except SnapshotError:
+                    pass
+            return path, export_snapshot(self.store, path, change_seq=seq)
+
+    def compact(self, retention=None):
+        """Bring the snapshot up to date and drop the changes it holds that are older than ``retention`` seconds.
+
+        Replicas less than ``retention`` seconds behind keep following the
+        log; older ones are rebuilt from the snapshot. Returns how many
+        changes were removed.
+        """
+        retention = Config.VECTOR_STORE_CHANGE_LOG_RETENTION if retention is None else retention
+        _, manifest = self.snapshot()
+        return self.change_log.compact(manifest['change_seq'], older_than=time.time() - retention)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        if not ids:
+            return self.change_log.last_seq()
+        with self._write_lock:
+            self.store.upsert(ids, embeddings, documents, metadatas)
+            return self.change_log.append_upsert(ids, embeddings, documents, metadatas)
+
+    def delete_document(self, document_id):
+        with self._write_lock:
+            self.store.delete_document(document_id)
+            return self.change_log.append_delete(document_id)
+
+    def get_embeddings(self, ids):
+        return self.store.get_embeddings(ids)
+
+    def get_documents(self, ids):
+        return self.store.get_documents(ids)
+
+    def chunk_page(self, cursor=None, batch_size=500):
+        return self.store.chunk_page(cursor, batch_size)
+
+    def query(self, embedding, n_results=5, document_ids=None, uploaded_after=None, uploaded_before=None,
+              include_embeddings=False):
+        return self.store.query(embedding, n_results=n_results, document_ids=document_ids,
+                                uploaded_after=uploaded_after, uploaded_before=uploaded_before,
+                                include_embeddings=include_embeddings)
+
+    def count(self):
+        return self.store.count()
+
+
+class VectorStoreReplica:
+    """A local NumpyVectorStore that follows the service's change log.
+
+    Several processes on a host can share one replica directory; a file lock
+    makes sure only one of them applies changes at a time while the others
+    just read. Changes are also applied to ``lexical_index`` so hybrid search
+    on the replica sees the same chunks.
+    """
+
+    def __init__(self, client, directory=None, lexical_index=None, poll_interval=None, batch_size=None):
+        self.client = client
+        self.directory = directory or Config.VECTOR_STORE_REPLICA_DIRECTORY
+        self.store = NumpyVectorStore(self.directory)
+        self.lexical_index = lexical_index
+        self.poll_interval = Config.VECTOR_STORE_REPLICA_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.batch_size = batch_size or Config.VECTOR_STORE_REPLICA_BATCH
+
+        self._state = sqlite3.connect(os.path.join(self.directory, 'replica.sqlite3'),
+                                      timeout=30, check_same_thread=False, isolation_level=None)
+        self._state.execute('PRAGMA journal_mode=WAL')
+        self._state.execute('CREATE TABLE IF NOT EXISTS replica_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self._state_lock = threading.Lock()
+        self._sync_file = open(os.path.join(self.directory, 'replica.lock'), 'a+')
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def applied_seq(self):
+        with self._state_lock:
+            row = self._state.execute("SELECT value FROM replica_state WHERE key = 'applied_seq'").fetchone()
+        return row[0] if row else 0
+
+    def sync_once(self):
+        """Apply the next batch of changes; returns how many were applied, or None if another process syncs."""
+        try:
+            fcntl.flock(self._sync_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+        try:
+            if not self.applied_seq and Config.VECTOR_STORE_REPLICA_WARM_START and not self.store.count():
+                self.warm_start()
+            try:
+                changes = self.client.changes(self.applied_seq, self.batch_size)
+            except ChangesCompacted:
+                self.rebuild()
+                changes = self.client.changes(self.applied_seq, self.batch_size)
+            for change in changes:
+                self.apply(change)
+            if changes:
+                self._set_applied_seq(changes[-1]['seq'])
+            return len(changes)
+        finally:
+            fcntl.flock(self._sync_file, fcntl.LOCK_UN)
+
+    def _set_applied_seq(self, seq):
+        with self._state_lock:
+            self._state.execute("INSERT OR REPLACE INTO replica_state (key, value) VALUES ('applied_seq', ?)", (seq,))
+
+    def warm_start(self):
+        """Fill an empty replica from the service's snapshot instead of replaying the whole change log."""
+        with self.client.open_snapshot() as response:
+            manifest = import_snapshot(self.store, response.raw, lexical_index=self.lexical_index)
+        self._set_applied_seq(manifest['change_seq'] or 0)
+
+    def rebuild(self):
+        """Start over from the service's snapshot after falling behind the compacted change log.
+
+        The deletes the replica missed are no longer in the log, so every
+        local document is dropped before the snapshot is loaded; reads on
+        this replica see a partial index until the import finishes.
+        """
+        print(f"Vector store replica at change {self.applied_seq} fell behind the compacted change log, rebuilding")
+        document_ids = set()
+        for _, _, metadatas in self.store.iter_chunks():
+            document_ids.update((metadata or {}).get('document_id') for metadata in metadatas)
+        document_ids.discard(None)
+        for document_id in document_ids:
+            self.store.delete_document(document_id)
+            if self.lexical_index:
+                self.lexical_index.delete_document(document_id)
+        self.warm_start()
+
+    def apply(self, change):
+        # Both operations are idempotent, so a change replayed after a crash is harmless
+        if change['op'] == 'upsert':
+            embeddings = decode_vectors(change['embeddings'], change['dimensions'])
+            self.store.upsert(change['ids'], embeddings, change['documents'], change['metadatas'])
+            if self.lexical_index:
+                self.lexical_index.add(change['ids'], change['documents'], change['metadatas'])
+        elif change['op'] == 'delete':
+            self.store.delete_document(change['document_id'])
+            if self.lexical_index:
+                self.lexical_index.delete_document(change['document_id'])
+
+    def wait_for(self, seq, timeout=10.0):
+        """Block until the replica has applied change ``seq``; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.applied_seq < seq:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(min(self.poll_interval, 0.05))
+        return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='vector-store-replica', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                applied = self.sync_once()
+            except Exception as e:
+                print(f"Error syncing vector store replica: {e}")
+                applied = None
+            # Keep pulling without pause while catching up
+            if applied != self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+
+class RemoteVectorStore(VectorStore):
+    """VectorStore client for the vector store service.
+
+    Writes always go to the service and return the change's sequence number.
+    Reads go to the local replica when ``replica_directory`` is set and to
+    the service otherwise.
+    """
+
+    # Keeps each upsert request to the service around 8MB
+    max_batch_size = 1000
+
+    def __init__(self, url=None, replica_directory=None, token=None, timeout=None, lexical_index=None):
+        self.url = (url or Config.VECTOR_STORE_URL).rstrip('/')
+        self.timeout = timeout or Config.VECTOR_STORE_TIMEOUT
+        self.session = requests.Session()
+        token = token or Config.VECTOR_STORE_TOKEN
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+        self.last_written_seq = 0
+
+        replica_directory = replica_directory or Config.VECTOR_STORE_REPLICA_DIRECTORY
+        self.replica = None
+        if replica_directory:
+            self.replica = VectorStoreReplica(self, replica_directory, lexical_index=lexical_index)
+            self.replica.start()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        if not ids:
+            return self.last_written_seq
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        return self._written(self._post('/upsert', {
+            'ids': list(ids),
+            'embeddings': encode_vectors(embeddings),
+            'dimensions': embeddings.shape[1],
+            'documents': list(documents),
+            'metadatas': list(metadatas)
+        }))
+
+    def delete_document(self, document_id):
+        return self._written(self._post('/delete_document', {'document_id': int(document_id)}))
+
+    def get_embeddings(self, ids):
+        if self.replica:
+            return self.replica.store.get_embeddings(ids)
+        return self._post('/get_embeddings', {'ids': list(ids)})['embeddings']
+
+    def get_documents(self, ids):
+        if self.replica:
+            return self.replica.store.get_documents(ids)
+        return self._post('/get_documents', {'ids': list(ids)})['documents']
+
+    def chunk_page(self, cursor=None, batch_size=500):
+        if self.replica:
+            return self.replica.store.chunk_page(cursor, batch_size)
+        params = {'batch_size': batch_size}
+        if cursor is not None:
+            params['cursor'] = cursor
+        batch = self._get('/chunks', **params)
+        return batch['ids'], batch['documents'], batch['metadatas'], batch['next_cursor']
+
+    def query(self, embedding, n_results=5, document_ids=None, uploaded_after=None, uploaded_before=None,
+              include_embeddings=False):
+        if self.replica:
+            return self.replica.store.query(embedding, n_results=n_results, document_ids=document_ids,
+                                            uploaded_after=uploaded_after, uploaded_before=uploaded_before,
+                                            include_embeddings=include_embeddings)
+        return self._post('/query', {
+            'embedding': list(map(float, embedding)),
+            'n_results': n_results,
+            'document_ids': document_ids,
+            'uploaded_after': to_timestamp(uploaded_after) if uploaded_after is not None else None,
+            'uploaded_before': to_timestamp(uploaded_before) if uploaded_before is not None else None,
+            'include_embeddings': include_embeddings
+        })['hits']
+
+    def count(self):
+        if self.replica:
+            return self.replica.store.count()
+        return self._get('/count')['count']
+
+    def wait_until_readable(self, seq=None, timeout=10.0):
+        """Wait for the local replica to apply write ``seq``, by default the last one made through this client."""
+        if not self.replica:
+            return True
+        return self.replica.wait_for(self.last_written_seq if seq is None else seq, timeout)
+
+    def changes(self, since, limit=500):
+        response = self.session.get(self.url + '/changes', params={'since': since, 'limit': limit},
+                                    timeout=self.timeout)
+        if response.status_code == 410:
+            raise ChangesCompacted(response.json().get('error', 'Changes were compacted'))
+        response.raise_for_status()
+        return response.json()['changes']
+
+    def open_snapshot(self):
+        """Stream the service's current snapshot; use as a context manager and read ``.raw``."""
+        response = self.session.get(self.url + '/snapshot', stream=True, timeout=self.timeout)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return response
+
+    def _written(self, response):
+        self.last_written_seq = max(self.last_written_seq, response['seq'])
+        return response['seq']
+
+    def _get(self, path, **params):
+        response = self.session.get(self.url + path, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _post(self, path, body):
+        response = self.session.post(self.url + path, json=body, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,238 @@
+# backend/app/services/vector_snapshot.py
+#
+# Portable snapshots of the vector index, for backups, moving an index
+# between deployments and warm-starting read replicas without re-ingesting.
+#
+# A snapshot is an uncompressed tar archive holding, in this order:
+#
+#   manifest.json        format, version, chunk count, dimensions, embedding
+#                        model, change log position and a SHA-256 per column
+#   embeddings.f32       one little-endian float32 row per chunk
+#   ids.json.gz          the chunk ids, in row order
+#   documents.json.gz    the chunk texts, in row order
+#   metadatas.json.gz    the chunk metadata, in row order
+#
+# The manifest comes first so an archive can be read as a stream (an HTTP
+# download, an S3 body) in a single pass, checking each column against its
+# checksum before anything is written to the store.
+
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+from app.config import Config
+
+SNAPSHOT_FORMAT = 'tourism-vector-snapshot'
+SNAPSHOT_VERSION = 1
+MANIFEST = 'manifest.json'
+EMBEDDINGS = 'embeddings.f32'
+COLUMNS = ('ids', 'documents', 'metadatas')
+READ_BLOCK_SIZE = 1024 * 1024
+IMPORT_BATCH_SIZE = 5000  # chunks per upsert; about 30MB of ada-002 embeddings
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is corrupt, of an unknown version or incompatible with this deployment."""
+
+
+def export_snapshot(store, path, batch_size=500, change_seq=None):
+    """Write every chunk of ``store`` to a snapshot at ``path``; returns the manifest.
+
+    The archive is assembled next to ``path`` and moved into place when
+    complete, so an interrupted export never leaves a truncated snapshot.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    columns = {name: [] for name in COLUMNS}
+    digest = hashlib.sha256()
+    dimensions = None
+
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        vectors_path = os.path.join(scratch, EMBEDDINGS)
+        with open(vectors_path, 'wb') as vectors:
+            for ids, documents, metadatas in store.iter_chunks(batch_size):
+                embeddings = store.get_embeddings(ids)
+                rows = [i for i, chunk_id in enumerate(ids) if chunk_id in embeddings]
+                if not rows:
+                    continue
+                block = np.asarray([embeddings[ids[i]] for i in rows], dtype='<f4')
+                dimensions = dimensions or block.shape[1]
+                if block.shape[1] != dimensions:
+                    raise SnapshotError(f"Store mixes {dimensions}- and {block.shape[1]}-dimensional embeddings")
+                data = block.tobytes()
+                vectors.write(data)
+                digest.update(data)
+                columns['ids'].extend(ids[i] for i in rows)
+                columns['documents'].extend(documents[i] for i in rows)
+                columns['metadatas'].extend(metadatas[i] or {} for i in rows)
+
+        members = {name: gzip.compress(json.dumps(values).encode('utf-8'), compresslevel=6)
+                   for name, values in columns.items()}
+        files = {EMBEDDINGS: {'sha256': digest.hexdigest(), 'size': os.path.getsize(vectors_path)}}
+        for name, data in members.items():
+            files[f'{name}.json.gz'] = {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+
+        manifest = {
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_VERSION,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'count': len(columns['ids']),
+            'dimensions': dimensions or 0,
+            'embedding_model': Config.EMBEDDING_MODEL,
+            'change_seq': change_seq,
+            'files': files
+        }
+
+        partial = os.path.join(scratch, 'snapshot.partial')
+        with tarfile.open(partial, 'w') as archive:
+            _add_bytes(archive, MANIFEST, json.dumps(manifest, indent=2).encode('utf-8'))
+            archive.add(vectors_path, arcname=EMBEDDINGS)
+            for name, data in members.items():
+                _add_bytes(archive, f'{name}.json.gz', data)
+        os.replace(partial, path)
+
+    return manifest
+
+
+@contextlib.contextmanager
+def read_snapshot(source):
+    """Read and verify a snapshot from a path or a readable stream.
+
+    Used as a context manager yielding ``(manifest, ids, embeddings,
+    documents, metadatas)``. Members are hashed block by block as they are
+    read; the embeddings are spooled to a scratch file and yielded as a
+    read-only memory-mapped float32 matrix, so only the text columns are
+    held in memory.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as stream, read_snapshot(stream) as snapshot:
+            yield snapshot
+        return
+
+    with tempfile.TemporaryDirectory(prefix='vector-snapshot-') as scratch:
+        vectors_path = os.path.join(scratch, EMBEDDINGS)
+        manifest = None
+        data = {}
+        try:
+            with tarfile.open(fileobj=source, mode='r|') as archive:
+                for member in archive:
+                    content = archive.extractfile(member)
+                    if content is None:
+                        continue
+                    if manifest is None:
+                        if member.name != MANIFEST:
+                            raise SnapshotError(f"Snapshot does not start with {MANIFEST}")
+                        manifest = _check_manifest(json.loads(content.read()))
+                        continue
+                    expected = manifest['files'].get(member.name)
+                    if expected is None:
+                        continue
+                    digest = hashlib.sha256()
+                    if member.name == EMBEDDINGS:
+                        with open(vectors_path, 'wb') as vectors:
+                            for block in iter(lambda: content.read(READ_BLOCK_SIZE), b''):
+                                digest.update(block)
+                                vectors.write(block)
+                        payload = vectors_path
+                    else:
+                        payload = content.read()
+                        digest.update(payload)
+                    if digest.hexdigest() != expected['sha256']:
+                        raise SnapshotError(f"Checksum mismatch in {member.name}")
+                    data[member.name] = payload
+        except (tarfile.TarError, EOFError, ValueError) as e:
+            raise SnapshotError(f"Unreadable snapshot: {e}")
+
+        if manifest is None:
+            raise SnapshotError("Snapshot is empty")
+        missing = set(manifest['files']) - set(data)
+        if missing:
+            raise SnapshotError(f"Snapshot is missing {', '.join(sorted(missing))}")
+
+        count, dimensions = manifest['count'], manifest['dimensions']
+        size = os.path.getsize(vectors_path)
+        if size != count * dimensions * 4:
+            raise SnapshotError(f"Expected {count}x{dimensions} embeddings, found {size} bytes")
+        if count:
+            embeddings = np.memmap(vectors_path, dtype='<f4', mode='r', shape=(count, dimensions))
+        else:
+            embeddings = np.zeros((0, dimensions), dtype='<f4')
+        try:
+            columns = [json.loads(gzip.decompress(data[f'{name}.json.gz'])) for name in COLUMNS]
+        except (OSError, EOFError, ValueError) as e:
+            raise SnapshotError(f"Unreadable snapshot column: {e}")
+        if any(len(column) != count for column in columns):
+            raise SnapshotError("Snapshot columns have different lengths")
+        ids, documents, metadatas = columns
+        yield manifest, ids, embeddings, documents, metadatas
+
+
+def read_manifest(source):
+    """Return a snapshot's manifest without reading its columns."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as stream:
+            return read_manifest(stream)
+    try:
+        with tarfile.open(fileobj=source, mode='r|') as archive:
+            member = archive.next()
+            if member is None or member.name != MANIFEST:
+                raise SnapshotError(f"Snapshot does not start with {MANIFEST}")
+            return _check_manifest(json.loads(archive.extractfile(member).read()))
+    except (tarfile.TarError, EOFError, ValueError) as e:
+        raise SnapshotError(f"Unreadable snapshot: {e}")
+
+
+def import_snapshot(store, source, lexical_index=None, batch_size=None, on_batch=None):
+    """Load a snapshot into ``store`` (and ``lexical_index``); returns the manifest.
+
+    The whole snapshot is verified before the first write. Chunks are
+    upserted, so importing into a non-empty store merges by chunk id. With
+    no ``batch_size`` the store receives chunks in batches of the most it
+    accepts, up to IMPORT_BATCH_SIZE, read one at a time from the spooled
+    embeddings. ``on_batch(imported, total)`` is called after every batch.
+    """
+    with read_snapshot(source) as (manifest, ids, embeddings, documents, metadatas):
+        if manifest['count'] and manifest['embedding_model'] != Config.EMBEDDING_MODEL:
+            raise SnapshotError(f"Snapshot embeddings come from {manifest['embedding_model']}, "
+                                f"this deployment uses {Config.EMBEDDING_MODEL}")
+
+        batch_size = batch_size or min(store.max_batch_size or IMPORT_BATCH_SIZE, IMPORT_BATCH_SIZE)
+        for offset in range(0, len(ids), batch_size):
+            end = offset + batch_size
+            store.upsert(ids[offset:end], np.array(embeddings[offset:end]), documents[offset:end],
+                         metadatas[offset:end])
+            if lexical_index:
+                lexical_index.add(ids[offset:end], documents[offset:end], metadatas[offset:end])
+            if on_batch:
+                on_batch(min(end, len(ids)), len(ids))
+            # Let other requests run between batches when a replica warm-starts on a gevent web worker
+            time.sleep(0)
+
+    return manifest
+
+
+def _check_manifest(manifest):
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError("Not a vector index snapshot")
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {manifest.get('version')}; "
+                            f"this build reads version {SNAPSHOT_VERSION}")
+    expected = {EMBEDDINGS} | {f'{name}.json.gz' for name in COLUMNS}
+    if set(manifest.get('files', {})) != expected:
+        raise SnapshotError("Snapshot manifest lists unexpected files")
+    return manifest
+
+
+def _add_bytes(archive, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    archive.addfile(info, io.BytesIO(data))
+
@@ -0,0 +1,455 @@
+# backend/app/services/vector_store.py
+
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+from datetime import datetime, timezone
+import numpy as np
+from app.config import Config
+from .clients import clients
+
+
+def to_timestamp(value):
+    """Convert a datetime (naive UTC, as stored by the models) or a number to a Unix timestamp."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+class VectorStore(ABC):
+    """Storage and similarity search for chunk embeddings.
+
+    Every chunk has an id, an embedding, its text and the metadata built by
+    ``PDFProcessor.chunk_metadata`` (document_id, chunk_index, uploaded_at and
+    optionally page_number). Queries can be restricted to some documents and
+    to an upload date range.
+    """
+
+    # Largest number of records a backend accepts in one upsert
+    max_batch_size = None
+
+    @abstractmethod
+    def upsert(self, ids, embeddings, documents, metadatas):
+        """Insert chunks, replacing any stored under the same ids."""
+
+    @abstractmethod
+    def get_embeddings(self, ids):
+        """Return a dict of chunk id -> embedding for the ids that are stored."""
+
+    @abstractmethod
+    def get_documents(self, ids):
+        """Return a dict of chunk id -> text for the ids that are stored."""
+
+    @abstractmethod
+    def chunk_page(self, cursor=None, batch_size=500):
+        """Return ``(ids, documents, metadatas, next_cursor)`` for up to ``batch_size`` chunks after ``cursor``.
+
+        Start without a cursor and pass ``next_cursor`` back until it is None.
+        Each call reads only its own batch, and a cursor stays valid while
+        chunks are written between calls.
+        """
+
+    def iter_chunks(self, batch_size=500):
+        """Yield (ids, documents, metadatas) batches covering every stored chunk."""
+        cursor = None
+        while True:
+            ids, documents, metadatas, cursor = self.chunk_page(cursor, batch_size)
+            if ids:
+                yield ids, documents, metadatas
+            if cursor is None:
+                return
+
+    @abstractmethod
+    def delete_document(self, document_id):
+        """Delete every chunk of a document."""
+
+    @abstractmethod
+    def query(self, embedding, n_results=5, document_ids=None, uploaded_after=None, uploaded_before=None,
+              include_embeddings=False):
+        """Return the ``n_results`` chunks most similar to ``embedding``, best first.
+
+        Each hit is a dict with the chunk ``id``, its ``document`` text and its
+        cosine ``similarity`` to the query, plus its ``embedding`` when
+        ``include_embeddings`` is set.
+        """
+
+    @abstractmethod
+    def count(self):
+        """Return the number of stored chunks."""
+
+    def wait_until_readable(self, seq=None, timeout=10.0):
+        """Block until this process's reads see write ``seq`` (the latest by default); False on timeout.
+
+        Reads from a local store see every write straight away.
+        """
+        return True
+
+
+class ChromaVectorStore(VectorStore):
+    """VectorStore backed by a persistent ChromaDB collection (HNSW index)."""
+
+    def __init__(self, persist_directory=None, collection_name="tourism_docs"):
+        import chromadb
+        from chromadb.config import Settings
+
+        self.client = chromadb.Client(Settings(
+            persist_directory=persist_directory or Config.CHROMA_PERSIST_DIRECTORY,
+            is_persistent=True
+        ))
+        self.collection = self.client.get_or_create_collection(collection_name)
+        self.max_batch_size = getattr(self.client, 'max_batch_size', None)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        # ChromaDB validates embeddings as lists of Python floats
+        if isinstance(embeddings, np.ndarray):
+            embeddings = embeddings.tolist()
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def get_embeddings(self, ids):
+        existing = self.collection.get(ids=ids, include=['embeddings'])
+        return dict(zip(existing['ids'], existing['embeddings']))
+
+    def get_documents(self, ids):
+        existing = self.collection.get(ids=ids, include=['documents'])
+        return dict(zip(existing['ids'], existing['documents']))
+
+    def chunk_page(self, cursor=None, batch_size=500):
+        # The cursor is an offset into the collection's insertion order
+        offset = cursor or 0
+        batch = self.collection.get(limit=batch_size, offset=offset, include=['documents', 'metadatas'])
+        next_cursor = offset + len(batch['ids']) if len(batch['ids']) == batch_size else None
+        return batch['ids'], batch['documents'], batch['metadatas'], next_cursor
+
+    def delete_document(self, document_id):
+        # Chunks carry their document_id, so ChromaDB can filter without listing every id
+        self.collection.delete(where={'document_id': document_id})
+
+    def query(self, embedding, n_results=5, document_ids=None, uploaded_after=None, uploaded_before=None,
+              include_embeddings=False):
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=n_results,
+            where=self.build_where(document_ids, uploaded_after, uploaded_before),
+            include=['documents', 'distances'] + (['embeddings'] if include_embeddings else [])
+        )
+        if not results["ids"]:
+            return []
+
+        hits = []
+        for i, (chunk_id, document, distance) in enumerate(zip(
+            results["ids"][0], results["documents"][0], results["distances"][0]
+        )):
+            # The collection uses squared L2 distance; for unit-length embeddings
+            # that is 2 - 2 * cosine similarity
+            hit = {'id': chunk_id, 'document': document, 'similarity': 1 - distance / 2}
+            if include_embeddings:
+                hit['embedding'] = results["embeddings"][0][i]
+            hits.append(hit)
+        return hits
+
+    def count(self):
+        return self.collection.count()
+
+    @staticmethod
+    def build_where(document_ids=None, uploaded_after=None, uploaded_before=None):
+        """Build a ChromaDB ``where`` filter from optional document and upload date filters."""
+        conditions = []
+        if document_ids:
+            conditions.append({'document_id': {'$in': [int(document_id) for document_id in document_ids]}})
+        if uploaded_after is not None:
+            conditions.append({'uploaded_at': {'$gte': to_timestamp(uploaded_after)}})
+        if uploaded_before is not None:
+            conditions.append({'uploaded_at': {'$lte': to_timestamp(uploaded_before)}})
+
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {'$and': conditions}
+
+
+class NumpyVectorStore(VectorStore):
+    """Brute-force VectorStore over a memory-mapped float32 matrix.
+
+    Embeddings are normalised and stored as rows of ``vectors.f32``; the
+    document_id, uploaded_at and liveness of each row live in parallel
+    memory-mapped columns so filters are vectorised masks. A query is one
+    matrix-vector product plus a partial sort, which for tens of thousands
+    of chunks is faster than walking an HNSW graph, and opening the store
+    only maps the files instead of loading an index.
+
+    Chunk ids, texts and metadata are kept in SQLite next to the matrix and
+    are only read for the top results. SQLite also serialises writers across
+    processes (web and ingestion worker); readers pick up rows appended by
+    other processes on their next query. Deleted rows are tombstoned, not
+    reclaimed.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, directory=None):
+        self.directory = directory or Config.VECTOR_STORE_DIRECTORY
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(self.directory, 'chunks.sqlite3'),
+                                     timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS chunks ('
+            'row INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE, document_id INTEGER, '
+            'document TEXT NOT NULL, metadata TEXT NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_chunks_document_id ON chunks (document_id)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+        self.dimensions = self._get_meta('dimensions')
+        self._capacity = 0
+        self._vectors = self._document_ids = self._uploaded_at = self._alive = None
+        if self.dimensions:
+            self._map(self._get_meta('capacity'))
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        if not ids:
+            return
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have created the store since it was opened
+                self.dimensions = self._get_meta('dimensions')
+                if not self.dimensions:
+                    self.dimensions = vectors.shape[1]
+                    self._set_meta('dimensions', self.dimensions)
+                    self._set_meta('capacity', self.INITIAL_CAPACITY)
+                elif vectors.shape[1] != self.dimensions:
+                    raise ValueError(f"Expected {self.dimensions}-dimensional embeddings, got {vectors.shape[1]}")
+
+                existing = self._rows_for(ids)
+                size = self._get_meta('size')
+                rows = []
+                for chunk_id in ids:
+                    if chunk_id in existing:
+                        rows.append(existing[chunk_id])
+                    else:
+                        rows.append(size)
+                        existing[chunk_id] = size
+                        size += 1
+
+                self._ensure_capacity(size)
+                rows = np.asarray(rows, dtype=np.int64)
+                self._vectors[rows] = vectors
+                self._document_ids[rows] = [int(metadata.get('document_id', -1)) for metadata in metadatas]
+                self._uploaded_at[rows] = [int(metadata.get('uploaded_at', 0)) for metadata in metadatas]
+                self._alive[rows] = 1
+                self._flush()
+
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO chunks (row, chunk_id, document_id, document, metadata) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [
+                        (int(row), chunk_id, metadata.get('document_id'), document, json.dumps(metadata))
+                        for row, chunk_id, document, metadata in zip(rows, ids, documents, metadatas)
+                    ]
+                )
+                self._set_meta('size', size)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def get_embeddings(self, ids):
+        with self._lock:
+            rows = self._rows_for(ids)
+            if not rows:
+                return {}
+            self._refresh()
+            return {chunk_id: self._vectors[row].tolist() for chunk_id, row in rows.items()}
+
+    def get_documents(self, ids):
+        documents = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = list(ids[start:start + 500])
+                placeholders = ",".join("?" * len(batch))
+                documents.update(self._conn.execute(
+                    f'SELECT chunk_id, document FROM chunks WHERE chunk_id IN ({placeholders})', batch
+                ).fetchall())
+        return documents
+
+    def chunk_page(self, cursor=None, batch_size=500):
+        # The cursor is the last matrix row returned; new chunks are appended after it
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT row, chunk_id, document, metadata FROM chunks WHERE row > ? ORDER BY row LIMIT ?',
+                (-1 if cursor is None else cursor, batch_size)
+            ).fetchall()
+        return (
+            [chunk_id for _, chunk_id, _, _ in rows],
+            [document for _, _, document, _ in rows],
+            [json.loads(metadata) for _, _, _, metadata in rows],
+            rows[-1][0] if len(rows) == batch_size else None
+        )
+
+    def delete_document(self, document_id):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = [row for row, in self._conn.execute(
+                    'SELECT row FROM chunks WHERE document_id = ?', (document_id,)
+                )]
+                if rows:
+                    self._refresh()
+                    self._alive[np.asarray(rows, dtype=np.int64)] = 0
+                    self._flush()
+                    self._conn.execute('DELETE FROM chunks WHERE document_id = ?', (document_id,))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def query(self, embedding, n_results=5, document_ids=None, uploaded_after=None, uploaded_before=None,
+              include_embeddings=False):
+        with self._lock:
+            size = self._refresh()
+            if not size:
+                return []
+
+            query = self._normalize(np.asarray(embedding, dtype=np.float32))
+            scores = self._vectors[:size] @ query
+
+            mask = self._alive[:size].astype(bool)
+            if document_ids:
+                mask &= np.isin(self._document_ids[:size], [int(document_id) for document_id in document_ids])
+            if uploaded_after is not None:
+                mask &= self._uploaded_at[:size] >= to_timestamp(uploaded_after)
+            if uploaded_before is not None:
+                mask &= self._uploaded_at[:size] <= to_timestamp(uploaded_before)
+
+            candidates = np.flatnonzero(mask)
+            if not len(candidates):
+                return []
+            scores = scores[candidates]
+            k = min(n_results, len(candidates))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            rows = [int(row) for row in candidates[top]]
+            similarities = dict(zip(rows, scores[top].tolist()))
+
+            placeholders = ",".join("?" * len(rows))
+            chunks = {
+                row: (chunk_id, document)
+                for row, chunk_id, document in self._conn.execute(
+                    f'SELECT row, chunk_id, document FROM chunks WHERE row IN ({placeholders})', rows
+                )
+            }
+            hits = []
+            for row in rows:
+                if row not in chunks:
+                    continue
+                hit = {'id': chunks[row][0], 'document': chunks[row][1], 'similarity': similarities[row]}
+                if include_embeddings:
+                    hit['embedding'] = self._vectors[row].tolist()
+                hits.append(hit)
+        return hits
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM chunks').fetchone()[0]
+
+    def _refresh(self):
+        """Remap if another process grew the files; returns the number of rows in use."""
+        capacity = self._get_meta('capacity')
+        if not self.dimensions:
+            self.dimensions = self._get_meta('dimensions')
+        if self.dimensions and capacity > self._capacity:
+            self._map(capacity)
+        return min(self._get_meta('size'), self._capacity)
+
+    def _ensure_capacity(self, size):
+        capacity = max(self._get_meta('capacity'), self.INITIAL_CAPACITY)
+        while capacity < size:
+            capacity *= 2
+        self._set_meta('capacity', capacity)
+        if capacity > self._capacity:
+            self._map(capacity)
+
+    def _map(self, capacity):
+        """(Re)open the column files with room for ``capacity`` rows, growing them on disk if needed."""
+        columns = (
+            ('vectors.f32', np.float32, (capacity, self.dimensions)),
+            ('document_ids.i64', np.int64, (capacity,)),
+            ('uploaded_at.i64', np.int64, (capacity,)),
+            ('alive.u8', np.uint8, (capacity,))
+        )
+        mapped = []
+        for filename, dtype, shape in columns:
+            path = os.path.join(self.directory, filename)
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            with open(path, 'ab') as f:
+                if f.tell() < nbytes:
+                    f.truncate(nbytes)
+            mapped.append(np.memmap(path, dtype=dtype, mode='r+', shape=shape))
+
+        self._vectors, self._document_ids, self._uploaded_at, self._alive = mapped
+        self._capacity = capacity
+
+    def _flush(self):
+        for column in (self._vectors, self._document_ids, self._uploaded_at, self._alive):
+            column.flush()
+
+    def _rows_for(self, ids):
+        rows = {}
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            rows.update(self._conn.execute(
+                f'SELECT chunk_id, row FROM chunks WHERE chunk_id IN ({placeholders})', batch
+            ).fetchall())
+        return rows
+
+    def _get_meta(self, key):
+        row = self._conn.execute('SELECT value FROM store_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_meta(self, key, value):
+        self._conn.execute('INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)', (key, int(value)))
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+def create_remote_vector_store():
+    # Imported here so only processes using the service load its HTTP client;
+    # the local replica keeps this process's BM25 index in step as well
+    from .vector_replication import RemoteVectorStore
+    from .lexical_index import get_lexical_index
+    return RemoteVectorStore(lexical_index=get_lexical_index())
+
+
+VECTOR_STORE_BACKENDS = {
+    'chroma': ChromaVectorStore,
+    'numpy': NumpyVectorStore,
+    'remote': create_remote_vector_store
+}
+
+def create_vector_store(backend=None):
+    backend = backend or Config.VECTOR_STORE_BACKEND
+    if backend not in VECTOR_STORE_BACKENDS:
+        raise ValueError(f"Unknown vector store backend '{backend}'; expected one of {sorted(VECTOR_STORE_BACKENDS)}")
+    return VECTOR_STORE_BACKENDS[backend]()
+
+
+def get_vector_store():
+    """Return the process-wide vector store selected by VECTOR_STORE_BACKEND."""
+    return clients.get('vector_store')
+
+
+clients.register('vector_store', create_vector_store, warm_up=lambda store: store.count())
@@ -0,0 +1,167 @@
+# backend/benchmarks/chat_concurrency.py
+#
+# Load test for send_message: many chats answered at once against a
+# deliberately small SQLAlchemy pool. The OpenAI API is replaced by a local
+# stub with a fixed completion latency; the database is the one configured
+# in .env (Postgres), where a throwaway user and chats are created and
+# removed again.
+#
+#   cd backend && python -m benchmarks.chat_concurrency --chats 40 --pool-size 2
+#
+# When a connection is held for the whole LLM call, at most pool_size chats
+# can be in flight and the rest fail with a pool timeout once they wait
+# longer than --pool-timeout. With short transactions every chat succeeds
+# and the wall time stays close to one completion latency.
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIMENSIONS = 1536
+
+
+def make_handler(completion_latency):
+    class StubOpenAIHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+
+            if self.path.endswith('/embeddings'):
+                inputs = body['input'] if isinstance(body['input'], list) else [body['input']]
+                payload = {
+                    'object': 'list',
+                    'model': body['model'],
+                    'data': [{'object': 'embedding', 'index': i, 'embedding': [1.0] + [0.0] * (DIMENSIONS - 1)}
+                             for i in range(len(inputs))],
+                    'usage': {'prompt_tokens': 0, 'total_tokens': 0}
+                }
+            else:
+                time.sleep(completion_latency)
+                payload = {
+                    'id': 'chatcmpl-stub',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': body['model'],
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': 'Summary: Stub answer.'},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': {'prompt_tokens': 100, 'completion_tokens': 5, 'total_tokens': 105}
+                }
+
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return StubOpenAIHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent send_message requests against a small connection pool')
+    parser.add_argument('--chats', type=int, default=40, help='concurrent chats')
+    parser.add_argument('--pool-size', type=int, default=2)
+    parser.add_argument('--pool-timeout', type=int, default=3, help='seconds to wait for a pooled connection')
+    parser.add_argument('--latency-ms', type=float, default=5000, help='stub completion latency')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Must be set before the app (and its OpenAI clients and caches) is created
+    scratch = tempfile.mkdtemp(prefix='chat-concurrency-')
+    os.environ.update({
+        'OPENAI_API_KEY': 'stub',
+        'OPENAI_BASE_URL': f'http://127.0.0.1:{server.server_port}/v1',
+        'ANSWER_CACHE_ENABLED': 'false',
+        'QUERY_CACHE_ENABLED': 'false',
+        'VECTOR_STORE_BACKEND': 'numpy',
+        'VECTOR_STORE_DIRECTORY': os.path.join(scratch, 'vector_store'),
+        'CACHE_DIRECTORY': os.path.join(scratch, 'cache')
+    })
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.config import Config
+    from app.models.chat import Chat, Message
+    from app.models.user import User
+
+    class LoadTestConfig(Config):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': args.pool_size,
+            'max_overflow': 0,
+            'pool_timeout': args.pool_timeout
+        }
+
+    app = create_app(LoadTestConfig)
+
+    with app.app_context():
+        name = f"loadtest-{uuid.uuid4().hex[:8]}"
+        user = User(username=name, email=f"{name}@example.com")
+        user.set_password(uuid.uuid4().hex)
+        db.session.add(user)
+        db.session.flush()
+        chats = [Chat(user_id=user.id, title='Load test') for _ in range(args.chats)]
+        db.session.add_all(chats)
+        db.session.commit()
+        user_id = user.id
+        chat_ids = [chat.id for chat in chats]
+        token = create_access_token(identity=user_id)
+
+    results = []
+    results_lock = threading.Lock()
+    start_barrier = threading.Barrier(args.chats)
+
+    def send(chat_id, index):
+        client = app.test_client()
+        start_barrier.wait()
+        start = time.perf_counter()
+        response = client.post(
+            f'/api/chat/chat/{chat_id}/messages',
+            json={'message': f'How many tourists visited region {index} last year?'},
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        with results_lock:
+            results.append((response.status_code, time.perf_counter() - start, response.get_json()))
+
+    print(f"{args.chats} concurrent chats, pool_size={args.pool_size}, max_overflow=0, "
+          f"pool_timeout={args.pool_timeout}s, completion latency {args.latency_ms:.0f}ms")
+
+    threads = [threading.Thread(target=send, args=(chat_id, i)) for i, chat_id in enumerate(chat_ids)]
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+
+    succeeded = [latency for status, latency, _ in results if status == 200]
+    failed = [(status, body) for status, _, body in results if status != 200]
+    print(f"succeeded: {len(succeeded)}/{args.chats}   wall: {wall:.2f}s")
+    if succeeded:
+        print(f"latency p50 {statistics.median(succeeded):.2f}s  max {max(succeeded):.2f}s")
+    if failed:
+        print(f"first failure: {failed[0]}")
+
+    with app.app_context():
+        Message.query.filter(Message.chat_id.in_(chat_ids)).delete(synchronize_session=False)
+        Chat.query.filter(Chat.id.in_(chat_ids)).delete(synchronize_session=False)
+        User.query.filter_by(id=user_id).delete()
+        db.session.commit()
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
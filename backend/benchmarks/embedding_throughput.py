@@ -0,0 +1,106 @@
+# backend/benchmarks/embedding_throughput.py
+#
+# Compare per-chunk embedding requests with the BatchEmbedder against a local
+# stub of the OpenAI embeddings endpoint. No API key or network is needed.
+#
+#   cd backend && python -m benchmarks.embedding_throughput --chunks 300
+
+import argparse
+import contextlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from openai import OpenAI
+from app.services.batch_embedder import BatchEmbedder
+
+DIMENSIONS = 1536
+
+
+def make_handler(base_latency, per_item_latency, concurrency=None, request_counter=None):
+    """Stub embeddings endpoint serving at most ``concurrency`` requests at once (unbounded by default).
+
+    The number of inputs of each request is appended to ``request_counter`` when given.
+    """
+    slots = threading.BoundedSemaphore(concurrency) if concurrency else contextlib.nullcontext()
+
+    class StubEmbeddingHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            inputs = body['input'] if isinstance(body['input'], list) else [body['input']]
+
+            with slots:
+                if request_counter is not None:
+                    request_counter.append(len(inputs))
+                # Simulate a round trip plus a small amount of work per input
+                time.sleep(base_latency + per_item_latency * len(inputs))
+
+            payload = json.dumps({
+                'object': 'list',
+                'model': body['model'],
+                'data': [{
+                    'object': 'embedding',
+                    'index': i,
+                    'embedding': [0.0] * DIMENSIONS
+                } for i in range(len(inputs))],
+                'usage': {'prompt_tokens': 0, 'total_tokens': 0}
+            }).encode()
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return StubEmbeddingHandler
+
+
+def make_chunks(count, words_per_chunk):
+    vocabulary = ['tourist', 'arrivals', 'hotel', 'occupancy', 'Colombo', 'Kandy',
+                  'Sigiriya', 'revenue', 'region', 'growth', '2023', 'percent']
+    return [' '.join(random.choices(vocabulary, k=words_per_chunk)) for _ in range(count)]
+
+
+def run_unbatched(client, chunks):
+    for chunk in chunks:
+        client.embeddings.create(model='text-embedding-ada-002', input=chunk)
+
+
+def run_batched(client, chunks):
+    BatchEmbedder(client, model='text-embedding-ada-002').embed(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Embedding throughput: per-chunk vs batched requests')
+    parser.add_argument('--chunks', type=int, default=300)
+    parser.add_argument('--words', type=int, default=250, help='words per chunk')
+    parser.add_argument('--latency-ms', type=float, default=80, help='stub round-trip latency')
+    parser.add_argument('--per-item-ms', type=float, default=1, help='stub cost per input')
+    args = parser.parse_args()
+
+    handler = make_handler(args.latency_ms / 1000, args.per_item_ms / 1000)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = OpenAI(api_key='stub', base_url=f'http://127.0.0.1:{server.server_port}/v1')
+    chunks = make_chunks(args.chunks, args.words)
+
+    print(f"Embedding {len(chunks)} chunks of {args.words} words "
+          f"(stub latency {args.latency_ms:.0f}ms + {args.per_item_ms:.1f}ms/input)")
+
+    for label, run in (('before (1 request/chunk)', run_unbatched), ('after (BatchEmbedder)', run_batched)):
+        start = time.perf_counter()
+        run(client, chunks)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<26} {elapsed:8.2f}s  {len(chunks) / elapsed:10.1f} chunks/sec")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
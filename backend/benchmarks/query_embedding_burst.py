@@ -0,0 +1,78 @@
+# backend/benchmarks/query_embedding_burst.py
+#
+# Bursts of concurrent single-query embeddings, sent one request per query
+# and through the EmbeddingMicroBatcher, against a local stub of the OpenAI
+# embeddings endpoint. The stub serves a limited number of requests at once
+# (like a rate-limited upstream), so unbatched bursts queue behind each other.
+#
+#   cd backend && python -m benchmarks.query_embedding_burst --queries 200
+
+import argparse
+import statistics
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from openai import OpenAI
+from app.services.embedding_batcher import EmbeddingMicroBatcher
+from benchmarks.embedding_throughput import make_handler
+
+
+def burst(embed, queries):
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(queries))
+
+    def run(query):
+        barrier.wait()
+        start = time.perf_counter()
+        embed(query)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=run, args=(query,)) for query in queries]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent query embeddings: one request each vs micro-batched')
+    parser.add_argument('--queries', type=int, default=200, help='queries per burst')
+    parser.add_argument('--latency-ms', type=float, default=80, help='stub round-trip latency')
+    parser.add_argument('--per-item-ms', type=float, default=0.2, help='stub cost per input')
+    parser.add_argument('--server-concurrency', type=int, default=16, help='requests the stub serves at once')
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    requests = []
+    handler = make_handler(args.latency_ms / 1000, args.per_item_ms / 1000, args.server_concurrency, requests)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = OpenAI(api_key='stub', base_url=f'http://127.0.0.1:{server.server_port}/v1', max_retries=0)
+    batcher = EmbeddingMicroBatcher(client, model='text-embedding-ada-002',
+                                    max_wait=args.max_wait_ms / 1000, max_batch_size=args.max_batch_size)
+    queries = [f'How many tourists visited region {i} last year?' for i in range(args.queries)]
+
+    def direct(query):
+        return client.embeddings.create(model='text-embedding-ada-002', input=query).data[0].embedding
+
+    print(f"{args.queries} concurrent queries, stub latency {args.latency_ms:.0f}ms, "
+          f"{args.server_concurrency} requests served at once")
+
+    for label, embed in (('before (1 request/query)', direct), ('after (micro-batched)', batcher.embed)):
+        requests.clear()
+        latencies = burst(embed, queries)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{label:<26} requests {len(requests):5d}  "
+              f"p50 {statistics.median(latencies) * 1000:7.1f}ms  p99 {p99 * 1000:7.1f}ms")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+# backend/benchmarks/server_capacity.py
+#
+# Concurrent chat capacity of each server mode: the threaded development
+# server started by run.py, and gunicorn (gunicorn.conf.py) with gthread,
+# gevent or eventlet workers. Each mode runs as a real server process on a
+# local port. The OpenAI API is a local stub with a fixed completion latency.
+# The database is the one configured in .env, where a throwaway user and
+# chats are created and removed again.
+#
+#   cd backend && python -m benchmarks.server_capacity --chats 200 --modes dev,gthread,gevent
+#
+# With --drain, every gunicorn server gets SIGTERM while the chats are still
+# waiting on the stub. With graceful draining all of them should still succeed.
+
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import ThreadingHTTPServer
+
+from benchmarks.chat_concurrency import make_handler
+
+BACKEND_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The current mode, minus the debug reloader, which would fork a second server
+DEV_SERVER = ("from run import app; from app import socketio; "
+              "socketio.run(app, host='127.0.0.1', port={port}, allow_unsafe_werkzeug=True)")
+
+
+def start_server(mode, port, env, args):
+    if mode == 'dev':
+        command = [sys.executable, '-c', DEV_SERVER.format(port=port)]
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app']
+        env = dict(env,
+                   WEB_WORKER_CLASS=mode,
+                   WEB_BIND=f'127.0.0.1:{port}',
+                   WEB_WORKERS=str(args.workers),
+                   WEB_THREADS=str(args.threads),
+                   WEB_WORKER_CONNECTIONS=str(args.connections),
+                   WEB_ACCESS_LOG='')
+    process = subprocess.Popen(command, cwd=BACKEND_DIRECTORY, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1)
+            return process
+        except (urllib.error.URLError, ConnectionError):
+            if process.poll() is not None:
+                raise RuntimeError(f"{mode} server exited with code {process.returncode}")
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not come up within 60s")
+
+
+def send_chats(port, token, chat_ids, request_timeout, on_started=None):
+    results = []
+    results_lock = threading.Lock()
+    start_barrier = threading.Barrier(len(chat_ids) + 1)
+
+    def send(chat_id, index):
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{port}/api/chat/chat/{chat_id}/messages',
+            data=json.dumps({'message': f'How many tourists visited region {index} last year?'}).encode(),
+            headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+        )
+        start_barrier.wait()
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=request_timeout) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except Exception:
+            status = None
+        with results_lock:
+            results.append((status, time.perf_counter() - start))
+
+    threads = [threading.Thread(target=send, args=(chat_id, i)) for i, chat_id in enumerate(chat_ids)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    wall_start = time.perf_counter()
+    if on_started:
+        on_started()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - wall_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent chat capacity per server mode')
+    parser.add_argument('--chats', type=int, default=200, help='concurrent chats per mode')
+    parser.add_argument('--modes', default='dev,gthread,gevent', help='comma-separated: dev, gthread, gevent, eventlet')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=64, help='gthread threads per worker')
+    parser.add_argument('--connections', type=int, default=1000, help='gevent/eventlet connections per worker')
+    parser.add_argument('--latency-ms', type=float, default=2000, help='stub completion latency')
+    parser.add_argument('--request-timeout', type=float, default=60)
+    parser.add_argument('--drain', action='store_true', help='SIGTERM gunicorn while chats are in flight')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    stub = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency_ms / 1000))
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    # Shared with the server processes, which must not reach OpenAI or the real index
+    scratch = tempfile.mkdtemp(prefix='server-capacity-')
+    env = dict(os.environ,
+               OPENAI_API_KEY='stub',
+               OPENAI_BASE_URL=f'http://127.0.0.1:{stub.server_port}/v1',
+               ANSWER_CACHE_ENABLED='false',
+               QUERY_CACHE_ENABLED='false',
+               VECTOR_STORE_BACKEND='numpy',
+               VECTOR_STORE_DIRECTORY=os.path.join(scratch, 'vector_store'),
+               CACHE_DIRECTORY=os.path.join(scratch, 'cache'),
+               CLIENT_WARM_UP='')
+    os.environ.update(env)
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.models.chat import Chat, Message
+    from app.models.user import User
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    app = create_app()
+    with app.app_context():
+        name = f"loadtest-{uuid.uuid4().hex[:8]}"
+        user = User(username=name, email=f"{name}@example.com")
+        user.set_password(uuid.uuid4().hex)
+        db.session.add(user)
+        db.session.flush()
+        chats = {mode: [Chat(user_id=user.id, title='Load test') for _ in range(args.chats)] for mode in modes}
+        db.session.add_all([chat for mode_chats in chats.values() for chat in mode_chats])
+        db.session.commit()
+        user_id = user.id
+        chat_ids = {mode: [chat.id for chat in mode_chats] for mode, mode_chats in chats.items()}
+        token = create_access_token(identity=user_id)
+
+    print(f"{args.chats} concurrent chats per mode, completion latency {args.latency_ms:.0f}ms, "
+          f"{args.workers} gunicorn worker(s), {args.threads} threads (gthread), "
+          f"{args.connections} connections (gevent/eventlet)")
+
+    try:
+        for mode in modes:
+            try:
+                server = start_server(mode, args.port, env, args)
+            except RuntimeError as e:
+                print(f"{mode:<9} skipped: {e}")
+                continue
+
+            on_started = None
+            if args.drain and mode != 'dev':
+                def on_started():
+                    # Halfway through the stub's completion latency
+                    threading.Timer(args.latency_ms / 2000, server.send_signal, (signal.SIGTERM,)).start()
+
+            try:
+                results, wall = send_chats(args.port, token, chat_ids[mode], args.request_timeout, on_started)
+            finally:
+                if server.poll() is None:
+                    server.send_signal(signal.SIGTERM)
+                server.wait(timeout=args.request_timeout + 30)
+
+            succeeded = sorted(latency for status, latency in results if status == 200)
+            line = f"{mode:<9} succeeded {len(succeeded):4d}/{args.chats}  wall {wall:6.2f}s  " \
+                   f"{len(succeeded) / wall:6.1f} chats/s"
+            if succeeded:
+                p95 = succeeded[min(len(succeeded) - 1, int(len(succeeded) * 0.95))]
+                line += f"  p50 {statistics.median(succeeded):5.2f}s  p95 {p95:5.2f}s"
+            print(line)
+
+    finally:
+        with app.app_context():
+            all_ids = [chat_id for ids in chat_ids.values() for chat_id in ids]
+            Message.query.filter(Message.chat_id.in_(all_ids)).delete(synchronize_session=False)
+            Chat.query.filter(Chat.id.in_(all_ids)).delete(synchronize_session=False)
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+        stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# backend/benchmarks/startup_time.py
+#
+# Time from a cold interpreter to the first /health response: importing the
+# app, create_app() and the first request, each in a fresh process. Also
+# lists which heavy, ingestion-only modules the web process ended up loading.
+# No database, OpenAI or S3 access is needed.
+#
+#   cd backend && python -m benchmarks.startup_time --runs 5 --record benchmarks/results/startup_time.jsonl
+#
+# With --record, each run's medians are appended as one JSON line together
+# with the current commit, and compared with the previous line, so startup
+# time can be tracked over time.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('chromadb', 'pandas', 'PyPDF2', 'pytesseract', 'PIL', 'boto3', 'botocore', 'openai')
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+status = app.test_client().get('/health').status_code
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_health_ms': (served - created) * 1000,
+    'status': status,
+    'heavy_modules': [name for name in %r if name in sys.modules]
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_once(env):
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=BACKEND_DIRECTORY, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    # Interpreter start-up until the process exits
+    result['total_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIRECTORY,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start time of the web process up to the first /health response')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--warm-up', action='store_true', help='keep CLIENT_WARM_UP from the environment')
+    parser.add_argument('--record', help='JSON lines file to append the medians to')
+    args = parser.parse_args()
+
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get('OPENAI_API_KEY', 'stub'))
+    if not args.warm_up:
+        env['CLIENT_WARM_UP'] = ''
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    medians = {key: round(statistics.median(run[key] for run in runs), 1)
+               for key in ('import_ms', 'create_app_ms', 'first_health_ms', 'total_ms')}
+
+    print(f"{args.runs} cold starts (median): import {medians['import_ms']:.0f}ms  "
+          f"create_app {medians['create_app_ms']:.0f}ms  first /health {medians['first_health_ms']:.0f}ms  "
+          f"process total {medians['total_ms']:.0f}ms")
+    print(f"heavy modules loaded: {', '.join(runs[-1]['heavy_modules']) or 'none'}")
+    if any(run['status'] != 200 for run in runs):
+        print(f"warning: /health returned {[run['status'] for run in runs]}")
+
+    if args.record:
+        previous = None
+        if os.path.exists(args.record):
+            with open(args.record) as f:
+                lines = [line for line in f if line.strip()]
+            previous = json.loads(lines[-1]) if lines else None
+
+        entry = {
+            'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': current_commit(),
+            'runs': args.runs,
+            'heavy_modules': runs[-1]['heavy_modules'],
+            **medians
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.record)), exist_ok=True)
+        with open(args.record, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+        if previous:
+            change = medians['total_ms'] - previous['total_ms']
+            print(f"vs {previous.get('commit') or 'previous'} ({previous['recorded_at']}): "
+                  f"total {previous['total_ms']:.0f}ms -> {medians['total_ms']:.0f}ms ({change:+.0f}ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# backend/benchmarks/vector_replication_lag.py
+#
+# Write-then-read consistency of vector store read replicas. The vector store
+# service (vector_store_server.py) runs as its own process on a local port
+# over a scratch numpy store. A writer client upserts one chunk at a time
+# through it, and a replica client polls its local replica until the chunk
+# shows up in a query. That delay is reported per replica poll interval,
+# along with how often a read made right after the write was stale, and the
+# query latency of the local replica next to a query sent to the service.
+#
+#   cd backend && python -m benchmarks.vector_replication_lag --writes 200 --poll-ms 50,200,500
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+
+BACKEND_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIMENSIONS = 1536
+
+
+def start_service(port, env):
+    process = subprocess.Popen([sys.executable, 'vector_store_server.py', '--port', str(port)],
+                               cwd=BACKEND_DIRECTORY, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1)
+            return process
+        except (urllib.error.URLError, ConnectionError):
+            if process.poll() is not None:
+                raise RuntimeError(f"vector store service exited with code {process.returncode}")
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("vector store service did not come up within 60s")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write-then-read lag of vector store read replicas')
+    parser.add_argument('--writes', type=int, default=200, help='single-chunk writes per poll interval')
+    parser.add_argument('--poll-ms', default='50,200,500', help='comma-separated replica poll intervals')
+    parser.add_argument('--preload', type=int, default=5000, help='chunks stored before measuring')
+    parser.add_argument('--queries', type=int, default=200, help='queries for the latency comparison')
+    parser.add_argument('--timeout', type=float, default=10, help='give up on a write after this many seconds')
+    parser.add_argument('--port', type=int, default=5098)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='vector-replication-')
+    env = dict(os.environ,
+               VECTOR_STORE_BACKEND='numpy',
+               VECTOR_STORE_DIRECTORY=os.path.join(scratch, 'service'),
+               VECTOR_STORE_URL=f'http://127.0.0.1:{args.port}',
+               VECTOR_STORE_TOKEN='')
+    os.environ.update(env)
+
+    from app.services.vector_replication import RemoteVectorStore
+
+    rng = np.random.default_rng(0)
+    service = start_service(args.port, env)
+    try:
+        writer = RemoteVectorStore()
+        for start in range(0, args.preload, 500):
+            size = min(500, args.preload - start)
+            writer.upsert([f'preload-{start + i}' for i in range(size)],
+                          rng.standard_normal((size, DIMENSIONS)).astype(np.float32),
+                          [f'Preloaded chunk {start + i}' for i in range(size)],
+                          [{'document_id': 1, 'chunk_index': start + i, 'uploaded_at': 0} for i in range(size)])
+
+        print(f"{args.preload} chunks preloaded, {args.writes} single-chunk writes per poll interval")
+        for poll_ms in [float(value) for value in args.poll_ms.split(',') if value.strip()]:
+            reader = RemoteVectorStore(replica_directory=os.path.join(scratch, f'replica-{poll_ms:g}ms'))
+            reader.replica.poll_interval = poll_ms / 1000
+            if not reader.replica.wait_for(writer.last_written_seq, timeout=120):
+                print(f"poll {poll_ms:5.0f}ms  replica did not catch up with the preload")
+                continue
+
+            lags, stale, timeouts = [], 0, 0
+            for index in range(args.writes):
+                embedding = rng.standard_normal(DIMENSIONS).astype(np.float32)
+                chunk_id = f'write-{poll_ms:g}-{index}'
+                writer.upsert([chunk_id], [embedding], [f'Chunk {index}'],
+                              [{'document_id': 2, 'chunk_index': index, 'uploaded_at': 0}])
+                written = time.perf_counter()
+
+                first_read = True
+                while True:
+                    hits = reader.query(embedding, n_results=1)
+                    if hits and hits[0]['id'] == chunk_id:
+                        lags.append(time.perf_counter() - written)
+                        break
+                    stale += first_read
+                    first_read = False
+                    if time.perf_counter() - written > args.timeout:
+                        timeouts += 1
+                        break
+                    time.sleep(0.001)
+
+            reader.replica.stop()
+            line = f"poll {poll_ms:5.0f}ms  stale reads {stale:4d}/{args.writes}"
+            if lags:
+                line += f"  lag p50 {statistics.median(lags) * 1000:7.1f}ms  p95 {percentile(lags, 0.95) * 1000:7.1f}ms" \
+                        f"  max {max(lags) * 1000:7.1f}ms"
+            if timeouts:
+                line += f"  {timeouts} not visible after {args.timeout:g}s"
+            print(line)
+
+        replica = RemoteVectorStore(replica_directory=os.path.join(scratch, 'replica-latency'))
+        replica.replica.wait_for(writer.last_written_seq, timeout=120)
+        replica.replica.stop()
+        queries = rng.standard_normal((args.queries, DIMENSIONS)).astype(np.float32)
+        for name, store in (('replica', replica), ('service', writer)):
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                store.query(query, n_results=20)
+                latencies.append(time.perf_counter() - start)
+            print(f"query via {name:<8} p50 {statistics.median(latencies) * 1000:6.2f}ms  "
+                  f"p95 {percentile(latencies, 0.95) * 1000:6.2f}ms")
+    finally:
+        service.terminate()
+        service.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
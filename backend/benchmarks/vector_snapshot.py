@@ -0,0 +1,88 @@
+# backend/benchmarks/vector_snapshot.py
+#
+# Cost of bringing up a vector index from a snapshot. A scratch numpy store
+# is filled with synthetic chunks, exported, and imported into an empty
+# store, timing each step and the snapshot size. For comparison the same
+# chunks are written the way ingestion writes them, in INGESTION_BATCH_SIZE
+# upserts, which is the floor of rebuilding by re-ingesting even before any
+# download, OCR or embedding calls.
+#
+#   cd backend && python -m benchmarks.vector_snapshot --chunks 20000
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+from app.config import Config
+from app.services.vector_store import NumpyVectorStore
+from app.services.vector_snapshot import export_snapshot, import_snapshot, SnapshotError
+
+DIMENSIONS = 1536
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshot export/import time against rebuilding the index')
+    parser.add_argument('--chunks', type=int, default=20000)
+    parser.add_argument('--chunk-chars', type=int, default=1000, help='text length per chunk')
+    parser.add_argument('--batch-size', type=int, default=Config.INGESTION_BATCH_SIZE, help='upsert size when rebuilding')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scratch = tempfile.mkdtemp(prefix='vector-snapshot-')
+    try:
+        ids = [f'{i // 100}_{i % 100}' for i in range(args.chunks)]
+        embeddings = rng.standard_normal((args.chunks, DIMENSIONS)).astype(np.float32)
+        words = ['Sigiriya', 'arrivals', 'Kandy', 'beach', 'tourists', 'hotel', 'visa', 'season', 'Galle']
+        documents = [' '.join(rng.choice(words, args.chunk_chars // 7)) for _ in range(args.chunks)]
+        metadatas = [{'document_id': i // 100, 'chunk_index': i % 100, 'uploaded_at': 1700000000}
+                     for i in range(args.chunks)]
+
+        start = time.perf_counter()
+        rebuilt = NumpyVectorStore(os.path.join(scratch, 'rebuilt'))
+        for offset in range(0, args.chunks, args.batch_size):
+            end = offset + args.batch_size
+            rebuilt.upsert(ids[offset:end], embeddings[offset:end], documents[offset:end], metadatas[offset:end])
+        rebuild_time = time.perf_counter() - start
+
+        path = os.path.join(scratch, 'tourism_docs.vsnap')
+        start = time.perf_counter()
+        export_snapshot(rebuilt, path)
+        export_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restored = NumpyVectorStore(os.path.join(scratch, 'restored'))
+        import_snapshot(restored, path)
+        import_time = time.perf_counter() - start
+
+        query = embeddings[rng.integers(args.chunks)]
+        assert [hit['id'] for hit in restored.query(query, 10)] == [hit['id'] for hit in rebuilt.query(query, 10)]
+
+        # A flipped byte must be caught before anything is written
+        with open(path, 'r+b') as snapshot:
+            snapshot.seek(os.path.getsize(path) // 2)
+            byte = snapshot.read(1)
+            snapshot.seek(-1, os.SEEK_CUR)
+            snapshot.write(bytes([byte[0] ^ 0xFF]))
+        corrupted = NumpyVectorStore(os.path.join(scratch, 'corrupted'))
+        try:
+            import_snapshot(corrupted, path)
+            detected = False
+        except SnapshotError:
+            detected = corrupted.count() == 0
+
+        size = os.path.getsize(path)
+        print(f"{args.chunks} chunks, {DIMENSIONS} dimensions, {args.chunk_chars}-character texts")
+        print(f"rebuild in {args.batch_size}-chunk upserts  {rebuild_time:7.2f}s  (without download, OCR or embedding)")
+        print(f"snapshot export                {export_time:7.2f}s  {size / 1024 / 1024:7.1f}MB "
+              f"({size / args.chunks / 1024:.1f}KB per chunk)")
+        print(f"snapshot import                {import_time:7.2f}s  {rebuild_time / import_time:5.1f}x faster than rebuilding")
+        print(f"corruption detected before writing: {'yes' if detected else 'NO'}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# backend/benchmarks/vector_store_latency.py
+#
+# Compare query latency, cold start and memory of the vector store backends
+# on synthetic corpora. Each store is built in a temporary directory and then
+# queried from a fresh process, so start-up time and memory reflect opening
+# an existing store. No API key or network is needed.
+#
+#   cd backend && python -m benchmarks.vector_store_latency --sizes 10000,100000,1000000
+#
+# A 1M x 1536 corpus takes about 6GB of disk for the numpy backend; the
+# chroma backend is skipped above --max-chroma-size because building its
+# index at that scale takes hours.
+
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import Config
+from app.services.vector_store import ChromaVectorStore, NumpyVectorStore
+
+DIMENSIONS = 1536
+DOCUMENTS = 100
+BUILD_BATCH_SIZE = 1000
+
+
+def open_store(backend, directory):
+    if backend == 'chroma':
+        return ChromaVectorStore(persist_directory=directory)
+    return NumpyVectorStore(directory=directory)
+
+
+def random_vectors(rng, count, dimensions):
+    vectors = rng.standard_normal((count, dimensions), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build(backend, directory, size, dimensions):
+    store = open_store(backend, directory)
+    rng = np.random.default_rng(0)
+    step = min(BUILD_BATCH_SIZE, store.max_batch_size or BUILD_BATCH_SIZE)
+
+    start = time.perf_counter()
+    for offset in range(0, size, step):
+        count = min(step, size - offset)
+        ids = [f"{(offset + i) % DOCUMENTS}_{offset + i}" for i in range(count)]
+        store.upsert(
+            ids=ids,
+            embeddings=random_vectors(rng, count, dimensions).tolist(),
+            documents=[f"chunk {offset + i}" for i in range(count)],
+            metadatas=[{
+                'document_id': (offset + i) % DOCUMENTS,
+                'chunk_index': offset + i,
+                'uploaded_at': 1700000000 + (offset + i) % DOCUMENTS * 86400
+            } for i in range(count)]
+        )
+    return time.perf_counter() - start
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        # Peak rather than current RSS; kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(backend, directory, dimensions, queries, results):
+    """Runs in a fresh process: open the existing store and time queries."""
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    store = open_store(backend, directory)
+    open_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    query_vectors = random_vectors(rng, queries, dimensions).tolist()
+
+    def timed(**filters):
+        latencies = []
+        for vector in query_vectors:
+            start = time.perf_counter()
+            store.query(vector, n_results=5, **filters)
+            latencies.append(time.perf_counter() - start)
+        return np.percentile(latencies, [50, 95]) * 1000
+
+    unfiltered = timed()
+    filtered = timed(document_ids=[1, 2, 3], uploaded_after=1700000000)
+    results.put({
+        'open_ms': open_seconds * 1000,
+        'p50_ms': unfiltered[0],
+        'p95_ms': unfiltered[1],
+        'filtered_p50_ms': filtered[0],
+        'filtered_p95_ms': filtered[1],
+        'rss_mb': current_rss_mb() - rss_before
+    })
+
+
+def run(backend, size, dimensions, queries):
+    directory = tempfile.mkdtemp(prefix=f'vector-store-{backend}-')
+    try:
+        build_seconds = build(backend, directory, size, dimensions)
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        process = context.Process(target=measure, args=(backend, directory, dimensions, queries, results))
+        process.start()
+        measured = results.get()
+        process.join()
+        return {'build_s': build_seconds, **measured}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vector store query latency and memory by backend and corpus size')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma-separated corpus sizes')
+    parser.add_argument('--backends', default='numpy,chroma')
+    parser.add_argument('--dimensions', type=int, default=DIMENSIONS)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--max-chroma-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    backends = args.backends.split(',')
+
+    print(f"{args.queries} top-5 queries per run, {args.dimensions} dimensions, "
+          f"filtered queries select 3 of {DOCUMENTS} documents (default backend: {Config.VECTOR_STORE_BACKEND})\n")
+    print(f"{'backend':<8} {'vectors':>9} {'build s':>9} {'open ms':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'filt p50':>9} {'filt p95':>9} {'RSS MB':>8}")
+
+    for size in sizes:
+        for backend in backends:
+            if backend == 'chroma' and size > args.max_chroma_size:
+                print(f"{backend:<8} {size:>9}   skipped (above --max-chroma-size)")
+                continue
+            r = run(backend, size, args.dimensions, args.queries)
+            print(f"{backend:<8} {size:>9} {r['build_s']:>9.1f} {r['open_ms']:>9.1f} {r['p50_ms']:>8.2f} "
+                  f"{r['p95_ms']:>8.2f} {r['filtered_p50_ms']:>9.2f} {r['filtered_p95_ms']:>9.2f} {r['rss_mb']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
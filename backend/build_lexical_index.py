@@ -0,0 +1,34 @@
+# backend/build_lexical_index.py
+#
+# One-off build of the BM25 index for chunks stored before hybrid search
+# existed. New uploads are indexed during ingestion, so run this once after
+# upgrading (it is safe to re-run; chunks are re-indexed in place):
+#
+#   cd backend && python build_lexical_index.py
+
+from app import create_app
+from app.services.vector_store import get_vector_store
+from app.services.lexical_index import BM25Index
+
+BATCH_SIZE = 500
+
+def build_lexical_index():
+    app = create_app()
+
+    with app.app_context():
+        vector_store = get_vector_store()
+        lexical_index = BM25Index()
+
+        total = vector_store.count()
+        print(f"Indexing {total} chunks into {lexical_index.path}...")
+
+        indexed = 0
+        for ids, documents, metadatas in vector_store.iter_chunks(BATCH_SIZE):
+            lexical_index.add(ids, documents, [metadata or {} for metadata in metadatas])
+            indexed += len(ids)
+            print(f"Indexed {indexed}/{total} chunks")
+
+        print(f"\nBM25 index now holds {lexical_index.count()} chunks")
+
+if __name__ == "__main__":
+    build_lexical_index()
@@ -0,0 +1,69 @@
+# backend/gunicorn.conf.py
+#
+# Production server settings, all overridable from the environment:
+#
+#   gunicorn -c gunicorn.conf.py run:app
+#
+# Chat requests spend almost all their time waiting on OpenAI, so the default
+# worker model is gevent: every request is a greenlet and one worker process
+# holds WEB_WORKER_CONNECTIONS chats in flight. 'eventlet' (needs the eventlet
+# package) works the same way; 'gthread' uses WEB_THREADS OS threads per
+# worker instead. Socket.IO picks the matching async mode from
+# WEB_WORKER_CLASS (see Config.SOCKETIO_ASYNC_MODE).
+#
+# On SIGTERM gunicorn stops accepting connections and gives in-flight
+# requests, including streamed answers, WEB_GRACEFUL_TIMEOUT seconds to
+# finish. The container stop grace period must be longer than that.
+#
+# This file must not import the app: with gevent and eventlet, modules have
+# to be loaded after the worker has monkey-patched the standard library.
+
+import os
+
+WORKER_CLASSES = ('gevent', 'eventlet', 'gthread')
+
+worker_class = os.getenv('WEB_WORKER_CLASS', 'gevent')
+if worker_class not in WORKER_CLASSES:
+    raise ValueError(f"Unknown WEB_WORKER_CLASS '{worker_class}'; expected one of {WORKER_CLASSES}")
+# The app reads it to choose the Socket.IO async mode
+os.environ['WEB_WORKER_CLASS'] = worker_class
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:5000')
+# More than one worker needs sticky sessions for Socket.IO long-polling
+workers = int(os.getenv('WEB_WORKERS', 1))
+threads = int(os.getenv('WEB_THREADS', 64))  # gthread only
+worker_connections = int(os.getenv('WEB_WORKER_CONNECTIONS', 1000))  # gevent and eventlet only
+timeout = int(os.getenv('WEB_TIMEOUT', 120))  # seconds a worker may go silent before it is restarted
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 90))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+
+accesslog = os.getenv('WEB_ACCESS_LOG', '-') or None  # empty = off
+errorlog = '-'
+
+
+def on_starting(server):
+    server.log.info(f"Starting {workers} {worker_class} worker(s) on {bind} "
+                    f"({threads if worker_class == 'gthread' else worker_connections} requests in flight each)")
+
+
+def post_fork(server, worker):
+    # psycopg2 blocks in C; without this one slow query stalls every greenlet in the worker
+    if worker_class == 'gthread':
+        return
+    try:
+        if worker_class == 'gevent':
+            from psycogreen.gevent import patch_psycopg
+        else:
+            from psycogreen.eventlet import patch_psycopg
+    except ImportError:
+        server.log.warning("psycogreen is not installed; database calls will block the whole worker")
+        return
+    patch_psycopg()
+
+
+def worker_int(worker):
+    worker.log.info(f"Worker {worker.pid} interrupted")
+
+
+def worker_exit(server, worker):
+    server.log.info(f"Worker {worker.pid} exited after draining in-flight requests")
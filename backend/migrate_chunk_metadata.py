@@ -0,0 +1,64 @@
+# backend/migrate_chunk_metadata.py
+#
+# One-off backfill of chunk metadata for embeddings stored before chunks
+# carried their document_id. Filtered deletes and searches only see chunks
+# that have metadata, so run this once after upgrading:
+#
+#   cd backend && python migrate_chunk_metadata.py
+
+import re
+from app import create_app
+from app.models.chat import PDFDocument
+from app.services.pdf_processor import PDFProcessor
+from app.services.vector_store import ChromaVectorStore, to_timestamp
+
+CHUNK_ID = re.compile(r'^(\d+)_(\d+)$')
+BATCH_SIZE = 500
+
+def backfill_chunk_metadata():
+    app = create_app()
+
+    with app.app_context():
+        # Legacy chunks only exist in the Chroma backend
+        collection = ChromaVectorStore().collection
+
+        uploaded_at = {
+            document.id: to_timestamp(document.uploaded_at) if document.uploaded_at else 0
+            for document in PDFDocument.query.all()
+        }
+
+        total = collection.count()
+        print(f"Checking {total} chunks in '{collection.name}'...")
+
+        updated = 0
+        skipped = 0
+        for offset in range(0, total, BATCH_SIZE):
+            batch = collection.get(limit=BATCH_SIZE, offset=offset, include=['metadatas'])
+
+            ids, metadatas = [], []
+            for chunk_id, metadata in zip(batch['ids'], batch['metadatas']):
+                if metadata and 'document_id' in metadata:
+                    continue
+
+                match = CHUNK_ID.match(chunk_id)
+                if not match:
+                    skipped += 1
+                    continue
+
+                document_id, chunk_index = int(match.group(1)), int(match.group(2))
+                # The page of a legacy chunk is unknown, so page_number is left out
+                ids.append(chunk_id)
+                metadatas.append({
+                    **(metadata or {}),
+                    **PDFProcessor.chunk_metadata(document_id, None, chunk_index, uploaded_at.get(document_id, 0))
+                })
+
+            if ids:
+                collection.update(ids=ids, metadatas=metadatas)
+                updated += len(ids)
+            print(f"Processed {min(offset + BATCH_SIZE, total)}/{total} chunks")
+
+        print(f"\nBackfilled metadata for {updated} chunks ({skipped} ids did not match '<document_id>_<index>')")
+
+if __name__ == "__main__":
+    backfill_chunk_metadata()
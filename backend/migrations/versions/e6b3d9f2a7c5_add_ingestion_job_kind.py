@@ -0,0 +1,30 @@
+"""Add kind to ingestion_job for snapshot imports
+
+Revision ID: e6b3d9f2a7c5
+Revises: a4f8c2e6b1d0
+Create Date: 2026-10-18 21:06:40.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3d9f2a7c5'
+down_revision = 'a4f8c2e6b1d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ingestion_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('kind', sa.String(length=20), nullable=False, server_default='document'))
+        # Snapshot imports are not tied to a document
+        batch_op.alter_column('document_id', existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade():
+    op.execute("DELETE FROM ingestion_job WHERE document_id IS NULL")
+    with op.batch_alter_table('ingestion_job', schema=None) as batch_op:
+        batch_op.alter_column('document_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('kind')
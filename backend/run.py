@@ -1,8 +1,11 @@
 # backend/run.py
+#
+# `python run.py` starts the development server. In production gunicorn
+# serves `run:app` with the settings in gunicorn.conf.py.
 
 from app import create_app, socketio
 
 app = create_app()
 
 if __name__ == '__main__':
-    socketio.run(app, host='0.0.0.0', port=5001, debug=True, allow_unsafe_werkzeug=True)
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=5001, debug=True, allow_unsafe_werkzeug=True)
@@ -0,0 +1,62 @@
+# backend/snapshot_vector_store.py
+#
+# Export the vector index to a snapshot file, or import one, instead of
+# re-ingesting every PDF (see app/services/vector_snapshot.py for the format):
+#
+#   cd backend && python snapshot_vector_store.py export tourism_docs.vsnap
+#   cd backend && python snapshot_vector_store.py inspect tourism_docs.vsnap
+#   cd backend && python snapshot_vector_store.py import tourism_docs.vsnap
+#
+# Both directions use the store selected by VECTOR_STORE_BACKEND; with the
+# 'remote' backend an import is written through the vector store service and
+# reaches every replica. Imports also fill the BM25 index unless hybrid search
+# is disabled or --skip-lexical is given.
+
+import argparse
+import json
+import time
+from app import create_app
+from app.models.ingestion import CorpusVersion
+from app.services.vector_store import get_vector_store
+from app.services.lexical_index import get_lexical_index
+from app.services.vector_snapshot import export_snapshot, import_snapshot, read_snapshot
+
+def main():
+    parser = argparse.ArgumentParser(description='Export or import a snapshot of the vector index.')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    export_parser = subcommands.add_parser('export', help='write every stored chunk to a snapshot file')
+    export_parser.add_argument('path')
+    import_parser = subcommands.add_parser('import', help='load a snapshot file into the vector store')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--skip-lexical', action='store_true', help='do not add the chunks to the BM25 index')
+    inspect_parser = subcommands.add_parser('inspect', help='verify a snapshot file and print its manifest')
+    inspect_parser.add_argument('path')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        if args.command == 'export':
+            vector_store = get_vector_store()
+            print(f"Exporting {vector_store.count()} chunks to {args.path}...")
+            manifest = export_snapshot(vector_store, args.path)
+            print(f"Wrote {manifest['count']} chunks ({manifest['dimensions']} dimensions)")
+
+        elif args.command == 'import':
+            lexical_index = None if args.skip_lexical else get_lexical_index()
+            start = time.perf_counter()
+            manifest = import_snapshot(get_vector_store(), args.path, lexical_index=lexical_index)
+            print(f"Imported {manifest['count']} chunks in {time.perf_counter() - start:.2f}s")
+            # Cached answers were computed against the previous corpus
+            CorpusVersion.bump()
+            print(f"Vector store now holds {get_vector_store().count()} chunks "
+                  f"(snapshot of {manifest['created_at']})")
+
+        else:
+            with read_snapshot(args.path) as snapshot:
+                manifest = snapshot[0]
+            print(json.dumps(manifest, indent=2))
+            print("\nAll checksums match")
+
+if __name__ == "__main__":
+    main()
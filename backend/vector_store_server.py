@@ -0,0 +1,147 @@
+# backend/vector_store_server.py
+#
+# The vector store service: the single writer of the vector index when
+# VECTOR_STORE_BACKEND=remote is used elsewhere (see
+# app/services/vector_replication.py). It wraps the store selected by
+# VECTOR_STORE_BACKEND in this process ('chroma' or 'numpy') and records
+# every write in the change log that read replicas follow.
+#
+# Run one process with one worker, so there is exactly one writer:
+#
+#   cd backend && WEB_WORKER_CLASS=gthread WEB_WORKERS=1 WEB_BIND=0.0.0.0:5002 \
+#       gunicorn -c gunicorn.conf.py vector_store_server:app
+#
+# or, for development, python vector_store_server.py --port 5002
+#
+# Every VECTOR_STORE_COMPACT_INTERVAL seconds the service refreshes its
+# snapshot and drops the changes it holds from the change log.
+
+import argparse
+import hmac
+import threading
+import time
+from flask import Flask, abort, jsonify, request, send_file
+from app.config import Config
+from app.services.vector_store import create_vector_store
+from app.services.vector_replication import ChangeLog, ChangesCompacted, LoggedVectorStore, decode_vectors
+
+
+def create_server_app(store=None, change_log=None, token=None):
+    if store is None:
+        if Config.VECTOR_STORE_BACKEND == 'remote':
+            raise ValueError("The vector store service needs a local backend; set VECTOR_STORE_BACKEND to 'chroma' or 'numpy'")
+        store = create_vector_store()
+    store = LoggedVectorStore(store, change_log or ChangeLog())
+    store.seed_change_log()
+    token = token if token is not None else Config.VECTOR_STORE_TOKEN
+
+    server = Flask(__name__)
+    server.config['MAX_CONTENT_LENGTH'] = None
+    server.extensions['vector_store'] = store
+
+    @server.before_request
+    def check_token():
+        if request.path == '/health' or not token:
+            return
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+
+    @server.route('/health')
+    def health():
+        return jsonify({'status': 'healthy', 'seq': store.change_log.last_seq()})
+
+    @server.route('/upsert', methods=['POST'])
+    def upsert():
+        data = request.get_json()
+        embeddings = decode_vectors(data['embeddings'], data['dimensions'])
+        seq = store.upsert(data['ids'], embeddings, data['documents'], data['metadatas'])
+        return jsonify({'seq': seq})
+
+    @server.route('/delete_document', methods=['POST'])
+    def delete_document():
+        return jsonify({'seq': store.delete_document(request.get_json()['document_id'])})
+
+    @server.route('/query', methods=['POST'])
+    def query():
+        data = request.get_json()
+        hits = store.query(data['embedding'],
+                           n_results=data.get('n_results', 5),
+                           document_ids=data.get('document_ids'),
+                           uploaded_after=data.get('uploaded_after'),
+                           uploaded_before=data.get('uploaded_before'),
+                           include_embeddings=data.get('include_embeddings', False))
+        return jsonify({'hits': hits})
+
+    @server.route('/get_embeddings', methods=['POST'])
+    def get_embeddings():
+        embeddings = store.get_embeddings(request.get_json()['ids'])
+        return jsonify({'embeddings': {chunk_id: list(map(float, embedding))
+                                       for chunk_id, embedding in embeddings.items()}})
+
+    @server.route('/get_documents', methods=['POST'])
+    def get_documents():
+        return jsonify({'documents': store.get_documents(request.get_json()['ids'])})
+
+    @server.route('/chunks')
+    def chunks():
+        # One batch after the client's cursor, for backfills such as build_lexical_index.py
+        cursor = request.args.get('cursor', type=int)
+        batch_size = min(request.args.get('batch_size', 500, type=int), 5000)
+        ids, documents, metadatas, next_cursor = store.chunk_page(cursor, batch_size)
+        return jsonify({'ids': ids, 'documents': documents, 'metadatas': metadatas, 'next_cursor': next_cursor})
+
+    @server.route('/count')
+    def count():
+        return jsonify({'count': store.count()})
+
+    @server.route('/changes')
+    def changes():
+        since = request.args.get('since', 0, type=int)
+        limit = min(request.args.get('limit', 500, type=int), 5000)
+        try:
+            return jsonify({'changes': store.change_log.since(since, limit)})
+        except ChangesCompacted as e:
+            # The replica rebuilds itself from /snapshot
+            return jsonify({'error': str(e), 'compacted_seq': store.change_log.compacted_seq()}), 410
+
+    @server.route('/snapshot')
+    def snapshot():
+        # Warm start for new replicas: the snapshot records the change it is current to
+        path, manifest = store.snapshot()
+        response = send_file(path, mimetype='application/x-tar', download_name='tourism_docs.vsnap')
+        response.headers['X-Change-Seq'] = str(manifest['change_seq'])
+        return response
+
+    return server
+
+
+def start_compaction(store, interval=None):
+    """Compact the change log of ``store`` (a LoggedVectorStore) every ``interval`` seconds in a daemon thread."""
+    interval = Config.VECTOR_STORE_COMPACT_INTERVAL if interval is None else interval
+    if not interval:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                removed = store.compact()
+                if removed:
+                    print(f"Compacted {removed} changes from the vector store change log")
+            except Exception as e:
+                print(f"Error compacting the vector store change log: {e}")
+
+    thread = threading.Thread(target=run, name='change-log-compaction', daemon=True)
+    thread.start()
+    return thread
+
+
+app = create_server_app()
+start_compaction(app.extensions['vector_store'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the vector store to remote clients and read replicas.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5002)
+    args = parser.parse_args()
+    app.run(host=args.host, port=args.port, threaded=True)
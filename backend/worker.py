@@ -0,0 +1,38 @@
+# backend/worker.py
+#
+# The PDF extraction and OCR pools start their processes with 'spawn', which
+# re-imports this module in every child. The app is therefore only imported
+# and created in main(), so pool children load nothing but the modules their
+# tasks need.
+
+import argparse
+import signal
+
+
+def main():
+    from app import create_app
+    from app.config import Config
+    from app.services.ingestion_worker import IngestionWorker
+
+    parser = argparse.ArgumentParser(description='Run document ingestion jobs from the job queue.')
+    parser.add_argument('--concurrency', type=int, default=Config.INGESTION_WORKER_CONCURRENCY,
+                        help='number of documents processed at once')
+    parser.add_argument('--worker-id', help='identifier recorded on leased jobs (default: host:pid)')
+    args = parser.parse_args()
+
+    app = create_app()
+    worker = IngestionWorker(app, concurrency=args.concurrency, worker_id=args.worker_id)
+
+    def shutdown(signum, frame):
+        print("Shutting down ingestion worker, waiting for running jobs...")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    worker.start()
+    worker.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@ import React, { useState, useEffect, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { toast } from 'react-toastify';
 import axios from 'axios';
-import io from 'socket.io-client';
+import { createSocket } from '../../utils/socket';
 import { 
   TrashIcon, 
   DocumentIcon,
@@ -46,7 +46,8 @@ const Dashboard = () => {
   }, [navigate]);
 
   useEffect(() => {
-    const socket = io(process.env.REACT_APP_API_URL);
+    // Progress of every document, from the admin room
+    const socket = createSocket((s) => s.emit('subscribe_admin'));
 
     socket.on('document_progress', (data) => {
       console.log('Progress update received:', data);
@@ -1,7 +1,7 @@
-import React, { useState, useRef, useEffect } from 'react';
+import React, { useState, useRef, useEffect, useCallback } from 'react';
 import { toast } from 'react-toastify';
 import axios from 'axios';
-import io from 'socket.io-client';
+import { createSocket } from '../../utils/socket';
 import { 
   CloudArrowUpIcon, 
   DocumentTextIcon,
@@ -77,36 +77,56 @@ const FileUpload = ({ onUploadSuccess }) => {
   const [processingFiles, setProcessingFiles] = useState({});
   const fileInputRef = useRef(null);
   const socketRef = useRef(null);
+  const subscribedRef = useRef(new Set());
 
-  useEffect(() => {
-    socketRef.current = io(process.env.REACT_APP_API_URL);
-
-    socketRef.current.on('document_progress', (data) => {
-      setProcessingFiles(prev => ({
-        ...prev,
-        [data.document_id]: {
-          status: data.status,
-          message: data.message,
-          percentage: data.percentage
-        }
-      }));
+  const applyProgress = useCallback((data) => {
+    // Ignore late events for documents already finished and cleared
+    if (!subscribedRef.current.has(data.document_id)) return;
 
-      if (data.status === 'completed' || data.status === 'error') {
-        onUploadSuccess();
-        
-        // Remove from processing after a delay
-        setTimeout(() => {
-          setProcessingFiles(prev => {
-            const newState = { ...prev };
-            delete newState[data.document_id];
-            return newState;
-          });
-        }, 3000);
+    setProcessingFiles(prev => ({
+      ...prev,
+      [data.document_id]: {
+        status: data.status,
+        message: data.message,
+        percentage: data.percentage
       }
+    }));
+
+    if (['completed', 'error', 'cancelled'].includes(data.status)) {
+      onUploadSuccess();
+      
+      socketRef.current?.emit('unsubscribe_document', { document_id: data.document_id });
+      subscribedRef.current.delete(data.document_id);
+
+      // Remove from processing after a delay
+      setTimeout(() => {
+        setProcessingFiles(prev => {
+          const newState = { ...prev };
+          delete newState[data.document_id];
+          return newState;
+        });
+      }, 3000);
+    }
+  }, [onUploadSuccess]);
+
+  // Joining a document's room replies with its current progress, which
+  // covers the events sent before the subscription (or while disconnected)
+  const subscribe = useCallback((socket, documentId) => {
+    socket.emit('subscribe_document', { document_id: documentId }, (state) => {
+      if (state && !state.error) applyProgress(state);
+    });
+  }, [applyProgress]);
+
+  useEffect(() => {
+    // Only the documents uploaded here; re-subscribed after a reconnect
+    socketRef.current = createSocket((socket) => {
+      subscribedRef.current.forEach((documentId) => subscribe(socket, documentId));
     });
 
+    socketRef.current.on('document_progress', applyProgress);
+
     return () => socketRef.current?.disconnect();
-  }, [onUploadSuccess]);
+  }, [applyProgress, subscribe]);
 
   const handleFileSelect = (e) => {
     const selectedFiles = Array.from(e.target.files).filter(
@@ -161,15 +181,22 @@ const FileUpload = ({ onUploadSuccess }) => {
         );
         
         // Initialize processing status for the new document
+        const documentId = response.data.document.id;
         setProcessingFiles(prev => ({
           ...prev,
-          [response.data.document.id]: {
+          [documentId]: {
             status: 'uploading',
             message: 'Starting upload...',
             percentage: 0
           }
         }));
 
+        // Follow the new document's progress, starting from its current state
+        subscribedRef.current.add(documentId);
+        if (socketRef.current?.connected) {
+          subscribe(socketRef.current, documentId);
+        }
+
         return response.data;
       } catch (error) {
         console.error('Upload error:', error);
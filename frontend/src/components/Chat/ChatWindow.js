@@ -14,6 +14,7 @@ import ChatHistory from './ChatHistory';
 import MessageBubble from './MessageBubble';
 import WelcomeScreen from './WelcomeScreen';
 import Loading from '../common/loading';
+import { readEventStream } from '../../utils/eventStream';
 
 const ChatWindow = ({ user, setAuth }) => {
   const [messages, setMessages] = useState([]);
@@ -100,33 +101,66 @@ const ChatWindow = ({ user, setAuth }) => {
         navigate(`/chat/${currentChatId}`);
       }
 
-      const response = await axios.post(
-        `${process.env.REACT_APP_API_URL}/api/chat/chat/${currentChatId}/messages`,
-        { message: messageText },
-        {
-          headers: { Authorization: `Bearer ${token}` }
-        }
-      );
-
-      const newMessages = [
+      const streamingId = `streaming-${Date.now()}`;
+      setMessages(prevMessages => [
+        ...prevMessages,
         {
           id: Date.now(),
           content: messageText,
           role: 'user',
           created_at: new Date().toISOString()
         }
-      ];
+      ]);
 
-      if (response.data.response) {
-        newMessages.push({
-          id: response.data.response.id,
-          content: response.data.response.content,
-          role: 'assistant',
-          created_at: response.data.response.created_at
+      // The assistant message is added with the first piece of text and replaced by the stored one at the end
+      const updateStreamingMessage = (update) => {
+        setMessages(prevMessages => {
+          const current = prevMessages.find(message => message.id === streamingId)
+            || { id: streamingId, content: '', role: 'assistant', created_at: new Date().toISOString() };
+          return [...prevMessages.filter(message => message.id !== streamingId), update(current)];
         });
+      };
+
+      // The answer arrives as server-sent events: text deltas, then the stored message
+      const response = await fetch(
+        `${process.env.REACT_APP_API_URL}/api/chat/chat/${currentChatId}/messages/stream`,
+        {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+            Authorization: `Bearer ${token}`
+          },
+          body: JSON.stringify({ message: messageText })
+        }
+      );
+
+      if (!response.ok) {
+        const error = new Error(`Request failed with status ${response.status}`);
+        error.response = { status: response.status };
+        throw error;
       }
 
-      setMessages(prevMessages => [...prevMessages, ...newMessages]);
+      let streamError = null;
+      await readEventStream(response, (event, data) => {
+        if (event === 'delta') {
+          setTypingEffect(false);
+          updateStreamingMessage(message => ({ ...message, content: message.content + data.content }));
+        } else if (event === 'done') {
+          updateStreamingMessage(() => ({
+            id: data.id,
+            content: data.content,
+            role: 'assistant',
+            created_at: data.created_at
+          }));
+        } else if (event === 'error') {
+          streamError = new Error(data.error);
+        }
+      });
+
+      if (streamError) {
+        setMessages(prevMessages => prevMessages.filter(message => message.id !== streamingId));
+        throw streamError;
+      }
     } catch (error) {
       console.error('Error sending message:', error);
       if (error.response?.status === 401) {
@@ -187,7 +221,7 @@ const ChatWindow = ({ user, setAuth }) => {
               isLast={index === messages.length - 1}
             />
           ))}
-          {(loading || typingEffect) && (
+          {typingEffect && (
             <div className="flex gap-4 items-start">
               <div className="flex-1 max-w-[80%] bg-white border border-gray-200 rounded-lg p-4">
                 <div className="typing-dots">
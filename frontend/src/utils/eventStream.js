@@ -0,0 +1,38 @@
+// frontend/src/utils/eventStream.js
+
+// Read a text/event-stream fetch response, calling onEvent(event, data) for
+// every event with its JSON data parsed.
+export const readEventStream = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  const dispatch = (rawEvent) => {
+    let event = 'message';
+    const dataLines = [];
+    rawEvent.split('\n').forEach((line) => {
+      if (line.startsWith('event:')) {
+        event = line.slice(6).trim();
+      } else if (line.startsWith('data:')) {
+        dataLines.push(line.slice(5).trim());
+      }
+    });
+    if (dataLines.length) {
+      onEvent(event, JSON.parse(dataLines.join('\n')));
+    }
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const events = buffer.split('\n\n');
+    buffer = events.pop();
+    events.forEach(dispatch);
+  }
+
+  if (buffer.trim()) {
+    dispatch(buffer);
+  }
+};
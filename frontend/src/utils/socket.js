@@ -0,0 +1,20 @@
+// frontend/src/utils/socket.js
+import io from 'socket.io-client';
+import { getToken } from './auth';
+
+// Connect to the backend Socket.IO server with the stored access token.
+// Progress events are only delivered to rooms the client subscribes to, and
+// rooms are lost when the connection drops, so `subscribe` runs again on
+// every (re)connect.
+export const createSocket = (subscribe) => {
+  const socket = io(process.env.REACT_APP_API_URL, {
+    auth: (callback) => callback({ token: getToken() })
+  });
+
+  socket.on('connect', () => subscribe(socket));
+  socket.on('connect_error', (error) => {
+    console.error('Socket.IO connection error:', error.message);
+  });
+
+  return socket;
+};